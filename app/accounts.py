@@ -0,0 +1,346 @@
+"""
+Chart-of-accounts hierarchy over the statement line items.
+
+A chart is a forest of account groups whose leaves are line items
+(``"income.rent"``, ``"balance.cash_on_hand"``). ``DEFAULT_CHART`` groups the
+income statement into revenue and expenses and the balance sheet into
+assets, liabilities and equity, matching the dashboard's breakdowns; a JSON
+file with the same structure can replace it (``CHART_OF_ACCOUNTS_PATH``).
+
+``ChartRollup`` sums every group bottom-up for all of a store's periods at
+once (one vector addition per child), so drill-down is a path lookup plus
+reading precomputed values: a node's share of its parent or root is O(depth)
+and listing its children is O(children).
+"""
+
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from app.models import BalanceSheetPeriod, IncomeStatementPeriod
+from app.periods import PeriodStore
+from app.tables import line_item_fields
+
+STATEMENT_FIELDS = {
+    "income": set(line_item_fields(IncomeStatementPeriod)),
+    "balance": set(line_item_fields(BalanceSheetPeriod)),
+}
+
+
+def _leaves(statement: str, *names: str) -> list[dict]:
+    return [{"field": f"{statement}.{name}"} for name in names]
+
+
+DEFAULT_CHART = [
+    {
+        "key": "revenue",
+        "label": "Revenue",
+        "children": [
+            {
+                "key": "sales",
+                "label": "Net Sales",
+                "children": _leaves(
+                    "income",
+                    "food_beverage_sales",
+                    "tips",
+                    "non_taxable_grocery",
+                    "liquor_sales",
+                    "consignment_sales",
+                    "gift_card_sales",
+                ),
+            },
+            {"key": "other", "label": "Other Revenue", "children": _leaves("income", "grants", "interest_revenue")},
+        ],
+    },
+    {
+        "key": "expenses",
+        "label": "Expenses",
+        "children": [
+            {
+                "key": "cogs",
+                "label": "Cost of Goods Sold",
+                "children": [
+                    *_leaves("income", "small_tools_supplies"),
+                    {
+                        "key": "purchases",
+                        "label": "Purchases",
+                        "children": _leaves(
+                            "income",
+                            "inventory_beginning",
+                            "delivery_services",
+                            "freight_expense",
+                            "food_beverage_purchases",
+                            "liquor_purchases",
+                            "kitchen_supplies",
+                            "consignment_purchases",
+                            "inventory_end",
+                        ),
+                    },
+                    {
+                        "key": "payroll",
+                        "label": "Payroll",
+                        "children": _leaves("income", "wages_salaries", "ei_expense", "cpp_expense", "wsib_expense"),
+                    },
+                ],
+            },
+            {
+                "key": "ga",
+                "label": "General & Administrative",
+                "children": [
+                    *_leaves(
+                        "income",
+                        "rent",
+                        "interest_bank_charges",
+                        "amortization",
+                        "insurance",
+                        "accounting_legal",
+                        "advertising",
+                        "repairs_maintenance",
+                        "vehicle_expenses",
+                        "telephone",
+                    ),
+                    {
+                        "key": "other",
+                        "label": "Other G&A",
+                        "children": _leaves(
+                            "income",
+                            "business_fees",
+                            "office_supplies",
+                            "travel_entertainment",
+                            "utilities",
+                            "cleaning_supplies",
+                            "licensing",
+                        ),
+                    },
+                ],
+            },
+        ],
+    },
+    {
+        "key": "assets",
+        "label": "Assets",
+        "children": [
+            {
+                "key": "current",
+                "label": "Current Assets",
+                "children": [
+                    {
+                        "key": "cash",
+                        "label": "Cash",
+                        "children": _leaves("balance", "cash_on_hand", "savings_account", "chequing_account"),
+                    },
+                    *_leaves("balance", "inventory"),
+                ],
+            },
+            {
+                "key": "capital",
+                "label": "Capital Assets",
+                "children": [
+                    {
+                        "key": "leasehold",
+                        "label": "Leasehold (net)",
+                        "children": _leaves("balance", "leasehold_improvements", "leasehold_amortization"),
+                    },
+                    {
+                        "key": "furniture",
+                        "label": "Furniture & Equipment (net)",
+                        "children": _leaves("balance", "furniture_equipment", "furniture_amortization"),
+                    },
+                ],
+            },
+        ],
+    },
+    {
+        "key": "liabilities",
+        "label": "Liabilities",
+        "children": [
+            {
+                "key": "current",
+                "label": "Current Liabilities",
+                "children": [
+                    *_leaves("balance", "accounts_payable", "ei_payable", "cpp_payable", "wsib_payable"),
+                    {
+                        "key": "gst_hst",
+                        "label": "GST/HST Remittances",
+                        "children": _leaves("balance", "gst_hst_collected", "gst_hst_paid"),
+                    },
+                ],
+            },
+            {
+                "key": "long_term",
+                "label": "Long-Term Liabilities",
+                "children": _leaves("balance", "bdc_loan", "cibc_loan", "shareholder_loan"),
+            },
+        ],
+    },
+    {
+        "key": "equity",
+        "label": "Equity",
+        "children": [
+            *_leaves("balance", "share_capital"),
+            {
+                "key": "retained_earnings",
+                "label": "Retained Earnings",
+                "children": _leaves("balance", "retained_earnings_previous", "current_earnings"),
+            },
+        ],
+    },
+]
+
+
+@dataclass(frozen=True)
+class AccountNode:
+    index: int
+    key: str
+    label: str
+    path: str
+    depth: int
+    parent: int | None
+    children: tuple[int, ...]
+    # "statement.field" for leaves, None for groups
+    field: str | None = None
+
+
+class Chart:
+    """A validated chart, flattened in pre-order (parents before children)"""
+
+    def __init__(self, definition: list[dict]):
+        self.definition = definition
+        self.nodes: list[AccountNode] = []
+        self.roots = self._add_siblings(definition, None, "", 0)
+        self.by_path = {node.path: node for node in self.nodes}
+
+    def _add_siblings(self, items: list[dict], parent: int | None, prefix: str, depth: int) -> tuple[int, ...]:
+        indexes = []
+        keys = set()
+        for item in items:
+            field = item.get("field")
+            key = item.get("key") or (field.split(".", 1)[-1] if field else None)
+            if not key or "/" in key:
+                raise ValueError(f"Invalid account key {key!r} under {prefix or 'the root'}")
+            if key in keys:
+                raise ValueError(f"Duplicate account key {key!r} under {prefix or 'the root'}")
+            keys.add(key)
+            indexes.append(self._add(item, key, parent, f"{prefix}{key}", depth))
+        return tuple(indexes)
+
+    def _add(self, item: dict, key: str, parent: int | None, path: str, depth: int) -> int:
+        field = item.get("field")
+        children = item.get("children")
+        if (field is None) == (children is None):
+            raise ValueError(f"Account {path} needs either a field or children")
+        if field is not None:
+            statement, _, name = field.partition(".")
+            if name not in STATEMENT_FIELDS.get(statement, ()):
+                raise ValueError(f"Account {path} maps to unknown line item {field}")
+        label = item.get("label") or key.replace("_", " ").title()
+        index = len(self.nodes)
+        self.nodes.append(None)  # reserve the pre-order slot
+        child_indexes = self._add_siblings(children or [], index, f"{path}/", depth + 1)
+        self.nodes[index] = AccountNode(index, key, label, path, depth, parent, child_indexes, field)
+        return index
+
+    def get(self, path: str) -> AccountNode | None:
+        return self.by_path.get(path.strip("/"))
+
+    def tree(self, indexes: tuple[int, ...] | None = None) -> list[dict]:
+        """Nested structure of the chart (keys, labels, paths, line items)"""
+        result = []
+        for i in self.roots if indexes is None else indexes:
+            node = self.nodes[i]
+            entry = {"key": node.key, "label": node.label, "path": node.path}
+            if node.field:
+                entry["field"] = node.field
+            else:
+                entry["children"] = self.tree(node.children)
+            result.append(entry)
+        return result
+
+
+def load_chart(path: str | Path) -> Chart:
+    """Chart from a JSON file holding a list of root accounts"""
+    with open(path, encoding="utf-8") as f:
+        return Chart(json.load(f))
+
+
+def _number(value: float) -> float | None:
+    return None if math.isnan(value) else round(value, 2)
+
+
+def _percent(part: float, whole: float) -> float | None:
+    if math.isnan(part) or math.isnan(whole) or whole == 0:
+        return None
+    return round(part / whole * 100, 1)
+
+
+class ChartRollup:
+    """Every chart node's total for every period of one store.
+
+    Leaves are the store's own table columns; groups are summed once, children
+    left to right, into one row of ``totals`` each. Periods missing the
+    statement a leaf comes from are NaN and reported as null.
+    """
+
+    def __init__(self, chart: Chart, store: PeriodStore):
+        self.chart = chart
+        self.store = store
+        tables = {"income": store.income_table, "balance": store.balance_table}
+        groups = [node.index for node in chart.nodes if node.field is None]
+        self._row = {index: row for row, index in enumerate(groups)}
+        self.totals = np.zeros((len(groups), len(store)))
+        self._leaves = {}
+        for node in reversed(chart.nodes):  # children before parents
+            if node.field is not None:
+                statement, _, name = node.field.partition(".")
+                self._leaves[node.index] = tables[statement][name]
+                continue
+            total = self.totals[self._row[node.index]]
+            for child in node.children:
+                total += self.column(child)
+
+    def column(self, index: int) -> np.ndarray:
+        """Values of node ``index`` for every period"""
+        if index in self._leaves:
+            return self._leaves[index]
+        return self.totals[self._row[index]]
+
+    def value(self, index: int, period: int) -> float:
+        return float(self.column(index)[period])
+
+    def _summary(self, node: AccountNode, period: int, parent_value: float | None) -> dict:
+        value = self.value(node.index, period)
+        entry = {"key": node.key, "path": node.path, "label": node.label, "value": _number(value)}
+        if parent_value is not None:
+            entry["pct_of_parent"] = _percent(value, parent_value)
+        if node.field:
+            entry["field"] = node.field
+        else:
+            entry["has_children"] = bool(node.children)
+        return entry
+
+    def roots(self, period: int) -> list[dict]:
+        return [self._summary(self.chart.nodes[i], period, None) for i in self.chart.roots]
+
+    def drill_down(self, node: AccountNode, period: int) -> dict:
+        """A node's value, its share of its parent and root, its ancestors and its children"""
+        value = self.value(node.index, period)
+        ancestors = []
+        parent = node.parent
+        while parent is not None:
+            ancestors.append(self.chart.nodes[parent])
+            parent = ancestors[-1].parent
+        ancestors.reverse()
+        parent_value = self.value(ancestors[-1].index, period) if ancestors else None
+        root_value = self.value(ancestors[0].index, period) if ancestors else value
+        return {
+            **self._summary(node, period, parent_value),
+            "pct_of_root": _percent(value, root_value),
+            "ancestors": [
+                {"key": a.key, "path": a.path, "label": a.label, "value": _number(self.value(a.index, period))}
+                for a in ancestors
+            ],
+            "children": [self._summary(self.chart.nodes[i], period, value) for i in node.children],
+        }
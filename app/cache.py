@@ -0,0 +1,157 @@
+"""
+Versioned memoization cache for derived financial payloads.
+
+Entries are keyed by (endpoint, fiscal year, data version). Data versions
+are content hashes, so each lookup also gives the version's generation, a
+number that increases with every dataset loaded. A lookup for a newer
+generation drops every entry computed from older data, so reloading
+statements invalidates the cache without any explicit call. A lookup for a
+superseded generation (a request or background job that started before the
+reload) computes its value without storing it and leaves the cache as it is.
+``advance`` announces a new generation before anything looks it up, so results
+computed for the data it replaces are no longer stored. Size is bounded with
+LRU eviction.
+
+Dropped entries are kept aside as the last completed result for their
+(endpoint, fiscal year), so ``get_or_stale`` can answer immediately with the
+previous version's value while a fresh one is computed elsewhere.
+"""
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+
+class VersionedCache:
+    """Bounded LRU cache whose entries are tied to a data version."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        # Configured size, before ``reserve``
+        self.base_maxsize = maxsize
+        self.version: str | None = None
+        # Generation of ``version``, and the newest generation announced or looked up
+        self.generation = 0
+        self.latest_generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.superseded = 0
+        # key -> (value, computed at); stale: (endpoint, year) -> (value, version, computed at)
+        self._entries: OrderedDict[tuple, tuple[Any, float]] = OrderedDict()
+        self._stale: OrderedDict[tuple, tuple[Any, str, float]] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def reserve(self, entries: int) -> None:
+        """Make room for ``entries`` on top of the configured size (e.g. precomputed ones)"""
+        with self._lock:
+            self.maxsize = self.base_maxsize + entries
+
+    def advance(self, generation: int) -> None:
+        """Announce a new data generation; results computed for older ones are no longer stored"""
+        with self._lock:
+            self.latest_generation = max(self.latest_generation, generation)
+
+    def _sync_version(self, version: str, generation: int) -> bool:
+        """Move the cache to ``version`` if it's the newest; False if it has been superseded"""
+        if generation < self.latest_generation:
+            return False
+        self.latest_generation = self.generation = generation
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            for (endpoint, year, old_version), (value, computed_at) in self._entries.items():
+                self._stale[(endpoint, year)] = (value, old_version, computed_at)
+                self._stale.move_to_end((endpoint, year))
+            while len(self._stale) > self.maxsize:
+                self._stale.popitem(last=False)
+            self._entries.clear()
+            self.version = version
+        return True
+
+    def get_or_compute(
+        self, endpoint: str, year: Hashable, version: str, compute: Callable[[], Any], generation: int = 0
+    ) -> Any:
+        """Return the cached value for the key, computing and storing it on a miss.
+
+        Exceptions raised by ``compute`` propagate and nothing is cached.
+        """
+        return self.get_or_stale(endpoint, year, version, compute, generation, allow_stale=False)[0]
+
+    def get_or_stale(
+        self,
+        endpoint: str,
+        year: Hashable,
+        version: str,
+        compute: Callable[[], Any],
+        generation: int = 0,
+        allow_stale: bool = True,
+    ) -> tuple[Any, str, float]:
+        """(value, its data version, when it was computed) for the key.
+
+        On a miss, returns the last completed result from an older data version
+        if ``allow_stale`` and there is one, without computing; otherwise
+        computes and stores the value as ``get_or_compute`` does. Values for a
+        superseded generation are computed and returned but never stored.
+        """
+        key = (endpoint, year, version)
+        with self._lock:
+            if not self._sync_version(version, generation):
+                self.superseded += 1
+                current = False
+            elif key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value, computed_at = self._entries[key]
+                return value, version, computed_at
+            elif allow_stale and (endpoint, year) in self._stale:
+                self.stale_hits += 1
+                return self._stale[(endpoint, year)]
+            else:
+                self.misses += 1
+                current = True
+
+        value = compute()
+        computed_at = time.time()
+        if not current:
+            return value, version, computed_at
+
+        with self._lock:
+            # Data may have been reloaded while computing; don't store superseded results
+            if version == self.version and generation >= self.latest_generation:
+                self._entries[key] = (value, computed_at)
+                self._entries.move_to_end(key)
+                self._stale.pop((endpoint, year), None)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value, version, computed_at
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stale.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current occupancy"""
+        lookups = self.hits + self.misses + self.stale_hits
+        return {
+            "data_version": self.version,
+            "generation": self.generation,
+            "size": len(self._entries),
+            "stale_size": len(self._stale),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "superseded": self.superseded,
+        }
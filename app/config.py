@@ -4,13 +4,93 @@ Configuration management for Little Red Coffee Financial Dashboard.
 Square API, recipe, inventory, and POS config has been migrated to lrc-operations.
 """
 
+from pathlib import Path
+
 from pydantic_settings import BaseSettings
 
+BASE_DIR = Path(__file__).parent.parent
+
 
 class Settings(BaseSettings):
     app_name: str = "Little Red Coffee - Financial Dashboard"
     debug: bool = False
 
+    # Max entries in the derived payload cache (LRU beyond this), on top of
+    # the ones the background precompute fills
+    payload_cache_size: int = 256
+
+    # Max period windows (a fiscal year's latest period and the one before it)
+    # read from the ledger for period-scoped payloads, LRU beyond this
+    period_window_cache_size: int = 512
+
+    # SQLite statement ledger, seeded from data/financials.py when empty
+    ledger_path: str = "data/ledger.db"
+    ledger_read_pool_size: int = 4
+
+    # Memory-mapped snapshot of the loaded statements, kept next to the ledger
+    # and rebuilt when the ledger changes; workers start by mapping it
+    snapshot_enabled: bool = True
+
+    # Bulk trial-balance / GL imports: worker processes and rows per chunk
+    import_workers: int = 4
+    import_chunk_rows: int = 5000
+
+    # Monte Carlo cash runway: worker processes, paths per chunk (runs of one
+    # chunk stay in the request), largest run allowed and the time budget
+    # (seconds) after which a run returns the paths finished so far
+    simulation_workers: int = 4
+    simulation_chunk_paths: int = 10000
+    simulation_max_paths: int = 200000
+    simulation_time_budget: float = 5.0
+
+    # Cache-Control max-age (seconds) for /api/* responses, with optional
+    # per-path overrides, e.g. API_MAX_AGE_OVERRIDES='{"/api/summary": 30}'
+    api_max_age: int = 60
+    api_max_age_overrides: dict[str, int] = {}
+
+    # JSON chart of accounts replacing the built-in one (see app/accounts.py)
+    chart_of_accounts_path: str = ""
+
+    # CSV of peer coffee shops' ratios for percentile benchmarking (see
+    # app/peers.py); empty disables peer comparisons
+    peer_dataset_path: str = ""
+
+    # How often (seconds) to check the ledger for writes made by other
+    # processes, e.g. other workers or the import CLI; 0 disables
+    ledger_poll_seconds: float = 2.0
+
+    # Background precompute (app/precompute.py): rebuild the cached payloads
+    # for every entity's latest N fiscal years as soon as the data changes,
+    # serving the previous version's results meanwhile; checked every
+    # precompute_interval seconds
+    precompute_enabled: bool = True
+    precompute_years: int = 3
+    precompute_interval: float = 0.5
+
+    # Production server (python run.py --production): listen address, worker
+    # processes (0 = one per CPU), recycling after N requests (+ random
+    # jitter, 0 = never) and how long shutdown waits for in-flight requests
+    host: str = "127.0.0.1"
+    port: int = 8000
+    workers: int = 0
+    worker_max_requests: int = 10000
+    worker_max_requests_jitter: int = 1000
+    worker_graceful_timeout: int = 30
+
+    # Allow the sampling profiler to be switched on via /api/stats/profiler
+    profiler_enabled: bool = False
+    profiler_interval_ms: float = 5.0
+
+    @property
+    def ledger_file(self) -> Path:
+        """Ledger path, relative paths resolved against the project root"""
+        path = Path(self.ledger_path)
+        return path if path.is_absolute() else BASE_DIR / path
+
+    @property
+    def snapshot_file(self) -> Path:
+        return self.ledger_file.with_suffix(".snapshot")
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,158 @@
+"""
+Period-over-period changes for every line item and metric.
+
+``PeriodDiffs`` puts a store's income statement and balance sheet columns
+and its metric columns (``metrics.metric_columns``) behind one set of series
+names: ``income.net_income``, ``balance.total_cash``,
+``metrics.gross_margin_pct``. From these it computes:
+- the absolute and percent change between any two periods
+- the change between every period and the one before it, for any set of
+  series, as a single array subtraction over the stacked columns
+
+Percent change is relative to the magnitude of the base value. It is None
+when the base is zero or either period lacks the statement.
+"""
+
+import math
+import threading
+import weakref
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.metrics import metric_columns
+from app.periods import PeriodStore
+from app.tables import StatementTable
+
+
+@dataclass(frozen=True)
+class Change:
+    current: float
+    base: float
+    change: float
+    pct_change: float | None
+
+    def to_dict(self) -> dict:
+        return {
+            "current": _rounded(self.current, 2),
+            "base": _rounded(self.base, 2),
+            "change": _rounded(self.change, 2),
+            "pct_change": _rounded(self.pct_change, 1),
+        }
+
+
+def _rounded(value: float | None, ndigits: int) -> float | None:
+    return None if value is None or math.isnan(value) else round(value, ndigits)
+
+
+def _rounded_list(values: np.ndarray, ndigits: int) -> list:
+    return [None if v != v else round(v, ndigits) for v in values.tolist()]
+
+
+def _pct_change(change: np.ndarray, base: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(base != 0, change / np.abs(base) * 100, np.nan)
+
+
+class PeriodDiffs:
+    """Every series of one store, by name, for period-over-period changes.
+
+    Holds references to the store's columns (plus the computed metric
+    columns), not to the store itself.
+    """
+
+    def __init__(self, store: PeriodStore):
+        self.labels = [period.label for period in store]
+        self.period_ends = [period.period_end.isoformat() for period in store]
+        self.columns: dict[str, np.ndarray] = {
+            **{f"income.{name}": values for name, values in store.income_table.columns.items()},
+            **{f"balance.{name}": values for name, values in store.balance_table.columns.items()},
+        }
+        # Missing statements are NaN rows, so metrics built on them are NaN too
+        for name, values in metric_columns(store.income_table, store.balance_table).items():
+            self.columns[f"metrics.{name}"] = values
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def resolve(self, names: list[str] | None) -> list[str]:
+        """Series names, accepting bare names that match exactly one series.
+
+        Raises ValueError for unknown or ambiguous names.
+        """
+        if names is None:
+            return list(self.columns)
+        resolved, unknown = [], []
+        for name in names:
+            if name in self.columns:
+                resolved.append(name)
+                continue
+            matches = [series for series in self.columns if series.split(".", 1)[1] == name]
+            if len(matches) == 1:
+                resolved.append(matches[0])
+            else:
+                unknown.append(name)
+        if unknown:
+            raise ValueError(f"Unknown or ambiguous series: {', '.join(unknown)}")
+        return list(dict.fromkeys(resolved))
+
+    def pair(self, current: int, base: int, names: list[str] | None = None) -> dict[str, Change]:
+        """Change from period row ``base`` to period row ``current`` for each series"""
+        names = self.resolve(names)
+        values = np.array([[self.columns[name][current], self.columns[name][base]] for name in names])
+        change = values[:, 0] - values[:, 1]
+        pct = _pct_change(change, values[:, 1])
+        return {
+            name: Change(float(now), float(then), float(delta), None if p != p else float(p))
+            for name, now, then, delta, p in zip(
+                names, values[:, 0].tolist(), values[:, 1].tolist(), change.tolist(), pct.tolist()
+            )
+        }
+
+    def consecutive(self, names: list[str] | None = None, lo: int = 0, hi: int | None = None) -> dict:
+        """Each period in rows [lo, hi) against the period before it, as one table.
+
+        Rows are most recent first; the oldest period in the store has no base.
+        """
+        names = self.resolve(names)
+        n = len(self)
+        hi = n if hi is None else min(hi, n)
+        if hi <= lo:
+            return {"periods": [], "period_ends": [], "compared_to": [], "series": {}}
+        # One extra row so the oldest requested period has its base
+        stop = min(hi + 1, n)
+        block = np.vstack([self.columns[name][lo:stop] for name in names]) if names else np.zeros((0, 0))
+        base = np.full((len(names), hi - lo), np.nan)
+        base[:, : stop - lo - 1] = block[:, 1 : stop - lo]
+        current = block[:, : hi - lo]
+        change = current - base
+        pct = _pct_change(change, base)
+        return {
+            "periods": self.labels[lo:hi],
+            "period_ends": self.period_ends[lo:hi],
+            "compared_to": [self.labels[i + 1] if i + 1 < n else None for i in range(lo, hi)],
+            "series": {
+                name: {
+                    "values": _rounded_list(current[k], 2),
+                    "change": _rounded_list(change[k], 2),
+                    "pct_change": _rounded_list(pct[k], 1),
+                }
+                for k, name in enumerate(names)
+            },
+        }
+
+
+# Keyed by the income table, which every copy of a store (one per dataset) shares
+_diffs: "weakref.WeakKeyDictionary[StatementTable, PeriodDiffs]" = weakref.WeakKeyDictionary()
+_diffs_lock = threading.Lock()
+
+
+def period_diffs(store: PeriodStore) -> PeriodDiffs:
+    """The store's ``PeriodDiffs``, built on first use and kept while its tables live"""
+    with _diffs_lock:
+        diffs = _diffs.get(store.income_table)
+    if diffs is None:
+        diffs = PeriodDiffs(store)
+        with _diffs_lock:
+            diffs = _diffs.setdefault(store.income_table, diffs)
+    return diffs
@@ -0,0 +1,187 @@
+"""
+Multi-entity datasets and consolidated statements.
+
+A ``Dataset`` holds one ``PeriodStore`` per entity (location), plus any
+interim-period rollups and loan terms, which are attached to its own copy of
+the entity's store. Datasets are never changed once built, so requests (and
+the background precompute) can keep using one while the next is swapped in. Consolidated
+statements for a set of entities sum every line item per period end across
+the entities' columnar tables, one scatter-add per entity and line item onto
+the union of their period ends, and the resulting store is cached per entity
+set for the lifetime of the dataset.
+"""
+
+import hashlib
+import itertools
+
+import numpy as np
+
+from app.cache import VersionedCache
+from app.periods import PeriodStore
+from app.rollups import InterimRollup
+from app.tables import DateColumn, StatementTable
+
+# Orders datasets by when they were built (versions are content hashes, so unordered)
+_generations = itertools.count(1)
+
+
+def _period_axis(stores: list[PeriodStore]) -> tuple[np.ndarray, list[np.ndarray]]:
+    """Every period end across ``stores`` (most recent first), and each store's row positions on it"""
+    member_ends = [np.array([p.period_end for p in store], dtype="datetime64[D]") for store in stores]
+    ascending = np.unique(np.concatenate(member_ends))
+    size = len(ascending)
+    return ascending[::-1], [size - 1 - np.searchsorted(ascending, ends) for ends in member_ends]
+
+
+def _sum_tables(tables: list[StatementTable], positions: list[np.ndarray], size: int) -> StatementTable:
+    """Scatter-add aligned tables onto the consolidated period axis.
+
+    Periods an entity didn't report contribute zero; a consolidated row is
+    present if any entity has a statement for it, and NaN otherwise.
+    """
+    first = tables[0]
+    present = np.zeros(size, dtype=bool)
+    rows = []
+    for table, idx in zip(tables, positions):
+        rows.append((idx[table.present], table.present))
+        present[rows[-1][0]] = True
+
+    columns = {}
+    for name in first.fields:
+        column = np.zeros(size)
+        for table, (idx, reported) in zip(tables, rows):
+            column[idx] += table[name][reported]
+        column[~present] = np.nan
+        columns[name] = column
+
+    # Earliest date (i.e. period_start) among the entities reporting each period
+    dates = {}
+    for name in first.date_fields:
+        earliest = np.full(size, np.datetime64("NaT"), dtype="datetime64[D]")
+        for table, (idx, reported) in zip(tables, rows):
+            values = np.asarray(table.dates[name], dtype="datetime64[D]")[reported]
+            earliest[idx] = np.fmin(earliest[idx], values)
+        dates[name] = DateColumn(earliest)
+    return StatementTable.from_columns(first.model, columns, present, dates)
+
+
+def consolidate(
+    stores: list[PeriodStore],
+    benchmarks: dict | None = None,
+    name: str | None = None,
+) -> PeriodStore:
+    """Sum every line item across stores, per period end, into a new store"""
+    ends, positions = _period_axis(stores)
+    size = len(ends)
+    digest = hashlib.blake2b(digest_size=8)
+    for store in stores:
+        digest.update(f"{store.version};".encode())
+    if benchmarks:
+        digest.update(repr(sorted(benchmarks.items())).encode())
+    if name:
+        digest.update(name.encode())
+    return PeriodStore.from_tables(
+        DateColumn(ends),
+        _sum_tables([store.income_table for store in stores], positions, size),
+        _sum_tables([store.balance_table for store in stores], positions, size),
+        benchmarks,
+        name,
+        digest.hexdigest(),
+    )
+
+
+def consolidated_store(members: dict[str, PeriodStore], benchmarks: dict | None = None) -> PeriodStore:
+    """Consolidation of ``members`` (by entity), carrying every member's loans"""
+    store = consolidate(
+        list(members.values()),
+        benchmarks=benchmarks,
+        name=f"Consolidated ({', '.join(member.name or entity for entity, member in members.items())})",
+    )
+    # Every member's loans, amortized from the member's own balances
+    store.loans = [{**terms, "entity": entity} for entity, member in members.items() for terms in member.loans]
+    store.members = dict(members)
+    return store
+
+
+class Dataset:
+    """Period stores for every entity, with a combined data version."""
+
+    def __init__(
+        self,
+        stores: dict[str, PeriodStore],
+        default_entity: str,
+        consolidation_cache_size: int = 64,
+        rollups: dict[str, InterimRollup] | None = None,
+        loans: dict[str, list[dict]] | None = None,
+    ):
+        self.default_entity = default_entity
+        self.rollups = rollups or {}
+        self.loans = loans or {}
+        self.stores = {
+            entity: store.attach(self.rollups.get(entity), self.loans.get(entity)) for entity, store in stores.items()
+        }
+        digest = hashlib.blake2b(digest_size=8)
+        for entity in sorted(self.stores):
+            store, rollup = self.stores[entity], self.rollups.get(entity)
+            digest.update(f"{entity}={store.version}".encode())
+            digest.update(f"+{rollup.version};".encode() if rollup else b";")
+            if store.loans:
+                digest.update(repr(store.loans).encode())
+        self.version = digest.hexdigest()
+        self.generation = next(_generations)
+        self._consolidated = VersionedCache(maxsize=consolidation_cache_size)
+
+    @property
+    def default(self) -> PeriodStore:
+        return self.stores[self.default_entity]
+
+    def entities(self) -> list[str]:
+        return sorted(self.stores)
+
+    def store(self, entity: str) -> PeriodStore | None:
+        return self.stores.get(entity)
+
+    def replace(self, entity: str, store: PeriodStore) -> "Dataset":
+        """A new dataset with one entity's store swapped out"""
+        return Dataset(
+            {**self.stores, entity: store},
+            self.default_entity,
+            self._consolidated.maxsize,
+            self.rollups,
+            self.loans,
+        )
+
+    def with_interim(self, entity: str, rows: list[dict]) -> "Dataset":
+        """A new dataset with interim periods added to an entity's rollup.
+
+        A copy of the rollup is extended (appending only touches the new
+        periods' prefix sums), leaving this dataset as it was; the returned
+        dataset carries the new version.
+        """
+        rollups = dict(self.rollups)
+        rollup = rollups[entity] = rollups[entity].copy() if entity in rollups else InterimRollup()
+        for row in sorted(rows, key=lambda r: r["period_end"]):
+            rollup.add(row)
+        return Dataset(
+            self.stores,
+            self.default_entity,
+            self._consolidated.maxsize,
+            rollups,
+            self.loans,
+        )
+
+    def consolidated(self, entities: list[str] | None = None) -> PeriodStore:
+        """Consolidated store for a set of entities (all entities by default).
+
+        Raises KeyError for unknown entities.
+        """
+        key = tuple(sorted(set(entities or self.stores)))
+        if len(key) == 1:
+            return self.stores[key[0]]
+        members = {entity: self.stores[entity] for entity in key}
+        return self._consolidated.get_or_compute(
+            "consolidated", key, self.version, lambda: consolidated_store(members, self.default.benchmarks)
+        )
+
+    def consolidation_stats(self) -> dict:
+        return self._consolidated.stats()
@@ -0,0 +1,113 @@
+"""
+Streaming CSV / NDJSON export of statements and metrics.
+
+Rows are pulled from the ledger cursor in batches and encoded as they go, so
+an export holds at most one batch in memory regardless of history size.
+"""
+
+import csv
+import io
+import json
+from datetime import date
+from typing import Iterable, Iterator
+
+from app.ledger import BALANCE_FIELDS, INCOME_FIELDS, StatementLedger
+from app.metrics import calculate_metrics
+from app.periods import get_fiscal_year_label
+
+METRIC_COLUMNS = [
+    "gross_profit",
+    "gross_margin_pct",
+    "net_margin_pct",
+    "cogs_pct",
+    "labor_cost_pct",
+    "rent_pct",
+    "food_cost_pct",
+    "current_ratio",
+    "cash_ratio",
+    "debt_to_equity",
+    "total_debt",
+]
+
+# Export name -> (ledger table or None for metrics, CSV columns)
+EXPORTS = {
+    "income-statements": (
+        "income_statements",
+        ["entity", "period_start", "period_end", *INCOME_FIELDS],
+    ),
+    "interim-income-statements": (
+        "interim_income_statements",
+        ["entity", "period_start", "period_end", *INCOME_FIELDS],
+    ),
+    "balance-sheets": ("balance_sheets", ["entity", "period_end", *BALANCE_FIELDS]),
+    "metrics": (None, ["entity", "period_label", "period_end", *METRIC_COLUMNS]),
+}
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+CSV_FLUSH_ROWS = 500
+
+
+def iter_export_rows(
+    ledger: StatementLedger,
+    export: str,
+    entities: list[str] | None = None,
+    start: date | None = None,
+    end: date | None = None,
+) -> Iterator[dict]:
+    """Rows for an export, streamed from the ledger"""
+    table, _ = EXPORTS[export]
+    if table is not None:
+        yield from ledger.iter_statements(table, entities, start, end)
+        return
+
+    for entity, income, balance in ledger.iter_statement_pairs(entities, start, end):
+        yield {
+            "entity": entity,
+            "period_label": get_fiscal_year_label(income["period_end"]),
+            "period_end": income["period_end"],
+            **calculate_metrics(income, balance),
+        }
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def ndjson_lines(rows: Iterable[dict]) -> Iterator[bytes]:
+    for row in rows:
+        yield (json.dumps(row, default=_json_default, separators=(",", ":")) + "\n").encode()
+
+
+def csv_lines(rows: Iterable[dict], columns: list[str]) -> Iterator[bytes]:
+    """CSV with a header row, flushed every ``CSV_FLUSH_ROWS`` rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= CSV_FLUSH_ROWS:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode()
+
+
+def stream_export(
+    ledger: StatementLedger,
+    export: str,
+    fmt: str,
+    entities: list[str] | None = None,
+    start: date | None = None,
+    end: date | None = None,
+) -> Iterator[bytes]:
+    """Encoded chunks for an export in ``csv`` or ``ndjson`` format"""
+    rows = iter_export_rows(ledger, export, entities, start, end)
+    if fmt == "ndjson":
+        return ndjson_lines(rows)
+    return csv_lines(rows, EXPORTS[export][1])
@@ -0,0 +1,64 @@
+"""
+HTTP validators for the financial API.
+
+Every cacheable ``/api/*`` response gets a strong ETag derived from the data
+version and the request path and query, plus a per-endpoint Cache-Control
+max-age. Because the ETag is known before the endpoint runs, a matching
+``If-None-Match`` is answered with 304 without building the body at all.
+Content-encoded responses get a per-encoding suffix on the tag. Endpoints
+whose date parameter defaults to today are tagged with the resolved date.
+"""
+
+import hashlib
+from datetime import date
+
+from starlette.datastructures import QueryParams
+
+# Endpoints whose responses don't depend on statement data
+UNCACHEABLE_PATHS = {"/api/health", "/api/cache-stats", "/api/stats", "/api/stats/profile"}
+
+# Endpoint -> query parameter that defaults to today's date
+DATED_PATHS = {"/api/loans": "as_of"}
+
+
+def compute_etag(version: str, path: str, query_params: QueryParams) -> str:
+    """Strong ETag for a response built from ``version`` data"""
+    query = "&".join(f"{k}={v}" for k, v in sorted(query_params.multi_items()))
+    param = DATED_PATHS.get(path)
+    if param is not None and param not in query_params:
+        query += f"&{param}={date.today().isoformat()}"
+    digest = hashlib.blake2b(f"{version}|{path}?{query}".encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def encoded_etag(etag: str, encoding: str | None) -> str:
+    """ETag for a content-encoded representation, e.g. '"abc-gzip"'"""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def matching_etag(if_none_match: str | None, etag: str) -> str | None:
+    """Return the If-None-Match entity tag matching ``etag``, if any.
+
+    Uses weak comparison and treats content-encoded variants of ``etag`` as
+    matches, so a client holding the gzip representation still gets a 304.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    opaque = etag.strip('"')
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag.strip('"').split("-", 1)[0] == opaque:
+            return tag
+    return None
+
+
+def cache_control(path: str, default_max_age: int, overrides: dict[str, int]) -> str:
+    """Cache-Control header value for an endpoint path"""
+    max_age = overrides.get(path, default_max_age)
+    return f"max-age={max_age}"
+
+
+def is_cacheable(method: str, path: str) -> bool:
+    return method in ("GET", "HEAD") and path.startswith("/api/") and path not in UNCACHEABLE_PATHS
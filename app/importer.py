@@ -0,0 +1,491 @@
+"""
+Bulk import of accountant exports (trial balances and GL detail).
+
+A CSV export is read as a stream in chunks of rows. Each chunk is mapped onto
+``IncomeStatementPeriod`` / ``BalanceSheetPeriod`` fields and summed per
+(entity, statement, period) in a worker process; the parent only merges the
+partial sums, so memory is bounded by the number of periods rather than the
+number of rows. The merged statements are validated a batch at a time and
+written to the ledger.
+
+Two layouts are understood:
+
+- Trial balance: ``period_end`` (and optionally ``period_start``), ``account``
+  and either ``debit``/``credit`` or a signed ``amount`` per row.
+- GL detail: ``date``, ``account`` and ``debit``/``credit`` or ``amount``.
+  Postings to income accounts are summed into months, so GL detail can only
+  be imported as interim periods (a partial year of postings would otherwise
+  replace a whole fiscal year's statement); balance-sheet postings are
+  skipped and counted, since balances can't be rebuilt from postings without
+  opening balances.
+
+A signed ``amount`` follows the usual ledger convention of debits positive
+and credits negative, i.e. it is debit minus credit, and is stored the same
+way as a debit/credit pair: credit-normal accounts (revenue, liabilities,
+equity) are flipped so that their normal balance comes out positive.
+
+Either layout may carry an ``entity`` (or ``location``) column. Accounts are
+matched to fields by name (``Food & Beverage Sales`` -> ``food_beverage_sales``)
+or through an explicit account map. Subtotals the export doesn't carry are
+computed from their components. Run from the command line with::
+
+    python -m app.importer export.csv --entity lrc
+"""
+
+import argparse
+import calendar
+import csv
+import io
+import re
+import sys
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator
+
+from pydantic import ValidationError
+
+from app.ledger import (
+    BALANCE_FIELDS,
+    BALANCE_ROWS,
+    DEFAULT_ENTITY,
+    INCOME_FIELDS,
+    INCOME_ROWS,
+    StatementLedger,
+)
+from app.periods import fiscal_year_start
+from app.reconcile import fill_subtotals
+
+INCOME = "income"
+BALANCE = "balance"
+
+# Revenue, liability and equity accounts carry credit balances; everything
+# else is stored as debit minus credit (so contra accounts come out negative,
+# matching the hand-entered statements).
+CREDIT_NORMAL = {
+    *INCOME_FIELDS[: INCOME_FIELDS.index("total_revenue") + 1],
+    "net_income",
+    *BALANCE_FIELDS[BALANCE_FIELDS.index("accounts_payable") :],
+}
+
+# Accepted header spellings -> canonical column
+COLUMN_ALIASES = {
+    "entity": "entity",
+    "location": "entity",
+    "account": "account",
+    "account_name": "account",
+    "name": "account",
+    "account_code": "code",
+    "code": "code",
+    "debit": "debit",
+    "credit": "credit",
+    "amount": "amount",
+    "balance": "amount",
+    "period_start": "period_start",
+    "period_end": "period_end",
+    "date": "date",
+    "posting_date": "date",
+    "transaction_date": "date",
+}
+
+VALIDATION_BATCH = 1000
+MAX_REPORTED_ERRORS = 100
+
+# Accepted besides ISO dates
+DATE_FORMATS = ("%m/%d/%Y", "%Y/%m/%d")
+
+
+@lru_cache(maxsize=4096)
+def normalize_account(name: str) -> str:
+    """'Food & Beverage Sales' -> 'food_beverage_sales'"""
+    return re.sub(r"[^a-z0-9]+", "_", name.strip().lower()).strip("_")
+
+
+def default_account_map() -> dict[str, tuple[str, str]]:
+    """Map every line item field name to itself"""
+    return {
+        **{name: (INCOME, name) for name in INCOME_FIELDS},
+        **{name: (BALANCE, name) for name in BALANCE_FIELDS},
+    }
+
+
+def load_account_map(rows: Iterable[dict]) -> dict[str, tuple[str, str]]:
+    """Build an account map from ``account``/``field`` rows (e.g. a CSV).
+
+    ``account`` may be an account name or code. Raises ValueError for fields
+    that aren't statement line items.
+    """
+    accounts = default_account_map()
+    for row in rows:
+        target = normalize_account(row["field"])
+        if target not in accounts:
+            raise ValueError(f"Unknown statement field {row['field']!r}")
+        accounts[normalize_account(row["account"])] = accounts[target]
+    return accounts
+
+
+def parse_amount(text: str) -> float:
+    """Parse '1,234.50', '$-12', '(45.00)' and blanks (0.0)"""
+    text = text.strip().replace(",", "").replace("$", "")
+    if not text:
+        return 0.0
+    if text.startswith("(") and text.endswith(")"):
+        return -float(text[1:-1])
+    return float(text)
+
+
+@lru_cache(maxsize=4096)
+def parse_date(text: str) -> date:
+    """ISO or one of ``DATE_FORMATS``; exports repeat dates, so results are cached"""
+    text = text.strip()
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date {text!r}")
+
+
+def month_end(day: date) -> date:
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+@dataclass(frozen=True)
+class ImportOptions:
+    """How to read one export; sent to every worker along with its chunks"""
+
+    columns: dict[str, int]
+    accounts: dict[str, tuple[str, str]]
+    entity: str = DEFAULT_ENTITY
+    interim: bool = False
+
+    @property
+    def gl_detail(self) -> bool:
+        return "date" in self.columns and "period_end" not in self.columns
+
+
+@dataclass
+class ChunkResult:
+    """Partial sums for one chunk of rows"""
+
+    totals: dict[tuple, dict[str, float]] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+    unmapped: Counter = field(default_factory=Counter)
+    skipped_postings: int = 0
+    rows: int = 0
+
+
+def _period(options: ImportOptions, statement: str, row: list[str]) -> tuple[date | None, date]:
+    """(period_start, period_end) a row is booked to"""
+    columns = options.columns
+    if options.gl_detail:
+        day = parse_date(row[columns["date"]])
+        return day.replace(day=1), month_end(day)
+
+    end = parse_date(row[columns["period_end"]])
+    if statement == BALANCE:
+        return None, end
+    if "period_start" in columns and row[columns["period_start"]].strip():
+        return parse_date(row[columns["period_start"]]), end
+    return (end.replace(day=1) if options.interim else fiscal_year_start(end)), end
+
+
+def map_chunk(first_line: int, rows: list[list[str]], options: ImportOptions) -> ChunkResult:
+    """Map a chunk of CSV rows onto statement fields and sum them per period"""
+    result = ChunkResult()
+    columns = options.columns
+    accounts = options.accounts
+    entity_col = columns.get("entity")
+    code_col = columns.get("code")
+    account_col = columns.get("account")
+    signed = "amount" in columns
+
+    for line, row in enumerate(rows, start=first_line):
+        if not any(cell.strip() for cell in row):
+            continue
+        result.rows += 1
+        try:
+            target = None
+            if code_col is not None:
+                target = accounts.get(normalize_account(row[code_col]))
+            if target is None and account_col is not None:
+                target = accounts.get(normalize_account(row[account_col]))
+            if target is None:
+                result.unmapped[row[account_col if account_col is not None else code_col].strip()] += 1
+                continue
+            statement, name = target
+            if statement == BALANCE and options.gl_detail:
+                result.skipped_postings += 1
+                continue
+
+            # Debit minus credit either way; see the module docstring
+            if signed:
+                amount = parse_amount(row[columns["amount"]])
+            else:
+                amount = parse_amount(row[columns["debit"]]) - parse_amount(row[columns["credit"]])
+            if name in CREDIT_NORMAL:
+                amount = -amount
+
+            entity = (row[entity_col].strip() if entity_col is not None else "") or options.entity
+            start, end = _period(options, statement, row)
+        except (ValueError, IndexError) as exc:
+            if len(result.errors) < MAX_REPORTED_ERRORS:
+                result.errors.append(f"line {line}: {exc}")
+            continue
+
+        sums = result.totals.setdefault((entity, statement, start, end), {})
+        sums[name] = sums.get(name, 0.0) + amount
+    return result
+
+
+def resolve_columns(header: list[str]) -> dict[str, int]:
+    """Canonical column -> index. Raises ValueError if required columns are missing."""
+    columns: dict[str, int] = {}
+    for i, name in enumerate(header):
+        canonical = COLUMN_ALIASES.get(normalize_account(name))
+        if canonical and canonical not in columns:
+            columns[canonical] = i
+    if "account" not in columns and "code" not in columns:
+        raise ValueError("Export needs an account (or account code) column")
+    if "amount" not in columns and not {"debit", "credit"} <= columns.keys():
+        raise ValueError("Export needs debit and credit columns, or an amount column")
+    if "period_end" not in columns and "date" not in columns:
+        raise ValueError("Export needs a period_end (trial balance) or date (GL detail) column")
+    return columns
+
+
+def _chunks(reader: Iterator[list[str]], size: int) -> Iterator[tuple[int, list[list[str]]]]:
+    """(first line number, rows) in chunks of ``size``"""
+    chunk: list[list[str]] = []
+    first = 2  # line 1 is the header
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield first, chunk
+            first += len(chunk)
+            chunk = []
+    if chunk:
+        yield first, chunk
+
+
+def import_options(
+    columns: dict[str, int],
+    accounts: dict[str, tuple[str, str]],
+    entity: str = DEFAULT_ENTITY,
+    interim: bool = False,
+) -> ImportOptions:
+    """ImportOptions for an export's columns. Raises ValueError for GL detail not imported as interim."""
+    options = ImportOptions(columns, accounts, entity, interim)
+    if options.gl_detail and not interim:
+        raise ValueError("GL detail is summed into months; import it as interim periods")
+    return options
+
+
+def map_export(
+    source: Iterable[str],
+    options_for: Callable[[dict[str, int]], ImportOptions],
+    executor: Executor | None = None,
+    chunk_rows: int = 5000,
+    max_pending: int = 8,
+) -> tuple[ImportOptions, ChunkResult]:
+    """Stream ``source`` (CSV lines) through ``map_chunk`` and merge the results.
+
+    ``options_for(columns)`` builds the ImportOptions once the header is read.
+    With an executor, at most ``max_pending`` chunks are in flight at a time.
+    """
+    reader = csv.reader(source)
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("Export is empty")
+    options = options_for(resolve_columns(header))
+    merged = ChunkResult()
+
+    def merge(part: ChunkResult) -> None:
+        merged.rows += part.rows
+        merged.skipped_postings += part.skipped_postings
+        merged.unmapped.update(part.unmapped)
+        merged.errors.extend(part.errors[: MAX_REPORTED_ERRORS - len(merged.errors)])
+        for key, sums in part.totals.items():
+            target = merged.totals.setdefault(key, {})
+            for name, amount in sums.items():
+                target[name] = target.get(name, 0.0) + amount
+
+    chunks = _chunks(reader, chunk_rows)
+    if executor is None:
+        for first, rows in chunks:
+            merge(map_chunk(first, rows, options))
+        return options, merged
+
+    pending = set()
+    for first, rows in chunks:
+        pending.add(executor.submit(map_chunk, first, rows, options))
+        if len(pending) >= max_pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                merge(future.result())
+    for future in pending:
+        merge(future.result())
+    return options, merged
+
+
+def _validated(adapter, rows: list[dict], labels: list[str], errors: list[str]) -> list:
+    """Validate rows in batches, dropping (and reporting) invalid ones"""
+    valid = []
+    for i in range(0, len(rows), VALIDATION_BATCH):
+        batch = rows[i : i + VALIDATION_BATCH]
+        try:
+            valid.extend(adapter.validate_python(batch))
+            continue
+        except ValidationError as exc:
+            bad = {}
+            for error in exc.errors():
+                bad.setdefault(error["loc"][0], error["msg"])
+        for j, message in bad.items():
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"{labels[i + j]}: {message}")
+        valid.extend(adapter.validate_python([row for j, row in enumerate(batch) if j not in bad]))
+    return valid
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    entities: list[str] = field(default_factory=list)
+    income_statements: int = 0
+    interim_income_statements: int = 0
+    balance_sheets: int = 0
+    skipped_postings: int = 0
+    unmapped_accounts: dict[str, int] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def import_export(
+    ledger: StatementLedger,
+    source: Iterable[str],
+    entity: str = DEFAULT_ENTITY,
+    interim: bool = False,
+    accounts: dict[str, tuple[str, str]] | None = None,
+    executor: Executor | None = None,
+    chunk_rows: int = 5000,
+    max_pending: int = 8,
+) -> ImportReport:
+    """Map, validate and write a trial balance or GL export to the ledger.
+
+    Income statements go to the interim table when ``interim`` is set. Rows
+    that can't be parsed or validated are reported, not written. Raises
+    ValueError if the header is missing required columns, or for GL detail
+    without ``interim``.
+    """
+    accounts = accounts or default_account_map()
+    options, merged = map_export(
+        source,
+        lambda columns: import_options(columns, accounts, entity, interim),
+        executor,
+        chunk_rows,
+        max_pending,
+    )
+
+    grouped: dict[tuple[str, str], tuple[list[dict], list[str]]] = {}
+    for (row_entity, statement, start, end), sums in sorted(merged.totals.items(), key=str):
+        row = fill_subtotals({name: round(amount, 2) for name, amount in sums.items()}, statement)
+        row["period_end"] = end
+        if statement == INCOME:
+            row["period_start"] = start
+        rows, labels = grouped.setdefault((row_entity, statement), ([], []))
+        rows.append(row)
+        labels.append(f"{row_entity} {statement} {end.isoformat()}")
+
+    report = ImportReport(
+        rows=merged.rows,
+        skipped_postings=merged.skipped_postings,
+        unmapped_accounts=dict(merged.unmapped.most_common()),
+        errors=merged.errors,
+    )
+    known = set(ledger.entities())
+    for (row_entity, statement), (rows, labels) in grouped.items():
+        if statement == INCOME:
+            periods = _validated(INCOME_ROWS, rows, labels, report.errors)
+            if options.interim:
+                report.interim_income_statements += ledger.upsert_interim_income_statements(periods, row_entity)
+            else:
+                report.income_statements += ledger.upsert_income_statements(periods, row_entity)
+        else:
+            periods = _validated(BALANCE_ROWS, rows, labels, report.errors)
+            report.balance_sheets += ledger.upsert_balance_sheets(periods, row_entity)
+        if row_entity not in known:
+            ledger.register_entity(row_entity, row_entity, replace=False)
+            known.add(row_entity)
+    report.entities = sorted({row_entity for row_entity, _ in grouped})
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description="Import a trial balance or GL export into the ledger")
+    parser.add_argument("path", help="CSV export (use - for stdin)")
+    parser.add_argument("--entity", default=DEFAULT_ENTITY, help="Entity for rows without an entity column")
+    parser.add_argument(
+        "--interim", action="store_true", help="Import income statements as interim periods (required for GL detail)"
+    )
+    parser.add_argument("--accounts", help="CSV with account,field columns mapping accounts to line items")
+    parser.add_argument("--workers", type=int, default=settings.import_workers)
+    parser.add_argument("--chunk-rows", type=int, default=settings.import_chunk_rows)
+    args = parser.parse_args(argv)
+
+    accounts = None
+    if args.accounts:
+        with open(args.accounts, newline="", encoding="utf-8-sig") as f:
+            accounts = load_account_map(csv.DictReader(f))
+
+    if args.path == "-":
+        source = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="")
+    else:
+        try:
+            source = open(args.path, newline="", encoding="utf-8-sig")
+        except OSError as exc:
+            parser.error(str(exc))
+
+    ledger = StatementLedger(settings.ledger_file)
+    try:
+        with source, ProcessPoolExecutor(max_workers=args.workers) as executor:
+            report = import_export(
+                ledger,
+                source,
+                args.entity,
+                args.interim,
+                accounts,
+                executor,
+                args.chunk_rows,
+                max_pending=2 * args.workers,
+            )
+    except ValueError as exc:
+        parser.error(str(exc))
+    finally:
+        ledger.close()
+
+    print(
+        f"{report.rows} rows -> {report.income_statements} income statements, "
+        f"{report.interim_income_statements} interim, {report.balance_sheets} balance sheets "
+        f"for {', '.join(report.entities) or 'no entities'}"
+    )
+    if report.skipped_postings:
+        print(f"Skipped {report.skipped_postings} balance-sheet postings in GL detail")
+    for account, count in report.unmapped_accounts.items():
+        print(f"Unmapped account {account!r} ({count} rows)")
+    for error in report.errors:
+        print(error)
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""
+Request latency instrumentation.
+
+Every request is timed by middleware into a latency histogram per route
+template (``/api/entities/{entity}/{endpoint}``, not the concrete path), and
+named phases inside the handler (resolve, compute, serialize, render) are
+timed with ``phase()``. Phase durations are returned to the client in a
+``Server-Timing`` header and aggregated into per-route phase histograms.
+``LatencyStats.prometheus`` renders everything in the Prometheus text
+exposition format.
+
+``SamplingProfiler`` is an opt-in wall-clock sampler: a background thread
+snapshots every other thread's stack at a fixed interval and counts the
+stacks in collapsed (flame graph) form.
+"""
+
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from inspect import iscoroutinefunction
+from pathlib import Path
+
+from fastapi.routing import APIRoute
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds"""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """(le label, observations <= le) per bucket, ending with +Inf"""
+        result = []
+        running = 0
+        for bound, count in zip([*self.buckets, None], self.counts):
+            running += count
+            result.append(("+Inf" if bound is None else repr(bound), running))
+        return result
+
+
+@dataclass
+class RequestTimings:
+    """Phase durations for the request in flight"""
+
+    phases: dict[str, float] = field(default_factory=dict)
+    endpoint_end: float | None = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def start_request() -> RequestTimings:
+    """Begin collecting phases for the current request (call from middleware)"""
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+@contextmanager
+def phase(name: str):
+    """Time a block as a named phase of the current request.
+
+    Repeated phases accumulate. Outside a request this is a no-op.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def server_timing(phases: dict[str, float], total: float) -> str:
+    """``Server-Timing`` header value, durations in milliseconds"""
+    metrics = [*phases.items(), ("total", total)]
+    return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in metrics)
+
+
+def _mark_endpoint_end() -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.endpoint_end = time.perf_counter()
+
+
+def _timed_endpoint(endpoint):
+    # Records when the endpoint returns, so the route can time what follows
+    if iscoroutinefunction(endpoint):
+        @wraps(endpoint)
+        async def timed(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_end()
+    else:
+        @wraps(endpoint)
+        def timed(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_end()
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """Route that times response validation and serialization as "serialize".
+
+    That work happens in FastAPI after the endpoint returns, so it is the
+    time from the endpoint returning to the response object being ready.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timings = _current.get()
+            if timings is not None and timings.endpoint_end is not None:
+                timings.add("serialize", time.perf_counter() - timings.endpoint_end)
+                timings.endpoint_end = None
+            return response
+
+        return timed_handler
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict[str, str]) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+
+def _histogram_lines(name: str, labels: dict[str, str], histogram: Histogram) -> list[str]:
+    base = _labels(labels)
+    lines = [
+        f"{name}_bucket{{{base},le=\"{le}\"}} {count}" for le, count in histogram.cumulative()
+    ]
+    lines.append(f"{name}_sum{{{base}}} {histogram.sum!r}")
+    lines.append(f"{name}_count{{{base}}} {histogram.count}")
+    return lines
+
+
+def metric_lines(name: str, kind: str, help_text: str, samples: list[tuple[dict, float]]) -> list[str]:
+    """Exposition lines for a counter or gauge with labelled samples"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{{{_labels(labels)}}} {value}" if labels else f"{name} {value}")
+    return lines
+
+
+class LatencyStats:
+    """Per-route request and phase latency histograms"""
+
+    def __init__(self, prefix: str = "lrc", buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self.requests: dict[tuple[str, str, str], Histogram] = {}
+        self.phases: dict[tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, table: dict, key: tuple) -> Histogram:
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram(self.buckets)
+        return histogram
+
+    def observe(self, method: str, route: str, status: int, seconds: float, phases: dict[str, float]) -> None:
+        with self._lock:
+            self._histogram(self.requests, (method, route, str(status))).observe(seconds)
+            for name, duration in phases.items():
+                self._histogram(self.phases, (route, name)).observe(duration)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.phases.clear()
+
+    def prometheus(self) -> list[str]:
+        """Exposition lines for both histogram families"""
+        requests = f"{self.prefix}_request_duration_seconds"
+        phases = f"{self.prefix}_request_phase_seconds"
+        lines = [
+            f"# HELP {requests} Request latency by route template",
+            f"# TYPE {requests} histogram",
+        ]
+        with self._lock:
+            for (method, route, status), histogram in sorted(self.requests.items()):
+                labels = {"method": method, "route": route, "status": status}
+                lines.extend(_histogram_lines(requests, labels, histogram))
+            lines.append(f"# HELP {phases} Time spent in named phases of a request")
+            lines.append(f"# TYPE {phases} histogram")
+            for (route, name), histogram in sorted(self.phases.items()):
+                lines.extend(_histogram_lines(phases, {"route": route, "phase": name}, histogram))
+        return lines
+
+
+# Leaf functions of threads that are parked rather than doing work
+_IDLE_MODULES = {"threading", "selectors", "queue", "base_events", "thread"}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).stem}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Wall-clock stack sampler for capturing hot paths in a running server.
+
+    While active, a daemon thread records the stack of every other thread
+    each ``interval`` seconds. Idle threads (waiting on locks, selectors or
+    queues) are skipped. ``collapsed()`` returns the counts in the
+    ``frame;frame;frame count`` format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self.started_at: float | None = None
+        self._stacks: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, reset: bool = True) -> None:
+        if self.active:
+            return
+        if reset:
+            self.reset()
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if Path(frame.f_code.co_filename).stem in _IDLE_MODULES:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < self.max_depth:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                stacks.append(";".join(reversed(labels)))
+            with self._lock:
+                self._stacks.update(stacks)
+                self.samples += 1
+
+    def collapsed(self) -> str:
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "active": self.active,
+                "interval_ms": self.interval * 1000,
+                "samples": self.samples,
+                "distinct_stacks": len(self._stacks),
+                "started_at": self.started_at,
+            }
@@ -0,0 +1,554 @@
+"""
+SQLite-backed statement ledger.
+
+Balance sheets, income statements (annual and interim), loan terms and
+industry benchmarks are persisted in a SQLite database (WAL mode) with one REAL
+column per line item, so new periods can be added without a code deploy. Rows are validated through
+``BalanceSheetPeriod`` / ``IncomeStatementPeriod`` on the way in, a whole batch
+at a time. Reads go
+through a small pool of read-only connections and can be narrowed by entity,
+fiscal year and period-end range.
+
+Period-scoped payloads read just the periods they compare (``period_window``:
+a fiscal year's latest period and the one before it) and streaming exports
+read period ranges. Whole-history views are served from the indexed period
+stores (``app.entities.Dataset``), which workers map from a shared snapshot
+(``app.snapshot``) rebuilt when the ledger's revision changes.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+from app.models import BalanceSheetPeriod, IncomeStatementPeriod, LoanTerms
+from app.periods import get_fiscal_year_label
+from app.tables import line_item_fields
+
+DEFAULT_ENTITY = "lrc"
+
+INCOME_FIELDS = line_item_fields(IncomeStatementPeriod)
+BALANCE_FIELDS = line_item_fields(BalanceSheetPeriod)
+
+# Validate a whole list of rows in one pydantic-core call; already-built
+# model instances pass straight through.
+INCOME_ROWS = TypeAdapter(list[IncomeStatementPeriod])
+BALANCE_ROWS = TypeAdapter(list[BalanceSheetPeriod])
+LOAN_ROWS = TypeAdapter(list[LoanTerms])
+
+
+def _columns_ddl(fields: list[str]) -> str:
+    return ",\n    ".join(f"{name} REAL NOT NULL DEFAULT 0" for name in fields)
+
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS income_statements (
+    entity TEXT NOT NULL,
+    period_start TEXT NOT NULL,
+    period_end TEXT NOT NULL,
+    fiscal_year TEXT NOT NULL,
+    {_columns_ddl(INCOME_FIELDS)},
+    PRIMARY KEY (entity, period_end)
+);
+CREATE INDEX IF NOT EXISTS idx_income_fiscal_year ON income_statements (fiscal_year, entity);
+
+CREATE TABLE IF NOT EXISTS interim_income_statements (
+    entity TEXT NOT NULL,
+    period_start TEXT NOT NULL,
+    period_end TEXT NOT NULL,
+    fiscal_year TEXT NOT NULL,
+    {_columns_ddl(INCOME_FIELDS)},
+    PRIMARY KEY (entity, period_end)
+);
+CREATE INDEX IF NOT EXISTS idx_interim_fiscal_year ON interim_income_statements (fiscal_year, entity);
+
+CREATE TABLE IF NOT EXISTS balance_sheets (
+    entity TEXT NOT NULL,
+    period_end TEXT NOT NULL,
+    fiscal_year TEXT NOT NULL,
+    {_columns_ddl(BALANCE_FIELDS)},
+    PRIMARY KEY (entity, period_end)
+);
+CREATE INDEX IF NOT EXISTS idx_balance_fiscal_year ON balance_sheets (fiscal_year, entity);
+
+CREATE TABLE IF NOT EXISTS benchmarks (
+    metric TEXT PRIMARY KEY,
+    avg REAL NOT NULL,
+    low REAL NOT NULL,
+    high REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS loans (
+    entity TEXT NOT NULL,
+    loan TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    balance_field TEXT NOT NULL,
+    annual_rate_pct REAL NOT NULL,
+    monthly_payment REAL,
+    maturity TEXT,
+    PRIMARY KEY (entity, loan)
+);
+
+CREATE TABLE IF NOT EXISTS entities (
+    entity TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', 0);
+"""
+
+
+class ReadPool:
+    """Pool of read-only connections shared across threads."""
+
+    def __init__(self, path: Path, size: int = 4):
+        self.path = path
+        self.size = size
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if self._idle.qsize() < self.size:
+                self._idle.put(conn)
+            else:
+                conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _row_to_statement(row: sqlite3.Row, date_columns: tuple[str, ...], fields: list[str]) -> dict:
+    stmt = {name: date.fromisoformat(row[name]) for name in date_columns}
+    stmt.update({name: row[name] for name in fields})
+    return stmt
+
+
+# Streamable tables -> (date columns, line item columns)
+STATEMENT_TABLES = {
+    "income_statements": (("period_start", "period_end"), INCOME_FIELDS),
+    "interim_income_statements": (("period_start", "period_end"), INCOME_FIELDS),
+    "balance_sheets": (("period_end",), BALANCE_FIELDS),
+}
+
+
+def _filtered_select(
+    select: str,
+    entities: list[str] | None,
+    start: date | None,
+    end: date | None,
+    alias: str = "",
+) -> tuple[str, list]:
+    """Append entity / period-end range filters to a SELECT"""
+    clauses = []
+    params: list = []
+    if entities:
+        clauses.append(f"{alias}entity IN ({', '.join('?' * len(entities))})")
+        params.extend(entities)
+    if start:
+        clauses.append(f"{alias}period_end >= ?")
+        params.append(start.isoformat())
+    if end:
+        clauses.append(f"{alias}period_end <= ?")
+        params.append(end.isoformat())
+    if clauses:
+        select += " WHERE " + " AND ".join(clauses)
+    return select, params
+
+
+class StatementLedger:
+    """Persistent store for statements, benchmarks and entity names."""
+
+    def __init__(self, path: str | Path, read_pool_size: int = 4):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.read_pool_size = read_pool_size
+        self._write_lock = threading.Lock()
+        # Revision each thread's last write transaction committed (see written_revision)
+        self._written = threading.local()
+        self.reopen()
+        self._writer.executescript(SCHEMA)
+        self._writer.commit()
+
+    def reopen(self) -> None:
+        """Open fresh connections, e.g. in a forked worker after ``close()`` in the parent"""
+        self._writer = sqlite3.connect(self.path, check_same_thread=False)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        self.reads = ReadPool(self.path, self.read_pool_size)
+
+    def close(self) -> None:
+        self.reads.close()
+        self._writer.close()
+
+    # -- writes ---------------------------------------------------------------
+
+    @contextmanager
+    def _transaction(self):
+        with self._write_lock:
+            try:
+                changes = self._writer.total_changes
+                yield self._writer
+                if self._writer.total_changes != changes:
+                    self._writer.execute("UPDATE meta SET value = value + 1 WHERE key = 'revision'")
+                # Still inside the write transaction, so no other process's write is counted
+                revision = self._writer.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+                self._writer.commit()
+                self._written.revision = revision
+            except Exception:
+                self._writer.rollback()
+                raise
+
+    def upsert_income_statements(self, rows: list, entity: str = DEFAULT_ENTITY) -> int:
+        """Validate and insert or replace income statements. Returns row count."""
+        return self._upsert_income("income_statements", rows, entity)
+
+    def upsert_interim_income_statements(self, rows: list, entity: str = DEFAULT_ENTITY) -> int:
+        """Validate and insert or replace monthly/weekly income statements"""
+        return self._upsert_income("interim_income_statements", rows, entity)
+
+    def _upsert_income(self, table: str, rows: list, entity: str) -> int:
+        periods = INCOME_ROWS.validate_python(rows)
+        columns = ["entity", "period_start", "period_end", "fiscal_year", *INCOME_FIELDS]
+        values = [
+            (
+                entity,
+                p.period_start.isoformat(),
+                p.period_end.isoformat(),
+                get_fiscal_year_label(p.period_end),
+                *(getattr(p, name) for name in INCOME_FIELDS),
+            )
+            for p in periods
+        ]
+        sql = (
+            f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})"
+        )
+        with self._transaction() as conn:
+            conn.executemany(sql, values)
+        return len(values)
+
+    def upsert_balance_sheets(self, rows: list, entity: str = DEFAULT_ENTITY) -> int:
+        """Validate and insert or replace balance sheets. Returns row count."""
+        periods = BALANCE_ROWS.validate_python(rows)
+        columns = ["entity", "period_end", "fiscal_year", *BALANCE_FIELDS]
+        values = [
+            (
+                entity,
+                p.period_end.isoformat(),
+                get_fiscal_year_label(p.period_end),
+                *(getattr(p, name) for name in BALANCE_FIELDS),
+            )
+            for p in periods
+        ]
+        sql = (
+            f"INSERT OR REPLACE INTO balance_sheets ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})"
+        )
+        with self._transaction() as conn:
+            conn.executemany(sql, values)
+        return len(values)
+
+    def upsert_benchmarks(self, benchmarks: dict[str, dict]) -> int:
+        """Insert or replace industry benchmark ranges. Returns row count."""
+        values = [
+            (metric, float(b["avg"]), float(b["low"]), float(b["high"]))
+            for metric, b in benchmarks.items()
+        ]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO benchmarks (metric, avg, low, high) VALUES (?, ?, ?, ?)",
+                values,
+            )
+        return len(values)
+
+    def replace_loans(self, loans: list, entity: str = DEFAULT_ENTITY) -> int:
+        """Validate and replace an entity's loan terms (kept in the given order). Returns row count."""
+        terms = LOAN_ROWS.validate_python(loans)
+        values = [
+            (
+                entity,
+                t.loan,
+                position,
+                t.name,
+                t.balance_field,
+                t.annual_rate_pct,
+                t.monthly_payment,
+                t.maturity.isoformat() if t.maturity else None,
+            )
+            for position, t in enumerate(terms)
+        ]
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM loans WHERE entity = ?", (entity,))
+            conn.executemany("INSERT INTO loans VALUES (?, ?, ?, ?, ?, ?, ?, ?)", values)
+        return len(values)
+
+    def register_entity(self, entity: str, name: str, replace: bool = True) -> None:
+        """Record an entity's display name (kept as-is if ``replace`` is False)"""
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self._transaction() as conn:
+            conn.execute(f"{verb} INTO entities (entity, name) VALUES (?, ?)", (entity, name))
+
+    def seed(self, income_statements: list[dict], balance_sheets: list[dict], benchmarks: dict) -> bool:
+        """Populate an empty ledger. Returns False if it already had data."""
+        if not self.is_empty():
+            return False
+        self.upsert_income_statements(income_statements)
+        self.upsert_balance_sheets(balance_sheets)
+        self.upsert_benchmarks(benchmarks)
+        return True
+
+    # -- reads ----------------------------------------------------------------
+
+    def written_revision(self) -> int | None:
+        """Revision committed by the calling thread's last write (None before its first)"""
+        return getattr(self._written, "revision", None)
+
+    def revision(self) -> int:
+        """Counter bumped on every write transaction"""
+        with self.reads.connection() as conn:
+            return conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+
+    def is_empty(self) -> bool:
+        with self.reads.connection() as conn:
+            row = conn.execute(
+                "SELECT EXISTS (SELECT 1 FROM income_statements)"
+                " OR EXISTS (SELECT 1 FROM balance_sheets)"
+            ).fetchone()
+        return not row[0]
+
+    def entities(self) -> list[str]:
+        """Entities with at least one statement"""
+        with self.reads.connection() as conn:
+            rows = conn.execute(
+                "SELECT entity FROM income_statements UNION SELECT entity FROM balance_sheets"
+                " UNION SELECT entity FROM interim_income_statements ORDER BY entity"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def entity_names(self) -> dict[str, str]:
+        with self.reads.connection() as conn:
+            rows = conn.execute("SELECT entity, name FROM entities").fetchall()
+        return {row["entity"]: row["name"] for row in rows}
+
+    def _select(
+        self,
+        table: str,
+        date_columns: tuple[str, ...],
+        fields: list[str],
+        entity: str,
+        start: date | None,
+        end: date | None,
+        fiscal_year: str | None,
+    ) -> list[dict]:
+        clauses = ["entity = ?"]
+        params: list = [entity]
+        if fiscal_year:
+            clauses.append("fiscal_year = ?")
+            params.append(fiscal_year)
+        if start:
+            clauses.append("period_end >= ?")
+            params.append(start.isoformat())
+        if end:
+            clauses.append("period_end <= ?")
+            params.append(end.isoformat())
+        sql = (
+            f"SELECT {', '.join((*date_columns, *fields))} FROM {table}"
+            f" WHERE {' AND '.join(clauses)} ORDER BY period_end DESC"
+        )
+        with self.reads.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [_row_to_statement(row, date_columns, fields) for row in rows]
+
+    def iter_statements(
+        self,
+        table: str,
+        entities: list[str] | None = None,
+        start: date | None = None,
+        end: date | None = None,
+        batch_size: int = 500,
+    ):
+        """Stream statement rows (with their entity) in batches from a cursor.
+
+        ``table`` is one of ``STATEMENT_TABLES``. Rows are ordered by entity
+        then period end; only ``batch_size`` rows are held at a time.
+        """
+        date_columns, fields = STATEMENT_TABLES[table]
+        sql, params = _filtered_select(
+            f"SELECT entity, {', '.join((*date_columns, *fields))} FROM {table}",
+            entities, start, end,
+        )
+        with self.reads.connection() as conn:
+            cursor = conn.execute(sql + " ORDER BY entity, period_end", params)
+            while batch := cursor.fetchmany(batch_size):
+                for row in batch:
+                    yield {"entity": row["entity"], **_row_to_statement(row, date_columns, fields)}
+
+    def iter_statement_pairs(
+        self,
+        entities: list[str] | None = None,
+        start: date | None = None,
+        end: date | None = None,
+        batch_size: int = 500,
+    ):
+        """Stream (entity, income, balance) per income statement period.
+
+        The balance sheet is joined on (entity, period_end) and is None when
+        there isn't one.
+        """
+        income_columns = ", ".join(f"i.{name}" for name in ("period_start", "period_end", *INCOME_FIELDS))
+        balance_columns = ", ".join(f"b.{name}" for name in BALANCE_FIELDS)
+        sql, params = _filtered_select(
+            f"SELECT i.entity, {income_columns}, b.period_end AS balance_period_end, {balance_columns}"
+            " FROM income_statements i LEFT JOIN balance_sheets b"
+            " ON b.entity = i.entity AND b.period_end = i.period_end",
+            entities, start, end, alias="i.",
+        )
+        with self.reads.connection() as conn:
+            cursor = conn.execute(sql + " ORDER BY i.entity, i.period_end", params)
+            while batch := cursor.fetchmany(batch_size):
+                for row in batch:
+                    income = _row_to_statement(row, ("period_start", "period_end"), INCOME_FIELDS)
+                    balance = None
+                    if row["balance_period_end"] is not None:
+                        balance = {name: row[name] for name in BALANCE_FIELDS}
+                        balance["period_end"] = income["period_end"]
+                    yield row["entity"], income, balance
+
+    def income_statements(
+        self,
+        entity: str = DEFAULT_ENTITY,
+        start: date | None = None,
+        end: date | None = None,
+        fiscal_year: str | None = None,
+    ) -> list[dict]:
+        """Income statements ending within [start, end], most recent first"""
+        return self._select(
+            "income_statements", ("period_start", "period_end"), INCOME_FIELDS,
+            entity, start, end, fiscal_year,
+        )
+
+    def interim_income_statements(
+        self,
+        entity: str = DEFAULT_ENTITY,
+        start: date | None = None,
+        end: date | None = None,
+        fiscal_year: str | None = None,
+    ) -> list[dict]:
+        """Monthly/weekly income statements ending within [start, end], most recent first"""
+        return self._select(
+            "interim_income_statements", ("period_start", "period_end"), INCOME_FIELDS,
+            entity, start, end, fiscal_year,
+        )
+
+    def balance_sheets(
+        self,
+        entity: str = DEFAULT_ENTITY,
+        start: date | None = None,
+        end: date | None = None,
+        fiscal_year: str | None = None,
+    ) -> list[dict]:
+        """Balance sheets ending within [start, end], most recent first"""
+        return self._select(
+            "balance_sheets", ("period_end",), BALANCE_FIELDS,
+            entity, start, end, fiscal_year,
+        )
+
+    def period_window(
+        self, entities: list[str], fiscal_year: str | None = None, count: int = 2
+    ) -> dict[str, tuple[list[dict], list[dict]]]:
+        """(income statements, balance sheets) per entity for the last ``count`` period ends.
+
+        The window ends at the latest period end in ``fiscal_year`` (the
+        latest overall when None); period ends are counted across all the
+        entities together, and the window is read in one transaction. Empty
+        when the fiscal year has no periods.
+        """
+        marks = ", ".join("?" * len(entities))
+        tables = ("income_statements", "balance_sheets")
+        window: dict[str, tuple[list[dict], list[dict]]] = {}
+        with self.reads.connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                # Index lookups only: the latest end in the year, then the ends just before it
+                year_filter = " AND fiscal_year = ?" if fiscal_year else ""
+                anchors = [
+                    conn.execute(
+                        f"SELECT MAX(period_end) FROM {table} WHERE entity IN ({marks}){year_filter}",
+                        [*entities, *([fiscal_year] if fiscal_year else [])],
+                    ).fetchone()[0]
+                    for table in tables
+                ]
+                anchor = max((day for day in anchors if day is not None), default=None)
+                if anchor is None:
+                    return window
+                ends = set()
+                for table in tables:
+                    rows = conn.execute(
+                        f"SELECT DISTINCT period_end FROM {table} WHERE entity IN ({marks}) AND period_end <= ?"
+                        " ORDER BY period_end DESC LIMIT ?",
+                        [*entities, anchor, count],
+                    ).fetchall()
+                    ends.update(row[0] for row in rows)
+                first = sorted(ends, reverse=True)[:count][-1]
+
+                for slot, table in enumerate(tables):
+                    date_columns, fields = STATEMENT_TABLES[table]
+                    rows = conn.execute(
+                        f"SELECT entity, {', '.join((*date_columns, *fields))} FROM {table}"
+                        f" WHERE entity IN ({marks}) AND period_end BETWEEN ? AND ? ORDER BY period_end DESC",
+                        [*entities, first, anchor],
+                    ).fetchall()
+                    for row in rows:
+                        statements = window.setdefault(row["entity"], ([], []))
+                        statements[slot].append(_row_to_statement(row, date_columns, fields))
+            finally:
+                conn.execute("COMMIT")
+        return window
+
+    def benchmarks(self) -> dict[str, dict]:
+        with self.reads.connection() as conn:
+            rows = conn.execute("SELECT metric, avg, low, high FROM benchmarks").fetchall()
+        return {row["metric"]: {"avg": row["avg"], "low": row["low"], "high": row["high"]} for row in rows}
+
+    def loans(self) -> dict[str, list[dict]]:
+        """Loan terms by entity, each list in its stored order"""
+        with self.reads.connection() as conn:
+            rows = conn.execute(
+                "SELECT entity, loan, name, balance_field, annual_rate_pct, monthly_payment, maturity"
+                " FROM loans ORDER BY entity, position"
+            ).fetchall()
+        loans: dict[str, list[dict]] = {}
+        for row in rows:
+            terms = dict(row)
+            entity = terms.pop("entity")
+            terms["maturity"] = date.fromisoformat(terms["maturity"]) if terms["maturity"] else None
+            loans.setdefault(entity, []).append(terms)
+        return loans
+
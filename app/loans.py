@@ -0,0 +1,225 @@
+"""
+Loan amortization schedules.
+
+Each loan's balance is a balance-sheet line item; its terms (rate and a fixed
+monthly payment, or a maturity to pay off by in level payments) come from the
+ledger. From a balance date, every loan is amortized at once. The balance
+after k monthly payments has a closed form,
+
+    B_k = B_0 (1 + r)^k - P ((1 + r)^k - 1) / r        (B_0 - P k when r = 0)
+
+so the whole schedule (balances, interest and principal for every month of
+every loan) is a single (loans, months) array expression, and the payoff
+month is a logarithm per loan.
+
+What-if prepayments add an extra amount to a loan's monthly payment and/or
+pay a lump sum at the balance date. The baseline and what-if versions of each
+loan are amortized in the same pass.
+"""
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+
+# Schedules stop after this many months (for loans whose payment doesn't cover interest)
+MAX_MONTHS = 600
+
+
+def month_end(day: date, months: int) -> date:
+    """Last day of the month ``months`` months after ``day``'s month"""
+    index = day.year * 12 + day.month - 1 + months + 1
+    return date(index // 12, index % 12 + 1, 1) - timedelta(days=1)
+
+
+def months_between(start: date, end: date) -> int:
+    """Whole months from ``start``'s month end to ``end`` (number of payments made by ``end``)"""
+    months = (end.year - start.year) * 12 + end.month - start.month
+    if end < month_end(start, months):
+        months -= 1
+    return max(months, 0)
+
+
+def level_payment(balance: np.ndarray, monthly_rate: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """Payment that clears ``balance`` in ``months`` equal payments"""
+    months = np.maximum(months, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity = monthly_rate / (1 - np.power(1 + monthly_rate, -months))
+    return np.where(monthly_rate > 0, balance * annuity, balance / months)
+
+
+@dataclass
+class Amortization:
+    """Month-by-month schedules; column 0 is the balance date, column k the k-th payment"""
+
+    balance: np.ndarray
+    interest: np.ndarray
+    principal: np.ndarray
+    payment: np.ndarray
+    # Payments until the balance is cleared; MAX_MONTHS + 1 if it never is
+    payoff_months: np.ndarray
+
+
+def amortize(balances: np.ndarray, annual_rates_pct: np.ndarray, payments: np.ndarray) -> Amortization:
+    """Amortize every loan from its balance with a fixed monthly payment"""
+    balances = np.maximum(balances, 0.0)
+    rate = annual_rates_pct / 1200
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Payoff month: ceil(log(P / (P - B r)) / log(1 + r)), or ceil(B / P) at r = 0
+        covered = payments > balances * rate
+        compounding = np.log(payments / (payments - balances * rate)) / np.log1p(rate)
+        simple = balances / payments
+        payoff = np.where(rate > 0, compounding, simple)
+    payoff = np.where(covered | (balances == 0), np.ceil(np.round(payoff, 9)), MAX_MONTHS + 1)
+    payoff = np.where(balances == 0, 0, payoff).astype(int)
+
+    horizon = int(min(payoff.max(initial=0), MAX_MONTHS))
+    k = np.arange(horizon + 1)
+    growth = np.power(1 + rate[:, None], k[None, :])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        paid = np.where(rate[:, None] > 0, (growth - 1) / rate[:, None], k[None, :])
+    balance = balances[:, None] * growth - payments[:, None] * paid
+    balance = np.where(k[None, :] >= payoff[:, None], 0.0, np.maximum(balance, 0.0))
+
+    interest = np.zeros_like(balance)
+    interest[:, 1:] = balance[:, :-1] * rate[:, None]
+    principal = np.zeros_like(balance)
+    principal[:, 1:] = balance[:, :-1] - balance[:, 1:]
+    return Amortization(balance, interest, principal, interest + principal, payoff)
+
+
+def _money(value: float) -> float:
+    return round(float(value), 2)
+
+
+def loan_schedules(
+    loans: list[dict],
+    as_of: date,
+    extra: dict[str, float] | None = None,
+    lump_sum: dict[str, float] | None = None,
+    include_schedule: bool = False,
+) -> list[dict]:
+    """Amortization summary (and optionally the schedule) for each loan.
+
+    ``loans`` are loan terms plus ``balance`` and ``balance_date`` (and
+    optionally ``entity``); interest to date runs from the balance date to
+    ``as_of``. ``extra`` and ``lump_sum`` map loan keys to prepayments; loans
+    with either also report the baseline payoff and the interest saved.
+    """
+    extra, lump_sum = extra or {}, lump_sum or {}
+    n = len(loans)
+    if not n:
+        return []
+    balances = np.array([float(loan["balance"]) for loan in loans])
+    rates = np.array([float(loan["annual_rate_pct"]) for loan in loans])
+    fixed = np.array([np.nan if loan["monthly_payment"] is None else loan["monthly_payment"] for loan in loans])
+    terms = np.array(
+        [months_between(loan["balance_date"], loan["maturity"]) if loan["maturity"] else 1 for loan in loans],
+        dtype=float,
+    )
+    payments = np.where(np.isnan(fixed), level_payment(balances, rates / 1200, terms), fixed)
+    extras = np.array([float(extra.get(loan["loan"], 0.0)) for loan in loans])
+    lumps = np.array([float(lump_sum.get(loan["loan"], 0.0)) for loan in loans])
+
+    # Baseline rows first, then the what-if rows, in one pass
+    result = amortize(
+        np.concatenate([balances, np.maximum(balances - lumps, 0.0)]),
+        np.concatenate([rates, rates]),
+        np.concatenate([payments, payments + extras]),
+    )
+    elapsed = np.array([months_between(loan["balance_date"], as_of) for loan in loans] * 2)
+    cumulative = np.cumsum(result.interest, axis=1)
+    columns = np.minimum(elapsed, cumulative.shape[1] - 1)
+    interest_to_date = np.take_along_axis(cumulative, columns[:, None], axis=1)[:, 0]
+    total_interest = cumulative[:, -1]
+
+    def remaining(row: int) -> int | None:
+        months = int(result.payoff_months[row])
+        return months if months <= MAX_MONTHS else None
+
+    def payoff_date(row: int) -> str | None:
+        months = remaining(row)
+        return None if months is None else month_end(loans[row % n]["balance_date"], months).isoformat()
+
+    summaries = []
+    for i, loan in enumerate(loans):
+        j = n + i  # what-if row
+        balance_date = loan["balance_date"]
+        has_whatif = bool(extras[i] or lumps[i])
+        months = int(result.payoff_months[j])
+        summary = {
+            **({"entity": loan["entity"]} if "entity" in loan else {}),
+            "loan": loan["loan"],
+            "name": loan["name"],
+            "balance_field": loan["balance_field"],
+            "balance": _money(balances[i]),
+            "balance_date": balance_date.isoformat(),
+            "annual_rate_pct": loan["annual_rate_pct"],
+            "monthly_payment": _money(payments[i] + extras[i]),
+            "months_remaining": remaining(j),
+            "payoff_date": payoff_date(j),
+            "total_interest": _money(total_interest[j]),
+            "interest_to_date": _money(interest_to_date[j]),
+        }
+        if has_whatif:
+            summary["whatif"] = {"extra_monthly": _money(extras[i]), "lump_sum": _money(lumps[i])}
+            summary["baseline"] = {
+                "monthly_payment": _money(payments[i]),
+                "months_remaining": remaining(i),
+                "payoff_date": payoff_date(i),
+                "total_interest": _money(total_interest[i]),
+            }
+            summary["interest_saved"] = _money(total_interest[i] - total_interest[j])
+            if remaining(i) is not None:
+                summary["months_saved"] = remaining(i) - months
+        if include_schedule:
+            last = min(months, MAX_MONTHS)
+            summary["schedule"] = [
+                {
+                    "month": k,
+                    "date": month_end(balance_date, k).isoformat(),
+                    "payment": _money(result.payment[j, k]),
+                    "interest": _money(result.interest[j, k]),
+                    "principal": _money(result.principal[j, k]),
+                    "balance": _money(result.balance[j, k]),
+                }
+                for k in range(1, last + 1)
+            ]
+        summaries.append(summary)
+    return summaries
+
+
+def _latest(values: list):
+    """Latest of payoff dates or months remaining; None (never paid off) if any is"""
+    return None if any(value is None for value in values) else max(values)
+
+
+def debt_outlook(loans: list[dict], balances: list[float], balance_date: date) -> dict[str, dict]:
+    """Payoff month and remaining interest per balance field, for the debt progress payload.
+
+    ``balances`` are each loan's own balance. Loans sharing a balance field
+    (a consolidated store's members' loans) are amortized separately, then
+    combined: payments and interest add up, the field is paid off when its
+    last loan is, and the rate is balance-weighted.
+    """
+    if not loans:
+        return {}
+    rows = [{**terms, "balance": balance, "balance_date": balance_date} for terms, balance in zip(loans, balances)]
+    groups: dict[str, list[dict]] = {}
+    for summary in loan_schedules(rows, balance_date):
+        groups.setdefault(summary["balance_field"], []).append(summary)
+
+    outlook = {}
+    for field, group in groups.items():
+        total = sum(summary["balance"] for summary in group)
+        rate = group[0]["annual_rate_pct"]
+        if len(group) > 1 and total:
+            rate = round(sum(summary["annual_rate_pct"] * summary["balance"] for summary in group) / total, 2)
+        outlook[field] = {
+            "annual_rate_pct": rate,
+            "monthly_payment": _money(sum(summary["monthly_payment"] for summary in group)),
+            "payoff_date": _latest([summary["payoff_date"] for summary in group]),
+            "months_remaining": _latest([summary["months_remaining"] for summary in group]),
+            "interest_remaining": _money(sum(summary["total_interest"] for summary in group)),
+        }
+    return outlook
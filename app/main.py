@@ -6,31 +6,330 @@ purchasing, Square POS, receipt scanning) has been migrated to lrc-operations.
 """
 
 from fastapi import FastAPI, Query, HTTPException
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi import Request
+from starlette.routing import Match
+from starlette.concurrency import run_in_threadpool
 from pathlib import Path
+from contextlib import asynccontextmanager
 from datetime import date
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import io
+import logging
 import sys
+import tempfile
+import threading
+import time
 
 # Add parent to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.models import BalanceSheetPeriod, IncomeStatementPeriod
+from app.accounts import DEFAULT_CHART, Chart, ChartRollup, load_chart
+from app.cache import VersionedCache
+from app.config import settings
+from app.diff import period_diffs
+from app.entities import Dataset, consolidated_store
+from app.export import EXPORTS, MEDIA_TYPES, stream_export
+from app.importer import import_export
+from app.instrumentation import (
+    LatencyStats,
+    SamplingProfiler,
+    TimedRoute,
+    metric_lines,
+    phase,
+    server_timing,
+    start_request,
+)
+from app.ledger import DEFAULT_ENTITY, StatementLedger
+from app.http_cache import cache_control, compute_etag, encoded_etag, is_cacheable, matching_etag
+from app.metrics import calculate_metrics, calculate_metrics_batch, get_benchmark_status
+from app.loans import loan_schedules
+from app.models import BalanceSheetPeriod, IncomeStatementPeriod, LoanTerms
+from app.payloads import (
+    balance_sheets_payload,
+    benchmarks_payload,
+    cash_flow_health_payload,
+    debt_progress_payload,
+    expense_breakdown_payload,
+    income_statements_payload,
+    metrics_payload,
+    statement_page_payload,
+    summary_payload,
+)
+from app.peers import REVENUE_BANDS, PeerDataset, PeerIndex, load_peers
+from app.periods import Period, PeriodStore, get_fiscal_year_label
+from app.pools import ProcessLocalExecutor
+from app.precompute import Precomputer, note_served, track_freshness
+from app.prerender import render_json
+from app.rollups import InterimRollup
+from app.runway import IncompleteSimulation, RunwayScenario, cash_flow_model, run_simulation
+from app.shell import DashboardShell, FingerprintedStaticFiles
+from app.snapshot import read_snapshot, write_snapshot
+from app.trends import trends_payload
 from data.financials import BALANCE_SHEETS, INCOME_STATEMENTS, INDUSTRY_BENCHMARKS
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the background precompute for as long as the app serves requests"""
+    if settings.precompute_enabled:
+        precomputer.start()
+    yield
+    await precomputer.stop()
+    for pool in (import_pool, simulation_pool):
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 app = FastAPI(
     title="Little Red Coffee - Financial Dashboard",
     description="Financial analysis and insights for Little Red Coffee Ltd.",
     version="1.0.0",
+    lifespan=lifespan,
 )
+# Times response serialization after each endpoint returns
+app.router.route_class = TimedRoute
 
-# Mount static files and templates
+# Templates, and the dashboard shell rendered once up front (debug re-renders per request)
 BASE_DIR = Path(__file__).parent.parent
-app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
 templates = Jinja2Templates(directory=BASE_DIR / "templates")
+dashboard_shell = DashboardShell.render(templates, "dashboard.html", BASE_DIR / "static")
+
+# Static files; fingerprinted URLs from the shell are cached as immutable
+app.mount(
+    "/static",
+    FingerprintedStaticFiles(directory=BASE_DIR / "static", fingerprints=dashboard_shell.fingerprints),
+    name="static",
+)
+
+# Persistent statement ledger, the durable store behind the in-memory dataset below;
+# the hardcoded data only seeds a fresh database
+ledger = StatementLedger(settings.ledger_file, read_pool_size=settings.ledger_read_pool_size)
+ledger.seed(INCOME_STATEMENTS, BALANCE_SHEETS, INDUSTRY_BENCHMARKS)
+ledger.register_entity(DEFAULT_ENTITY, "Little Red Coffee Ltd.", replace=False)
+
+# Pools are built on first use in each process, so prefork workers don't inherit the parent's.
+# Worker processes for mapping bulk trial-balance / GL imports
+import_pool = ProcessLocalExecutor(partial(ProcessPoolExecutor, max_workers=settings.import_workers))
+
+# Worker processes for large Monte Carlo runway runs
+simulation_pool = ProcessLocalExecutor(partial(ProcessPoolExecutor, max_workers=settings.simulation_workers))
+
+# Derived payloads, keyed by (endpoint, fiscal year, data version)
+payload_cache = VersionedCache(maxsize=settings.payload_cache_size)
+
+# Serialized and precompressed response bodies for the statement endpoints
+body_cache = VersionedCache(maxsize=16)
+
+# Period windows read from the ledger, keyed by (entities, fiscal year, data version)
+window_cache = VersionedCache(maxsize=settings.period_window_cache_size)
+
+# Account hierarchy for drill-down; its rollups are cached per store and data version
+chart = load_chart(settings.chart_of_accounts_path) if settings.chart_of_accounts_path else Chart(DEFAULT_CHART)
+chart_tree = chart.tree()
+
+# Peer shops for percentile benchmarks; cohort indexes are built on first use
+peer_dataset: PeerDataset | None = load_peers(settings.peer_dataset_path) if settings.peer_dataset_path else None
+
+logger = logging.getLogger("uvicorn.error")
+
+# Per-route latency histograms, and the opt-in profiler
+latency_stats = LatencyStats()
+profiler = SamplingProfiler(interval=settings.profiler_interval_ms / 1000)
+
+
+def load_dataset_from_ledger() -> Dataset:
+    """Build one indexed period store per entity from the ledger"""
+    names = ledger.entity_names()
+    benchmarks = ledger.benchmarks()
+    entities = set(ledger.entities()) | {DEFAULT_ENTITY}
+    stores = {
+        entity: PeriodStore(
+            ledger.income_statements(entity),
+            ledger.balance_sheets(entity),
+            benchmarks,
+            name=names.get(entity, entity),
+        )
+        for entity in sorted(entities)
+    }
+    rollups = {}
+    for entity in entities:
+        interim = ledger.interim_income_statements(entity)
+        if interim:
+            rollups[entity] = InterimRollup(interim)
+    return Dataset(stores, DEFAULT_ENTITY, rollups=rollups, loans=ledger.loans())
+
+
+def load_dataset(revision: int) -> Dataset:
+    """Dataset for a ledger revision.
+
+    Mapped from the snapshot when the snapshot is of that revision; otherwise
+    built from the ledger and written out as the new snapshot.
+    """
+    if not settings.snapshot_enabled:
+        return load_dataset_from_ledger()
+    snapshot = read_snapshot(settings.snapshot_file)
+    if snapshot is not None and snapshot.revision == revision:
+        return snapshot.dataset()
+    new_dataset = load_dataset_from_ledger()
+    write_snapshot(settings.snapshot_file, new_dataset, revision)
+    return new_dataset
+
+
+def set_dataset(new_dataset: Dataset) -> Dataset:
+    """Swap in a new dataset; ``period_store`` follows its default entity"""
+    global dataset, period_store
+    dataset = new_dataset
+    period_store = new_dataset.default
+    # Results still being computed from the replaced data are no longer stored
+    for cache in (payload_cache, body_cache, window_cache):
+        cache.advance(new_dataset.generation)
+    return dataset
+
+
+# Every entity's full history from the ledger, joined by period end and indexed
+# once per ledger revision, for the whole-history views; period-scoped payloads
+# query their period windows instead (see period_window)
+dataset: Dataset
+period_store: PeriodStore
+ledger_revision = ledger.revision()
+set_dataset(load_dataset(ledger_revision))
+
+
+def load_statements(
+    income_statements: list[dict],
+    balance_sheets: list[dict],
+    benchmarks: dict[str, dict] | None = None,
+) -> PeriodStore:
+    """Replace the served statement data for the default entity.
+
+    The new store carries a new data version, so cached payloads computed
+    from the old data are dropped on the next lookup.
+    """
+    if benchmarks is None:
+        benchmarks = period_store.benchmarks
+    store = PeriodStore(income_statements, balance_sheets, benchmarks, name=period_store.name)
+    set_dataset(dataset.replace(DEFAULT_ENTITY, store))
+    return period_store
+
+
+# One reload at a time, so a slower reload of an older revision can't land last
+ledger_reload_lock = threading.Lock()
+
+
+def refresh_from_ledger() -> bool:
+    """Reload every entity's store if the ledger has been written to since the last load"""
+    global ledger_revision
+    with ledger_reload_lock:
+        revision = ledger.revision()
+        if revision == ledger_revision:
+            return False
+        set_dataset(load_dataset(revision))
+        ledger_revision = revision
+        return True
+
+
+@app.middleware("http")
+async def conditional_get(request: Request, call_next):
+    """Attach ETag / Cache-Control and answer matching If-None-Match with 304.
+
+    Responses the endpoint marked ``no-store`` are passed through untouched.
+    """
+    path = request.url.path
+    if not is_cacheable(request.method, path):
+        return await call_next(request)
+
+    freshness = track_freshness(dataset.version)
+    etag = compute_etag(freshness.current, path, request.query_params)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control(path, settings.api_max_age, settings.api_max_age_overrides),
+    }
+    matched = matching_etag(request.headers.get("if-none-match"), etag)
+    if matched:
+        return Response(status_code=304, headers={**headers, "ETag": matched})
+
+    response = await call_next(request)
+    if response.status_code != 200 or "no-store" in response.headers.get("cache-control", ""):
+        return response
+    if freshness.version is not None:
+        headers["X-Data-Version"] = freshness.version
+        headers["X-Data-Age"] = f"{freshness.age:.1f}"
+    if freshness.stale:
+        # Served from the previous version while it's recomputed: tag it with
+        # that version and make clients revalidate rather than cache it
+        etag = compute_etag(freshness.version, path, request.query_params)
+        headers["Cache-Control"] = "no-cache"
+        headers["X-Data-Stale"] = "true"
+        matched = matching_etag(request.headers.get("if-none-match"), etag)
+        if matched:
+            return Response(status_code=304, headers={**headers, "ETag": matched})
+    headers["ETag"] = encoded_etag(etag, response.headers.get("content-encoding"))
+    response.headers.update(headers)
+    return response
+
+
+# When the ledger revision was last checked (time.monotonic), and the reload it started
+ledger_checked_at = 0.0
+ledger_reload: asyncio.Task | None = None
+
+
+async def reload_from_ledger() -> None:
+    try:
+        await run_in_threadpool(refresh_from_ledger)
+    except Exception:
+        logger.exception("Reloading from the ledger failed")
+
+
+@app.middleware("http")
+async def follow_ledger(request: Request, call_next):
+    """Reload when another process (another worker, the import CLI) wrote to the ledger.
+
+    Only the revision check is awaited: the reload runs in the background
+    and requests are served from the current dataset until it's swapped in.
+    The background precompute follows the ledger itself while it runs.
+    """
+    global ledger_checked_at, ledger_reload
+    now = time.monotonic()
+    polling = settings.ledger_poll_seconds and not precomputer.running
+    if polling and now - ledger_checked_at >= settings.ledger_poll_seconds:
+        ledger_checked_at = now
+        idle = ledger_reload is None or ledger_reload.done()
+        if idle and await run_in_threadpool(ledger.revision) != ledger_revision:
+            ledger_reload = asyncio.create_task(reload_from_ledger())
+    return await call_next(request)
+
+
+def route_label(request: Request) -> str:
+    """Route template for a request, so histograms aren't split per entity or year"""
+    route = request.scope.get("route")
+    if route is None:
+        # Answered before routing (e.g. a 304), so match it here
+        for candidate in app.routes:
+            match, _ = candidate.matches(request.scope)
+            if match == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", None) or "unmatched"
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """Time every request into the route's histogram and add Server-Timing.
+
+    Streamed responses are timed to the start of the body.
+    """
+    timings = start_request()
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    latency_stats.observe(
+        request.method, route_label(request), response.status_code, elapsed, timings.phases
+    )
+    response.headers["Server-Timing"] = server_timing(timings.phases, elapsed)
+    return response
 
 
 @app.get("/api/health", tags=["Health"])
@@ -38,105 +337,163 @@ async def health():
     return {"status": "healthy", "service": "lrc-finance", "version": "1.0.0"}
 
 
-def calculate_metrics(income: dict, balance: dict | None = None) -> dict:
-    """Calculate financial metrics from raw data"""
-    revenue = income["total_revenue"]
-    net_sales = income["net_sales"]
-    cogs = income["total_cogs"]
-    purchases = income["total_purchases"]
-    payroll = income["total_payroll"]
-    rent = income["rent"]
-    net_income = income["net_income"]
-
-    gross_profit = revenue - cogs
-    gross_margin = (gross_profit / revenue * 100) if revenue else 0
-    net_margin = (net_income / revenue * 100) if revenue else 0
-    cogs_pct = (cogs / revenue * 100) if revenue else 0
-    labor_pct = (payroll / revenue * 100) if revenue else 0
-    rent_pct = (rent / revenue * 100) if revenue else 0
-    food_cost_pct = (purchases / net_sales * 100) if net_sales else 0
-
-    metrics = {
-        "gross_profit": round(gross_profit, 2),
-        "gross_margin_pct": round(gross_margin, 1),
-        "net_margin_pct": round(net_margin, 1),
-        "cogs_pct": round(cogs_pct, 1),
-        "labor_cost_pct": round(labor_pct, 1),
-        "rent_pct": round(rent_pct, 1),
-        "food_cost_pct": round(food_cost_pct, 1),
-    }
+def get_period_by_year(year_label: str, store: PeriodStore | None = None) -> Period | None:
+    """Find a period by fiscal year label"""
+    return (store or period_store).get(year_label)
 
-    if balance:
-        current_assets = balance["total_current_assets"]
-        current_liabilities = balance["total_current_liabilities"]
-        total_cash = balance["total_cash"]
-        total_liabilities = balance["total_liabilities"]
-        total_equity = balance["total_equity"]
-
-        metrics["current_ratio"] = (
-            round(current_assets / current_liabilities, 2)
-            if current_liabilities
-            else None
-        )
-        metrics["cash_ratio"] = (
-            round(total_cash / current_liabilities, 2) if current_liabilities else None
-        )
-        metrics["debt_to_equity"] = (
-            round(abs(total_liabilities / total_equity), 2) if total_equity else None
+
+def resolve_period(year: str | None, store: PeriodStore | None = None) -> Period:
+    """Resolve a fiscal year label to a period.
+
+    Defaults to the most recent period. Raises HTTPException if year not found.
+    """
+    store = store or period_store
+    with phase("resolve"):
+        if not year:
+            return store.latest
+        current = get_period_by_year(year, store)
+    if not current:
+        raise HTTPException(status_code=404, detail=f"Fiscal year {year} not found")
+    return current
+
+
+# Period-scoped endpoints -> payload builder (metrics also covers "all periods")
+PERIOD_PAYLOADS = {
+    "summary": summary_payload,
+    "metrics": metrics_payload,
+    "expense-breakdown": expense_breakdown_payload,
+    "benchmarks": lambda store, period: benchmarks_payload(store, period, peers=peer_cohort()),
+    "debt-progress": debt_progress_payload,
+    "cash-flow-health": cash_flow_health_payload,
+}
+
+
+def serve_cached(cache: VersionedCache, endpoint: str, year, current: Dataset, compute):
+    """Look up a cache entry of ``current``'s data, recording which data version it came from.
+
+    While the background precompute runs, a miss is answered with the
+    previous version's result and the entry is queued to be recomputed.
+    """
+    version, generation = current.version, current.generation
+    value, served, computed_at = cache.get_or_stale(
+        endpoint, year, version, compute, generation, allow_stale=precomputer.running
+    )
+    if served != version:
+        precomputer.revalidate(
+            (id(cache), endpoint, year),
+            partial(cache.get_or_compute, endpoint, year, version, compute, generation),
         )
-        metrics["total_debt"] = total_liabilities
+    note_served(served, computed_at)
+    return value
 
-    return metrics
 
+def period_window(current: Dataset, entities: tuple[str, ...], year: str | None) -> tuple[PeriodStore, Period]:
+    """(store, period) holding just ``year``'s latest period and the one before it.
 
-def get_benchmark_status(value: float, benchmark: dict) -> str:
-    """Determine if a metric is good, warning, or concern"""
-    if benchmark["low"] <= value <= benchmark["high"]:
-        return "good"
-    elif value < benchmark["low"] * 0.8 or value > benchmark["high"] * 1.2:
-        return "concern"
-    return "warning"
+    The window is read from the ledger with one range query per statement and
+    cached per data version; for several entities it is their consolidation.
+    Defaults to the most recent period. Raises HTTPException if year not found.
+    """
 
+    def load() -> PeriodStore | None:
+        with phase("query"):
+            rows = ledger.period_window(list(entities), year)
+        if not rows:
+            return None
+        windows = {}
+        for entity in entities:
+            store = current.store(entity)
+            incomes, balances = rows.get(entity, ([], []))
+            windows[entity] = PeriodStore(incomes, balances, store.benchmarks, store.name).attach(
+                store.interim, store.loans
+            )
+        if len(entities) == 1:
+            return windows[entities[0]]
+        return consolidated_store(windows, current.default.benchmarks)
+
+    window = window_cache.get_or_compute("window", (entities, year), current.version, load, current.generation)
+    if window is None:
+        raise HTTPException(status_code=404, detail=f"Fiscal year {year} not found")
+    return window, window.latest
+
+
+def period_payload(
+    endpoint: str, year: str | None, current: Dataset, entities: tuple[str, ...], scope: str | None = None
+):
+    """(cache key, builder) for a period-scoped payload of one entity or the consolidation of several"""
+    build = PERIOD_PAYLOADS[endpoint]
+
+    def compute() -> dict:
+        if endpoint == "metrics" and not year:
+            store = current.consolidated(list(entities))
+            with phase("compute"):
+                return metrics_payload(store)
+        store, period = period_window(current, entities, year)
+        with phase("compute"):
+            return build(store, period)
+
+    return (f"{scope}:{endpoint}" if scope else endpoint), compute
+
+
+def cached_payload(
+    endpoint: str,
+    year: str | None,
+    entities: tuple[str, ...] | None = None,
+    scope: str | None = None,
+    current: Dataset | None = None,
+) -> dict:
+    """Serve a period-scoped payload for one or more entities from the versioned cache.
+
+    ``entities`` defaults to the default entity; ``scope`` namespaces cache
+    entries for the others (e.g. ``entity=xyz`` or ``consolidated=a,b``).
+    ``current`` is the dataset the entities were checked against, so the entry
+    is keyed by the version it was computed from even if a reload swaps the
+    dataset mid-request. Reads the ledger on a miss; call off the event loop.
+    """
+    current = current or dataset
+    key, compute = period_payload(endpoint, year, current, entities or (current.default_entity,), scope)
+    return serve_cached(payload_cache, key, year, current, compute)
 
-def get_fiscal_year_label(period_end: date) -> str:
-    """Get fiscal year label like 'FY24-25' from period end date (Sep 30)"""
-    # Fiscal year ends in September, so FY24-25 ends Sep 30, 2025
-    end_year = period_end.year
-    start_year = end_year - 1
-    return f"FY{str(start_year)[-2:]}-{str(end_year)[-2:]}"
 
+def split_list_param(values: list[str] | None) -> list[str]:
+    """Flatten a repeated and/or comma-separated query parameter"""
+    return [name.strip() for value in values or [] for name in value.split(",") if name.strip()]
 
-def get_period_by_year(statements: list, year_label: str) -> dict | None:
-    """Find a statement by fiscal year label"""
-    for stmt in statements:
-        if get_fiscal_year_label(stmt["period_end"]) == year_label:
-            return stmt
-    return None
 
+def prerender(build, store: PeriodStore):
+    """Renderer of ``build(store)`` as a JSON body with its compressed variants"""
 
-def resolve_period(statements: list, year: str | None) -> tuple[dict, int]:
-    """Resolve a fiscal year label to a statement and its index.
+    def render():
+        with phase("compute"):
+            payload = build(store)
+        with phase("serialize"):
+            return render_json(payload)
 
-    Returns (statement, index). Raises HTTPException if year not found.
+    return render
+
+
+def prerendered_response(request: Request, endpoint: str, build) -> Response:
+    """Serve a whole-history payload as JSON bytes rendered once per data version.
+
+    ``build`` is called as ``build(period_store)`` on a miss; the JSON body
+    and its gzip/brotli variants are then reused until the data changes.
     """
-    if year:
-        current = get_period_by_year(statements, year)
-        if not current:
-            raise HTTPException(status_code=404, detail=f"Fiscal year {year} not found")
-        return current, statements.index(current)
-    return statements[0], 0
+    current = dataset
+    body = serve_cached(body_cache, endpoint, None, current, prerender(build, current.default))
+    return body.response(request.headers.get("accept-encoding"))
 
 
-def get_available_fiscal_years() -> list[dict]:
+def get_available_fiscal_years(store: PeriodStore | None = None) -> list[dict]:
     """Get list of available fiscal years from data"""
     years = []
-    for i, stmt in enumerate(INCOME_STATEMENTS):
-        label = get_fiscal_year_label(stmt["period_end"])
+    for period in store or period_store:
+        if period.income is None:
+            continue
         years.append({
-            "label": label,
-            "period_start": stmt["period_start"].isoformat(),
-            "period_end": stmt["period_end"].isoformat(),
-            "is_current": i == 0,
+            "label": period.label,
+            "period_start": period.income["period_start"].isoformat(),
+            "period_end": period.period_end.isoformat(),
+            "is_current": period.index == 0,
         })
     return years
 
@@ -148,8 +505,11 @@ def get_available_fiscal_years() -> list[dict]:
 
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
-    """Main dashboard view"""
-    return templates.TemplateResponse("dashboard.html", {"request": request})
+    """Main dashboard view, served prerendered and precompressed"""
+    if settings.debug:
+        with phase("render"):
+            return templates.TemplateResponse(request, "dashboard.html")
+    return dashboard_shell.response(request)
 
 
 @app.get("/api/fiscal-years", tags=["Financial Summary"])
@@ -163,83 +523,73 @@ async def get_summary(
     year: str = Query(default=None, description="Fiscal year label (e.g., FY24-25)")
 ):
     """Get high-level financial summary"""
-    current_income, current_idx = resolve_period(INCOME_STATEMENTS, year)
-    current_balance = BALANCE_SHEETS[current_idx] if current_idx < len(BALANCE_SHEETS) else None
-
-    # Get previous year for comparison (if available)
-    previous_idx = current_idx + 1
-    has_previous = previous_idx < len(INCOME_STATEMENTS)
-
-    if has_previous:
-        previous_income = INCOME_STATEMENTS[previous_idx]
-        previous_balance = BALANCE_SHEETS[previous_idx]
-
-        # Calculate YoY changes
-        revenue_change = current_income["total_revenue"] - previous_income["total_revenue"]
-        revenue_change_pct = (revenue_change / previous_income["total_revenue"]) * 100
-        net_income_change = current_income["net_income"] - previous_income["net_income"]
-        debt_change = current_balance["total_liabilities"] - previous_balance["total_liabilities"]
-        cash_change = current_balance["total_cash"] - previous_balance["total_cash"]
-    else:
-        revenue_change = 0
-        revenue_change_pct = 0
-        net_income_change = 0
-        debt_change = 0
-        cash_change = 0
+    return await run_in_threadpool(cached_payload, "summary", year)
 
-    current_fy = get_fiscal_year_label(current_income["period_end"])
 
-    return {
-        "business_name": "Little Red Coffee Ltd.",
-        "current_period": current_fy,
-        "previous_period": get_fiscal_year_label(INCOME_STATEMENTS[previous_idx]["period_end"]) if has_previous else None,
-        "has_comparison": has_previous,
-        "current": {
-            "total_revenue": current_income["total_revenue"],
-            "net_income": current_income["net_income"],
-            "total_debt": current_balance["total_liabilities"],
-            "cash": current_balance["total_cash"],
-            "equity": current_balance["total_equity"],
-        },
-        "changes": {
-            "revenue": round(revenue_change, 2),
-            "revenue_pct": round(revenue_change_pct, 1),
-            "net_income": round(net_income_change, 2),
-            "debt": round(debt_change, 2),
-            "cash": round(cash_change, 2),
-        },
-    }
+# Largest page the statement endpoints will return in one response
+MAX_PAGE_SIZE = 10000
+
+
+def statement_response(
+    request: Request,
+    endpoint: str,
+    statement: str,
+    build,
+    fields: list[str] | None,
+    start: date | None,
+    end: date | None,
+    cursor: date | None,
+    limit: int | None,
+):
+    """Whole-history prerendered body, or just the requested fields, range and page"""
+    if fields is None and start is None and end is None and cursor is None and limit is None:
+        return prerendered_response(request, endpoint, build)
+    store = period_store
+    table = store.income_table if statement == "income" else store.balance_table
+    selected = None
+    if fields is not None:
+        selected = list(dict.fromkeys(split_list_param(fields)))
+        unknown = [name for name in selected if name not in table.columns]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    with phase("compute"):
+        return statement_page_payload(store, statement, selected, start, end, cursor, limit)
 
 
 @app.get("/api/income-statements", tags=["Statements"])
-async def get_income_statements():
-    """Get all income statement data"""
-    return {
-        "periods": [
-            {
-                "label": f"FY {stmt['period_start'].year}-{stmt['period_end'].year}",
-                **stmt,
-                "period_start": stmt["period_start"].isoformat(),
-                "period_end": stmt["period_end"].isoformat(),
-            }
-            for stmt in INCOME_STATEMENTS
-        ]
-    }
+async def get_income_statements(
+    request: Request,
+    fields: list[str] = Query(
+        default=None, description="Line items to include, repeated or comma-separated (default: all)"
+    ),
+    start: date = Query(default=None, alias="from", description="Earliest period end (inclusive)"),
+    end: date = Query(default=None, alias="to", description="Latest period end (inclusive)"),
+    cursor: date = Query(default=None, description="next_cursor from the previous page"),
+    limit: int = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Statements per page"),
+):
+    """Get income statement data, optionally narrowed to fields, a date range and a page"""
+    return statement_response(
+        request, "income-statements", "income", income_statements_payload,
+        fields, start, end, cursor, limit,
+    )
 
 
 @app.get("/api/balance-sheets", tags=["Statements"])
-async def get_balance_sheets():
-    """Get all balance sheet data"""
-    return {
-        "periods": [
-            {
-                "label": f"As at {sheet['period_end'].strftime('%b %d, %Y')}",
-                **sheet,
-                "period_end": sheet["period_end"].isoformat(),
-            }
-            for sheet in BALANCE_SHEETS
-        ]
-    }
+async def get_balance_sheets(
+    request: Request,
+    fields: list[str] = Query(
+        default=None, description="Line items to include, repeated or comma-separated (default: all)"
+    ),
+    start: date = Query(default=None, alias="from", description="Earliest period end (inclusive)"),
+    end: date = Query(default=None, alias="to", description="Latest period end (inclusive)"),
+    cursor: date = Query(default=None, description="next_cursor from the previous page"),
+    limit: int = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Statements per page"),
+):
+    """Get balance sheet data, optionally narrowed to fields, a date range and a page"""
+    return statement_response(
+        request, "balance-sheets", "balance", balance_sheets_payload,
+        fields, start, end, cursor, limit,
+    )
 
 
 @app.get("/api/metrics", tags=["Metrics & Benchmarks"])
@@ -247,20 +597,7 @@ async def get_metrics(
     year: str = Query(default=None, description="Fiscal year label (e.g., FY24-25)")
 ):
     """Get calculated financial metrics for a specific or all periods"""
-    if year:
-        income, idx = resolve_period(INCOME_STATEMENTS, year)
-        balance = BALANCE_SHEETS[idx] if idx < len(BALANCE_SHEETS) else None
-        metrics = calculate_metrics(income, balance)
-        metrics["period_label"] = get_fiscal_year_label(income["period_end"])
-        return {"periods": [metrics]}
-
-    results = []
-    for i, income in enumerate(INCOME_STATEMENTS):
-        balance = BALANCE_SHEETS[i] if i < len(BALANCE_SHEETS) else None
-        metrics = calculate_metrics(income, balance)
-        metrics["period_label"] = get_fiscal_year_label(income["period_end"])
-        results.append(metrics)
-    return {"periods": results}
+    return await run_in_threadpool(cached_payload, "metrics", year)
 
 
 @app.get("/api/expense-breakdown", tags=["Metrics & Benchmarks"])
@@ -268,189 +605,772 @@ async def get_expense_breakdown(
     year: str = Query(default=None, description="Fiscal year label (e.g., FY24-25)")
 ):
     """Get detailed expense breakdown"""
-    current, current_idx = resolve_period(INCOME_STATEMENTS, year)
+    return await run_in_threadpool(cached_payload, "expense-breakdown", year)
 
-    previous_idx = current_idx + 1
-    has_previous = previous_idx < len(INCOME_STATEMENTS)
-    previous = INCOME_STATEMENTS[previous_idx] if has_previous else None
 
-    def build_breakdown(stmt):
-        total = stmt["total_expenses"]
-        return {
-            "cogs": {
-                "purchases": stmt["total_purchases"],
-                "payroll": stmt["total_payroll"],
-                "total": stmt["total_cogs"],
-                "pct_of_total": round(stmt["total_cogs"] / total * 100, 1),
-            },
-            "ga": {
-                "rent": stmt["rent"],
-                "interest_bank": stmt["interest_bank_charges"],
-                "amortization": stmt["amortization"],
-                "insurance": stmt["insurance"],
-                "accounting": stmt["accounting_legal"],
-                "advertising": stmt["advertising"],
-                "repairs": stmt["repairs_maintenance"],
-                "vehicle": stmt["vehicle_expenses"],
-                "telephone": stmt["telephone"],
-                "other": (
-                    stmt["business_fees"]
-                    + stmt["office_supplies"]
-                    + stmt["travel_entertainment"]
-                    + stmt["utilities"]
-                    + stmt["cleaning_supplies"]
-                    + stmt["licensing"]
-                ),
-                "total": stmt["total_ga_expenses"],
-                "pct_of_total": round(stmt["total_ga_expenses"] / total * 100, 1),
-            },
-            "total_expenses": total,
-        }
-
-    result = {
-        "current": {
-            "period": get_fiscal_year_label(current["period_end"]),
-            **build_breakdown(current),
-        },
-        "has_comparison": has_previous,
-    }
-
-    if has_previous:
-        result["previous"] = {
-            "period": get_fiscal_year_label(previous["period_end"]),
-            **build_breakdown(previous),
-        }
-
-    return result
+def peer_cohort(region: str | None = None, revenue_band: str | None = None) -> PeerIndex | None:
+    """Indexed peer cohort, or None without a peer dataset; 404/400 for cohorts that can't be built"""
+    if peer_dataset is None:
+        if region or revenue_band:
+            raise HTTPException(status_code=404, detail="No peer dataset loaded (set PEER_DATASET_PATH)")
+        return None
+    try:
+        return peer_dataset.cohort(region, revenue_band)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
 
 @app.get("/api/benchmarks", tags=["Metrics & Benchmarks"])
 async def get_benchmarks(
+    year: str = Query(default=None, description="Fiscal year label (e.g., FY24-25)"),
+    region: str = Query(default=None, description="Compare against peers in this region only"),
+    revenue_band: str = Query(default=None, description="Compare against peers in this revenue band only"),
+):
+    """Compare your metrics against industry benchmarks and, when loaded, peer percentiles"""
+    if not region and not revenue_band:
+        return await run_in_threadpool(cached_payload, "benchmarks", year)
+    cohort = peer_cohort(region or None, revenue_band or None)
+    current = dataset
+
+    def compute() -> dict:
+        store, period = period_window(current, (current.default_entity,), year)
+        with phase("compute"):
+            return benchmarks_payload(store, period, peers=cohort)
+
+    key = f"peers={region or '*'}/{revenue_band or '*'}:benchmarks"
+    return await run_in_threadpool(serve_cached, payload_cache, key, year, current, compute)
+
+
+@app.get("/api/peers", tags=["Metrics & Benchmarks"])
+async def get_peers():
+    """Peer dataset size and the regions and revenue bands cohorts can be narrowed to"""
+    if peer_dataset is None:
+        return {"loaded": False, "count": 0, "regions": [], "revenue_bands": list(REVENUE_BANDS)}
+    return {
+        "loaded": True,
+        "count": len(peer_dataset),
+        "regions": peer_dataset.region_names(),
+        "revenue_bands": list(REVENUE_BANDS),
+    }
+
+
+@app.get("/api/debt-progress", tags=["Debt & Cash Flow"])
+async def get_debt_progress(
     year: str = Query(default=None, description="Fiscal year label (e.g., FY24-25)")
 ):
-    """Compare your metrics against industry benchmarks"""
-    current_income, idx = resolve_period(INCOME_STATEMENTS, year)
-    current_balance = BALANCE_SHEETS[idx] if idx < len(BALANCE_SHEETS) else None
+    """Track debt paydown progress"""
+    return await run_in_threadpool(cached_payload, "debt-progress", year)
 
-    metrics = calculate_metrics(current_income, current_balance)
 
-    benchmarks = []
+@app.get("/api/cash-flow-health", tags=["Debt & Cash Flow"])
+async def get_cash_flow_health(
+    response: Response,
+    year: str = Query(default=None, description="Fiscal year label (e.g., FY24-25)"),
+    simulate: bool = Query(default=False, description="Add a Monte Carlo runway distribution"),
+    paths: int = Query(default=10000, ge=100, description="Simulated paths"),
+    horizon_months: int = Query(default=60, ge=1, le=240, description="Months to simulate"),
+    revenue_shift_pct: float = Query(default=0.0, ge=-100, description="Change to average monthly revenue (%)"),
+    expense_shift_pct: float = Query(default=0.0, ge=-100, description="Change to average monthly expenses (%)"),
+    volatility: float = Query(
+        default=None, ge=0, le=5, description="Monthly std. deviation as a fraction of the mean (default: from history)"
+    ),
+    seed: int = Query(default=0, ge=0, description="Random seed; the same scenario always gives the same result"),
+):
+    """Analyze cash flow and liquidity.
 
-    benchmark_map = {
-        "gross_margin_pct": ("Gross Margin", "%"),
-        "net_margin_pct": ("Net Margin", "%"),
-        "labor_cost_pct": ("Labor Cost", "%"),
-        "rent_pct": ("Rent", "%"),
-        "food_cost_pct": ("Food Cost (COGS)", "%"),
-    }
+    With ``simulate``, also returns the P10/P50/P90 months until cash runs
+    out across simulated revenue and expense paths (see ``app.runway``).
+    Runs larger than one chunk are spread over worker processes and stop at
+    the time budget; partial runs are returned but not cached, here or by
+    clients.
+    """
+    payload = await run_in_threadpool(cached_payload, "cash-flow-health", year)
+    if not simulate:
+        return payload
+    if paths > settings.simulation_max_paths:
+        raise HTTPException(status_code=400, detail=f"paths may be at most {settings.simulation_max_paths}")
+    current = dataset
+    store = current.default
+    period = resolve_period(year, store)
+    scenario = RunwayScenario(paths, horizon_months, revenue_shift_pct, expense_shift_pct, volatility, seed)
+
+    def compute() -> dict:
+        with phase("compute"):
+            return run_simulation(
+                cash_flow_model(store, period, volatility),
+                scenario,
+                executor=simulation_pool,
+                chunk_paths=settings.simulation_chunk_paths,
+                time_budget=settings.simulation_time_budget,
+            )
+
+    try:
+        simulation = await run_in_threadpool(
+            serve_cached, payload_cache, "runway", (period.label, scenario), current, compute
+        )
+    except IncompleteSimulation as exc:
+        simulation = exc.result
+        # Not a result to revalidate against either: conditional_get leaves it without an ETag
+        response.headers["Cache-Control"] = "no-store"
+    return {**payload, "runway_simulation": simulation}
+
+
+def prepayments(values: list[str] | None, param: str) -> dict[str, float]:
+    """Parse repeated or comma-separated ``loan:amount`` pairs"""
+    amounts = {}
+    for item in split_list_param(values):
+        loan, _, amount = item.partition(":")
+        try:
+            amounts[loan.strip()] = float(amount)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"{param} expects loan:amount, got {item}")
+        if amounts[loan.strip()] < 0:
+            raise HTTPException(status_code=400, detail=f"{param} amounts must not be negative")
+    return amounts
+
+
+@app.get("/api/loans", tags=["Debt & Cash Flow"])
+async def get_loans(
+    year: str = Query(default=None, description="Fiscal year whose closing balances to start from (default: latest)"),
+    entity: str = Query(default=None, description="Entity (default: every entity with loans)"),
+    extra: list[str] = Query(
+        default=None, description="What-if extra monthly payment as loan:amount, repeated or comma-separated"
+    ),
+    lump_sum: list[str] = Query(default=None, description="What-if lump-sum prepayment now, as loan:amount"),
+    schedule: bool = Query(default=False, description="Include the month-by-month schedules"),
+    as_of: date = Query(default=None, description="Date to total interest to (default: today)"),
+):
+    """Amortization of every loan: payoff dates, total interest and interest to date.
 
-    for key, (name, unit) in benchmark_map.items():
-        if key in INDUSTRY_BENCHMARKS and key in metrics:
-            bench = INDUSTRY_BENCHMARKS[key]
-            value = metrics[key]
-            benchmarks.append(
+    All loans across the selected entities are amortized in one vectorized
+    pass from the period's balance-sheet balances. With prepayments, each
+    affected loan also reports its baseline and the interest and months saved.
+    """
+    current = dataset
+    if entity is not None:
+        entity, store = entity_store(entity, current)
+        stores = {entity: store}
+    else:
+        stores = {entity: store for entity, store in sorted(current.stores.items()) if store.loans}
+    extras = prepayments(extra, "extra")
+    lumps = prepayments(lump_sum, "lump_sum")
+    known = {terms["loan"] for store in stores.values() for terms in store.loans}
+    unknown = sorted((extras.keys() | lumps.keys()) - known)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown loans: {', '.join(unknown)}")
+    as_of = as_of or date.today()
+
+    def compute() -> dict:
+        loans, periods = [], {}
+        for name, store in stores.items():
+            period = resolve_period(year, store)
+            periods[name] = period.label
+            loans.extend(
                 {
-                    "metric": name,
-                    "unit": unit,
-                    "your_value": value,
-                    "industry_avg": bench["avg"],
-                    "industry_low": bench["low"],
-                    "industry_high": bench["high"],
-                    "status": get_benchmark_status(value, bench),
+                    **terms,
+                    "entity": name,
+                    "balance": period.balance[terms["balance_field"]],
+                    "balance_date": period.period_end,
                 }
+                for terms in store.loans
             )
+        with phase("compute"):
+            return {
+                "as_of": as_of.isoformat(),
+                "periods": periods,
+                "loans": loan_schedules(loans, as_of, extras, lumps, schedule),
+            }
 
-    return {"benchmarks": benchmarks}
+    key = (
+        year,
+        entity,
+        tuple(sorted(extras.items())),
+        tuple(sorted(lumps.items())),
+        schedule,
+        as_of,
+    )
+    return serve_cached(payload_cache, "loans", key, current, compute)
+
+
+# Dashboard sections -> (cache key shared with the standalone endpoint, builder)
+DASHBOARD_SECTIONS = {
+    "fiscal_years": (None, None),
+    "summary": ("summary", summary_payload),
+    "metrics": ("metrics", None),
+    "benchmarks": ("benchmarks", None),
+    "debt_progress": ("debt-progress", debt_progress_payload),
+    "expense_breakdown": ("expense-breakdown", expense_breakdown_payload),
+    "cash_flow_health": ("cash-flow-health", cash_flow_health_payload),
+}
+
+
+@app.get("/api/dashboard", tags=["Financial Summary"])
+async def get_dashboard(
+    year: str = Query(default=None, description="Fiscal year label (e.g., FY24-25)"),
+    sections: list[str] = Query(
+        default=None,
+        description="Sections to include, repeated or comma-separated (default: all)",
+    ),
+):
+    """Get every dashboard section for a fiscal year in one response.
 
+    The period's window is read once and the period's metrics are shared
+    between the metrics and benchmarks sections. Each section is served from the same
+    cache entries as its standalone endpoint.
+    """
+    if sections:
+        requested = split_list_param(sections)
+        unknown = [name for name in requested if name not in DASHBOARD_SECTIONS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown sections: {', '.join(unknown)}. "
+                f"Available: {', '.join(DASHBOARD_SECTIONS)}",
+            )
+    else:
+        requested = list(DASHBOARD_SECTIONS)
+
+    current = dataset
+    store = current.default
+    window, period = await run_in_threadpool(period_window, current, (current.default_entity,), year)
+    shared = {}
+
+    def period_metrics() -> dict:
+        if "metrics" not in shared:
+            shared["metrics"] = calculate_metrics(period.income, period.balance)
+        return shared["metrics"]
+
+    def build_metrics() -> dict:
+        if not year:
+            return metrics_payload(store)
+        return {"periods": [{**period_metrics(), "period_label": period.label}]}
+
+    builders = {
+        "metrics": build_metrics,
+        "benchmarks": lambda: benchmarks_payload(window, period, period_metrics(), peer_cohort()),
+    }
 
-@app.get("/api/debt-progress", tags=["Debt & Cash Flow"])
-async def get_debt_progress(
-    year: str = Query(default=None, description="Fiscal year label (e.g., FY24-25)")
+    result = {"period": period.label, "data_version": current.version}
+    with phase("compute"):
+        for section in requested:
+            if section == "fiscal_years":
+                result[section] = get_available_fiscal_years(store)
+                continue
+            endpoint, build = DASHBOARD_SECTIONS[section]
+            compute = builders.get(section) or (lambda build=build: build(window, period))
+            result[section] = serve_cached(payload_cache, endpoint, year, current, compute)
+    return result
+
+
+def entity_store(entity: str | None, current: Dataset | None = None) -> tuple[str, PeriodStore]:
+    """(entity, store) of ``current`` (the served dataset), the default entity when None; 404 for unknown entities"""
+    current = current or dataset
+    entity = entity or current.default_entity
+    store = current.store(entity)
+    if store is None:
+        raise HTTPException(status_code=404, detail=f"Entity {entity} not found")
+    return entity, store
+
+
+def chart_rollup(entity: str, store: PeriodStore, current: Dataset) -> ChartRollup:
+    """Every chart node summed over every period of an entity, computed once per data version"""
+    return serve_cached(payload_cache, f"entity={entity}:accounts", None, current, partial(ChartRollup, chart, store))
+
+
+@app.get("/api/chart-of-accounts", tags=["Accounts"])
+async def get_chart_of_accounts():
+    """The account hierarchy: groups, their paths and the line items at the leaves"""
+    return {"accounts": chart_tree}
+
+
+@app.get("/api/accounts", tags=["Accounts"])
+async def get_account_roots(
+    year: str = Query(default=None, description="Fiscal year label (e.g., FY24-25)"),
+    entity: str = Query(default=None, description="Entity (default: the default entity)"),
 ):
-    """Track debt paydown progress"""
-    current, current_idx = resolve_period(BALANCE_SHEETS, year)
-
-    previous_idx = current_idx + 1
-    has_previous = previous_idx < len(BALANCE_SHEETS)
-    previous = BALANCE_SHEETS[previous_idx] if has_previous else None
-
-    loans = [
-        {
-            "name": "BDC Loan",
-            "current": current["bdc_loan"],
-            "previous": previous["bdc_loan"] if has_previous else 0,
-            "paid_down": (previous["bdc_loan"] - current["bdc_loan"]) if has_previous else 0,
-        },
-        {
-            "name": "CIBC Future Entrepreneur",
-            "current": current["cibc_loan"],
-            "previous": previous["cibc_loan"] if has_previous else 0,
-            "paid_down": (previous["cibc_loan"] - current["cibc_loan"]) if has_previous else 0,
-        },
-        {
-            "name": "Shareholder Loan",
-            "current": current["shareholder_loan"],
-            "previous": previous["shareholder_loan"] if has_previous else 0,
-            "paid_down": (previous["shareholder_loan"] - current["shareholder_loan"]) if has_previous else 0,
-        },
-    ]
-
-    total_current = sum(loan["current"] for loan in loans)
-    total_previous = sum(loan["previous"] for loan in loans)
+    """Top-level account totals for a period, the starting point for drill-down"""
+    current = dataset
+    entity, store = entity_store(entity, current)
+    period = resolve_period(year, store)
+    with phase("compute"):
+        rollup = chart_rollup(entity, store, current)
+    return {"entity": entity, "period": period.label, "accounts": rollup.roots(period.index)}
+
+
+@app.get("/api/accounts/{path:path}", tags=["Accounts"])
+async def get_account(
+    path: str,
+    year: str = Query(default=None, description="Fiscal year label (e.g., FY24-25)"),
+    entity: str = Query(default=None, description="Entity (default: the default entity)"),
+):
+    """Drill into an account group, e.g. expenses/ga/other.
+
+    Returns the node's total, its percentage of its parent and of its root,
+    the path above it and each child with its percentage of the node.
+    """
+    node = chart.get(path)
+    if node is None:
+        raise HTTPException(status_code=404, detail=f"Unknown account {path}")
+    current = dataset
+    entity, store = entity_store(entity, current)
+    period = resolve_period(year, store)
+    with phase("compute"):
+        rollup = chart_rollup(entity, store, current)
+    return {"entity": entity, "period": period.label, **rollup.drill_down(node, period.index)}
+
+
+def series_names(fields: list[str] | None) -> list[str] | None:
+    """Requested series for the change endpoints, None for all of them"""
+    names = split_list_param(fields)
+    return names or None
+
+
+@app.get("/api/changes", tags=["Changes"])
+async def get_changes(
+    year: str = Query(default=None, description="Fiscal year label (default: the latest)"),
+    base: str = Query(default=None, description="Fiscal year to compare against (default: the one before)"),
+    entity: str = Query(default=None, description="Entity (default: the default entity)"),
+    fields: list[str] = Query(
+        default=None,
+        description="Series to include, e.g. income.net_income or metrics.gross_margin_pct, "
+        "repeated or comma-separated (default: all)",
+    ),
+):
+    """Change in every line item and metric between two periods.
+
+    Each series has the current and base values, the absolute change and
+    the percent change relative to the base's magnitude.
+    """
+    current = dataset
+    entity, store = entity_store(entity, current)
+    period = resolve_period(year, store)
+    if base:
+        base_period = resolve_period(base, store)
+    else:
+        base_period = store.previous(period)
+        if base_period is None:
+            raise HTTPException(status_code=404, detail=f"No period before {period.label}")
+    with phase("compute"):
+        try:
+            changes = period_diffs(store).pair(period.index, base_period.index, series_names(fields))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        return {
+            "entity": entity,
+            "period": period.label,
+            "base": base_period.label,
+            "changes": {name: change.to_dict() for name, change in changes.items()},
+        }
+
+
+@app.get("/api/changes/trend", tags=["Changes"])
+async def get_change_trend(
+    entity: str = Query(default=None, description="Entity (default: the default entity)"),
+    fields: list[str] = Query(
+        default=None, description="Series to include, repeated or comma-separated (default: all)"
+    ),
+    start: date = Query(default=None, alias="from", description="Earliest period end (inclusive)"),
+    end: date = Query(default=None, alias="to", description="Latest period end (inclusive)"),
+):
+    """Every period in a range against the period before it, most recent first.
+
+    Columnar: one list per series for the values, changes and percent
+    changes, aligned with ``periods``.
+    """
+    current = dataset
+    entity, store = entity_store(entity, current)
+    names = series_names(fields)
+    diffs = period_diffs(store)
+    try:
+        names = diffs.resolve(names) if names is not None else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    def compute() -> dict:
+        periods = store.between(start, end)
+        lo, hi = (periods[0].index, periods[-1].index + 1) if periods else (0, 0)
+        return {"entity": entity, **diffs.consecutive(names, lo, hi)}
+
+    with phase("compute"):
+        return serve_cached(payload_cache, f"entity={entity}:trend", (tuple(names or ()), start, end), current, compute)
+
+
+def entity_trends(entity: str, store: PeriodStore, names, periods, window, horizon) -> dict:
+    return {"entity": entity, **trends_payload(store, names, periods, window, horizon)}
+
+
+@app.get("/api/trends", tags=["Changes"])
+async def get_trends(
+    entity: str = Query(default=None, description="Entity (default: the default entity)"),
+    fields: list[str] = Query(
+        default=None, description="Series to include, repeated or comma-separated (default: all)"
+    ),
+    periods: int = Query(default=None, ge=1, description="Latest periods to analyze (default: all)"),
+    window: int = Query(default=3, ge=1, le=50, description="Rolling average window, in periods"),
+    horizon: int = Query(default=3, ge=0, le=20, description="Years to project past the latest period"),
+):
+    """Multi-period growth, rolling averages and linear projections for every series.
+
+    Each series gets its compound annual growth rate, trailing rolling
+    averages, least-squares slope and fit, and projected values for the
+    following years.
+    """
+    current = dataset
+    entity, store = entity_store(entity, current)
+    names = series_names(fields)
+    try:
+        names = period_diffs(store).resolve(names) if names is not None else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    with phase("compute"):
+        return serve_cached(
+            payload_cache,
+            f"entity={entity}:trends",
+            (tuple(names or ()), periods, window, horizon),
+            current,
+            partial(entity_trends, entity, store, names, periods, window, horizon),
+        )
+
 
+@app.get("/api/entities", tags=["Entities"])
+async def get_entities():
+    """List entities (locations) with statement data"""
+    current = dataset
     return {
-        "loans": loans,
-        "total_current": total_current,
-        "total_previous": total_previous,
-        "total_paid_down": total_previous - total_current,
-        "equity_current": current["total_equity"],
-        "equity_previous": previous["total_equity"] if has_previous else 0,
-        "equity_improvement": (current["total_equity"] - previous["total_equity"]) if has_previous else 0,
-        "has_comparison": has_previous,
+        "default": current.default_entity,
+        "entities": [
+            {"entity": entity, "name": store.name, "periods": len(store)}
+            for entity, store in sorted(current.stores.items())
+        ],
     }
 
 
-@app.get("/api/cash-flow-health", tags=["Debt & Cash Flow"])
-async def get_cash_flow_health(
-    year: str = Query(default=None, description="Fiscal year label (e.g., FY24-25)")
+@app.get("/api/reconciliation", tags=["Statements"])
+async def get_reconciliation(
+    entity: str = Query(default=None, description="Entity to report on (default: all)"),
 ):
-    """Analyze cash flow and liquidity"""
-    current_balance, current_idx = resolve_period(BALANCE_SHEETS, year)
-    current_income = INCOME_STATEMENTS[current_idx] if current_idx < len(INCOME_STATEMENTS) else None
+    """Subtotal and balance-sheet checks run when the statements were loaded.
+
+    Every hand-entered subtotal is recomputed from its components; stated
+    values off by more than the tolerance are listed as mismatches.
+    """
+    current = dataset
+    if entity is not None and current.store(entity) is None:
+        raise HTTPException(status_code=404, detail=f"Entity {entity} not found")
+    entities = [entity] if entity is not None else current.entities()
+    return {name: current.store(name).reconciliation.to_dict() for name in entities}
+
 
-    previous_idx = current_idx + 1
-    has_previous = previous_idx < len(BALANCE_SHEETS)
-    previous_balance = BALANCE_SHEETS[previous_idx] if has_previous else None
+@app.post("/api/entities/{entity}/interim-statements", tags=["Entities"])
+async def add_interim_statements(entity: str, periods: list[IncomeStatementPeriod]):
+    """Ingest monthly (or weekly) income statements for an entity.
+
+    Periods are persisted to the ledger and folded into the entity's
+    year-to-date rollup incrementally; nothing else is reloaded unless another
+    process wrote to the ledger since the last load.
+    """
+    if dataset.store(entity) is None:
+        raise HTTPException(status_code=404, detail=f"Entity {entity} not found")
+    rows = [period.model_dump() for period in periods]
+    rollup = await run_in_threadpool(add_interim, entity, rows)
+    return {"entity": entity, "added": len(rows), "interim_periods": len(rollup)}
+
+
+def add_interim(entity: str, rows: list[dict]) -> InterimRollup:
+    """Persist interim periods and swap in a dataset with them folded into the entity's rollup"""
+    global ledger_revision
+    with ledger_reload_lock:
+        ledger.upsert_interim_income_statements(rows, entity)
+        revision = ledger.written_revision()
+        if revision != ledger_revision + 1:
+            # Other writes landed since the last load; the rollup alone would miss them
+            revision = ledger.revision()
+            set_dataset(load_dataset(revision))
+            ledger_revision = revision
+            return dataset.rollups[entity]
+        set_dataset(dataset.with_interim(entity, rows))
+        ledger_revision = revision
+        # Other workers map this instead of each rebuilding from the ledger
+        if settings.snapshot_enabled:
+            write_snapshot(settings.snapshot_file, dataset, ledger_revision)
+        return dataset.rollups[entity]
+
+
+@app.put("/api/entities/{entity}/loans", tags=["Entities"])
+async def replace_loans(entity: str, loans: list[LoanTerms]):
+    """Replace an entity's loan terms.
+
+    Terms are part of the data version, so cached schedules and debt
+    progress payloads are recomputed on the next request.
+    """
+    if dataset.store(entity) is None:
+        raise HTTPException(status_code=404, detail=f"Entity {entity} not found")
+    keys = [terms.loan for terms in loans]
+    if len(set(keys)) != len(keys):
+        raise HTTPException(status_code=400, detail="Loan keys must be unique")
+    await run_in_threadpool(ledger.replace_loans, [terms.model_dump() for terms in loans], entity)
+    await run_in_threadpool(refresh_from_ledger)
+    return {"entity": entity, "loans": dataset.store(entity).loans}
+
+
+@app.get("/api/entities/{entity}/rollups", tags=["Entities"])
+async def get_rollups(
+    entity: str,
+    as_of: date = Query(default=None, description="Rollup date (default: latest interim period end)"),
+):
+    """Fiscal year-to-date and trailing-twelve-month totals from interim statements"""
+    current = dataset
+    if current.store(entity) is None:
+        raise HTTPException(status_code=404, detail=f"Entity {entity} not found")
+    rollup = current.rollups.get(entity)
+    if rollup is None or not len(rollup):
+        raise HTTPException(status_code=404, detail=f"No interim statements for {entity}")
+    as_of = as_of or rollup.latest_end
+    return {
+        "entity": entity,
+        "as_of": as_of.isoformat(),
+        "year_to_date": rollup.year_to_date(as_of),
+        "trailing_twelve_months": rollup.trailing_twelve_months(as_of),
+    }
 
-    monthly_revenue = current_income["total_revenue"] / 12
-    monthly_expenses = current_income["total_expenses"] / 12
-    monthly_net = current_income["net_income"] / 12
 
-    cash_runway_months = (
-        current_balance["total_cash"] / monthly_expenses if monthly_expenses else 0
+@app.get("/api/entities/{entity}/{endpoint}", tags=["Entities"])
+async def get_entity_payload(
+    entity: str,
+    endpoint: str,
+    year: str = Query(default=None, description="Fiscal year label (e.g., FY24-25)"),
+):
+    """Get any period-scoped endpoint (summary, metrics, ...) for one entity"""
+    current = dataset
+    if current.store(entity) is None:
+        raise HTTPException(status_code=404, detail=f"Entity {entity} not found")
+    if endpoint not in PERIOD_PAYLOADS:
+        raise HTTPException(status_code=404, detail=f"Unknown endpoint {endpoint}")
+    return await run_in_threadpool(cached_payload, endpoint, year, (entity,), f"entity={entity}", current)
+
+
+@app.get("/api/consolidated/{endpoint}", tags=["Entities"])
+async def get_consolidated_payload(
+    endpoint: str,
+    year: str = Query(default=None, description="Fiscal year label (e.g., FY24-25)"),
+    entities: list[str] = Query(
+        default=None,
+        description="Entities to consolidate, repeated or comma-separated (default: all)",
+    ),
+):
+    """Get any period-scoped endpoint for the sum of several entities.
+
+    Line items are summed across entities per period end before metrics are
+    calculated. Consolidated statements are cached per entity set.
+    """
+    if endpoint not in PERIOD_PAYLOADS:
+        raise HTTPException(status_code=404, detail=f"Unknown endpoint {endpoint}")
+    current = dataset
+    requested = sorted(set(split_list_param(entities))) or current.entities()
+    unknown = [entity for entity in requested if current.store(entity) is None]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Entities not found: {', '.join(unknown)}")
+    scope = f"consolidated={','.join(requested)}"
+    return await run_in_threadpool(cached_payload, endpoint, year, tuple(requested), scope, current)
+
+
+@app.get("/api/export/{kind}", tags=["Export"])
+async def export_statements(
+    kind: str,
+    format: str = Query(default="csv", description="csv or ndjson"),
+    start: date = Query(default=None, alias="from", description="Earliest period end (inclusive)"),
+    end: date = Query(default=None, alias="to", description="Latest period end (inclusive)"),
+    entities: list[str] = Query(
+        default=None,
+        description="Entities to export, repeated or comma-separated (default: all)",
+    ),
+):
+    """Stream statements or per-period metrics as CSV or NDJSON.
+
+    ``kind`` is one of income-statements, interim-income-statements,
+    balance-sheets or metrics. Rows are read from the ledger in batches and
+    written out as they are encoded, so memory stays flat for any range.
+    """
+    if kind not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown export {kind}")
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported format {format}")
+    requested = sorted(set(split_list_param(entities))) or None
+    unknown = [entity for entity in requested or () if dataset.store(entity) is None]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Entities not found: {', '.join(unknown)}")
+    return StreamingResponse(
+        stream_export(ledger, kind, format, requested, start, end),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{format}"'},
     )
 
+
+@app.post("/api/import", tags=["Statements"])
+async def import_statements(
+    request: Request,
+    entity: str = Query(default=DEFAULT_ENTITY, description="Entity for rows without an entity column"),
+    interim: bool = Query(
+        default=False, description="Import income statements as interim periods (required for GL detail)"
+    ),
+):
+    """Import a trial balance or GL detail export (CSV request body).
+
+    The body is spooled to a temporary file and mapped in chunks across the
+    import worker processes; see ``app.importer`` for the accepted layouts.
+    Returns counts of imported periods plus any unmapped accounts and
+    rejected rows.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        source = io.TextIOWrapper(body, encoding="utf-8-sig", newline="")
+        try:
+            report = await run_in_threadpool(
+                import_export,
+                ledger,
+                source,
+                entity,
+                interim,
+                executor=import_pool,
+                chunk_rows=settings.import_chunk_rows,
+                max_pending=2 * settings.import_workers,
+            )
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        finally:
+            source.detach()
+    await run_in_threadpool(refresh_from_ledger)
+    return report.to_dict()
+
+
+# Whole-history statement bodies served pre-rendered
+PRERENDERED = {
+    "income-statements": income_statements_payload,
+    "balance-sheets": balance_sheets_payload,
+}
+
+
+def precompute_jobs() -> tuple[str, list]:
+    """(data version, jobs) filling the cache entries requests hit most.
+
+    For every entity: each period-scoped payload for all periods and its
+    latest ``precompute_years`` fiscal years, the account rollups and the
+    default trends; plus the default entity's statement bodies. Parameterized
+    results (changes, loans, simulations) are left to revalidation. Each cache
+    is grown by the entries a pass fills, so a pass never evicts its own results.
+    """
+    current = dataset
+    jobs = []
+    counts = {payload_cache: 0, body_cache: 0, window_cache: 0}
+
+    def job(cache: VersionedCache, endpoint: str, year, compute) -> None:
+        jobs.append(partial(cache.get_or_compute, endpoint, year, current.version, compute, current.generation))
+        counts[cache] += 1
+
+    for entity, store in sorted(current.stores.items()):
+        scope = None if entity == current.default_entity else f"entity={entity}"
+        years = [None, *(period.label for period in store.periods[: settings.precompute_years])]
+        counts[window_cache] += len(years)
+        for endpoint in PERIOD_PAYLOADS:
+            for year in years:
+                key, compute = period_payload(endpoint, year, current, (entity,), scope)
+                job(payload_cache, key, year, compute)
+        job(payload_cache, f"entity={entity}:accounts", None, partial(ChartRollup, chart, store))
+        trends = partial(entity_trends, entity, store, None, None, 3, 3)
+        job(payload_cache, f"entity={entity}:trends", ((), None, 3, 3), trends)
+    for endpoint, build in PRERENDERED.items():
+        job(body_cache, endpoint, None, prerender(build, current.default))
+    for cache in counts:
+        cache.reserve(counts[cache])
+    return current.version, jobs
+
+
+# Recomputes the jobs above in the background whenever the data version changes
+precomputer = Precomputer(
+    lambda: dataset.version,
+    precompute_jobs,
+    refresh=refresh_from_ledger if settings.ledger_poll_seconds else None,
+    interval=settings.precompute_interval,
+    refresh_interval=settings.ledger_poll_seconds,
+)
+
+
+@app.get("/api/cache-stats", tags=["Health"])
+async def get_cache_stats():
+    """Hit/miss counters for the payload, response body and period window caches, and the precompute status"""
     return {
-        "cash": {
-            "current": current_balance["total_cash"],
-            "previous": previous_balance["total_cash"] if has_previous else 0,
-            "change": (current_balance["total_cash"] - previous_balance["total_cash"]) if has_previous else 0,
-        },
-        "monthly_averages": {
-            "revenue": round(monthly_revenue, 2),
-            "expenses": round(monthly_expenses, 2),
-            "net_income": round(monthly_net, 2),
-        },
-        "liquidity": {
-            "current_ratio": round(
-                current_balance["total_current_assets"]
-                / current_balance["total_current_liabilities"],
-                2,
-            ),
-            "cash_runway_months": round(cash_runway_months, 1),
-        },
-        "has_comparison": has_previous,
+        "payloads": payload_cache.stats(),
+        "bodies": body_cache.stats(),
+        "windows": window_cache.stats(),
+        "consolidations": dataset.consolidation_stats(),
+        "precompute": precomputer.status(),
+    }
+
+
+def cache_metric_lines() -> list[str]:
+    """Cache counters from /api/cache-stats in exposition format"""
+    caches = {
+        "payloads": payload_cache.stats(),
+        "bodies": body_cache.stats(),
+        "windows": window_cache.stats(),
+        "consolidations": dataset.consolidation_stats(),
     }
+    lines = []
+    for counter in ("hits", "stale_hits", "misses", "evictions", "invalidations", "superseded"):
+        lines.extend(metric_lines(
+            f"lrc_cache_{counter}_total",
+            "counter",
+            f"Cache {counter}",
+            [({"cache": name}, stats[counter]) for name, stats in caches.items()],
+        ))
+    lines.extend(metric_lines(
+        "lrc_cache_entries",
+        "gauge",
+        "Entries currently cached",
+        [({"cache": name}, stats["size"]) for name, stats in caches.items()],
+    ))
+    return lines
+
+
+@app.get("/api/stats", tags=["Health"], response_class=PlainTextResponse)
+async def get_stats():
+    """Latency histograms per route and phase, plus cache counters (Prometheus text format)"""
+    lines = [*latency_stats.prometheus(), *cache_metric_lines()]
+    lines.extend(metric_lines(
+        "lrc_data_periods", "gauge", "Periods loaded per entity",
+        [({"entity": entity}, len(store)) for entity, store in sorted(dataset.stores.items())],
+    ))
+    return PlainTextResponse(
+        "\n".join(lines) + "\n", media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def require_profiler() -> None:
+    if not settings.profiler_enabled:
+        raise HTTPException(status_code=404, detail="Profiler is disabled (set PROFILER_ENABLED)")
+
+
+@app.post("/api/stats/profiler", tags=["Health"])
+async def toggle_profiler(
+    active: bool = Query(description="Start (true) or stop (false) sampling"),
+    reset: bool = Query(default=True, description="Discard earlier samples when starting"),
+):
+    """Start or stop the sampling profiler"""
+    require_profiler()
+    if active:
+        profiler.start(reset=reset)
+    else:
+        profiler.stop()
+    return profiler.status()
+
+
+@app.get("/api/stats/profile", tags=["Health"], response_class=PlainTextResponse)
+async def get_profile():
+    """Sampled stacks in collapsed form, for flamegraph.pl or speedscope"""
+    require_profiler()
+    return PlainTextResponse(profiler.collapsed())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+"""
+Financial metric calculations.
+
+``calculate_metrics`` works on a single period's statement dicts;
+``calculate_metrics_batch`` computes the same metrics for every row of a pair
+of statement tables in one vectorized pass.
+"""
+
+import numpy as np
+
+from app.tables import StatementTable
+
+
+def calculate_metrics(income: dict, balance: dict | None = None) -> dict:
+    """Calculate financial metrics from raw data"""
+    revenue = income["total_revenue"]
+    net_sales = income["net_sales"]
+    cogs = income["total_cogs"]
+    purchases = income["total_purchases"]
+    payroll = income["total_payroll"]
+    rent = income["rent"]
+    net_income = income["net_income"]
+
+    gross_profit = revenue - cogs
+    gross_margin = (gross_profit / revenue * 100) if revenue else 0
+    net_margin = (net_income / revenue * 100) if revenue else 0
+    cogs_pct = (cogs / revenue * 100) if revenue else 0
+    labor_pct = (payroll / revenue * 100) if revenue else 0
+    rent_pct = (rent / revenue * 100) if revenue else 0
+    food_cost_pct = (purchases / net_sales * 100) if net_sales else 0
+
+    metrics = {
+        "gross_profit": round(gross_profit, 2),
+        "gross_margin_pct": round(gross_margin, 1),
+        "net_margin_pct": round(net_margin, 1),
+        "cogs_pct": round(cogs_pct, 1),
+        "labor_cost_pct": round(labor_pct, 1),
+        "rent_pct": round(rent_pct, 1),
+        "food_cost_pct": round(food_cost_pct, 1),
+    }
+
+    if balance:
+        current_assets = balance["total_current_assets"]
+        current_liabilities = balance["total_current_liabilities"]
+        total_cash = balance["total_cash"]
+        total_liabilities = balance["total_liabilities"]
+        total_equity = balance["total_equity"]
+
+        metrics["current_ratio"] = (
+            round(current_assets / current_liabilities, 2)
+            if current_liabilities
+            else None
+        )
+        metrics["cash_ratio"] = (
+            round(total_cash / current_liabilities, 2) if current_liabilities else None
+        )
+        metrics["debt_to_equity"] = (
+            round(abs(total_liabilities / total_equity), 2) if total_equity else None
+        )
+        metrics["total_debt"] = total_liabilities
+
+    return metrics
+
+
+def _pct(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Percentage with 0 where the denominator is zero"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator != 0, numerator / denominator * 100, 0.0)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Ratio with NaN where the denominator is zero (reported as None)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
+
+
+def _rounded(values: np.ndarray, ndigits: int) -> list:
+    return [round(v, ndigits) for v in values.tolist()]
+
+
+def _rounded_or_none(values: np.ndarray, ndigits: int) -> list:
+    return [None if v != v else round(v, ndigits) for v in values.tolist()]
+
+
+# Metric -> decimal places, for the columns of metric_columns()
+INCOME_METRICS = {
+    "gross_profit": 2,
+    "gross_margin_pct": 1,
+    "net_margin_pct": 1,
+    "cogs_pct": 1,
+    "labor_cost_pct": 1,
+    "rent_pct": 1,
+    "food_cost_pct": 1,
+}
+BALANCE_METRICS = {"current_ratio": 2, "cash_ratio": 2, "debt_to_equity": 2, "total_debt": None}
+
+
+def metric_columns(
+    income: StatementTable, balance: StatementTable | None = None
+) -> dict[str, np.ndarray]:
+    """Unrounded metric values for every row; NaN where a ratio is undefined"""
+    revenue = income["total_revenue"]
+    cogs = income["total_cogs"]
+    gross_profit = revenue - cogs
+    columns = {
+        "gross_profit": gross_profit,
+        "gross_margin_pct": _pct(gross_profit, revenue),
+        "net_margin_pct": _pct(income["net_income"], revenue),
+        "cogs_pct": _pct(cogs, revenue),
+        "labor_cost_pct": _pct(income["total_payroll"], revenue),
+        "rent_pct": _pct(income["rent"], revenue),
+        "food_cost_pct": _pct(income["total_purchases"], income["net_sales"]),
+    }
+    if balance is not None:
+        current_liabilities = balance["total_current_liabilities"]
+        total_liabilities = balance["total_liabilities"]
+        columns.update({
+            "current_ratio": _ratio(balance["total_current_assets"], current_liabilities),
+            "cash_ratio": _ratio(balance["total_cash"], current_liabilities),
+            "debt_to_equity": np.abs(_ratio(total_liabilities, balance["total_equity"])),
+            "total_debt": total_liabilities,
+        })
+    return columns
+
+
+def calculate_metrics_batch(
+    income: StatementTable, balance: StatementTable | None = None
+) -> list[dict | None]:
+    """Calculate financial metrics for every row of the statement tables.
+
+    Returns one metrics dict per row, matching ``calculate_metrics``, or None
+    for rows without an income statement.
+    """
+    values = metric_columns(income, balance)
+    columns = {name: _rounded(values[name], ndigits) for name, ndigits in INCOME_METRICS.items()}
+
+    balance_columns = {}
+    if balance is not None:
+        balance_columns = {
+            name: values[name].tolist() if ndigits is None else _rounded_or_none(values[name], ndigits)
+            for name, ndigits in BALANCE_METRICS.items()
+        }
+        has_balance = balance.present.tolist()
+
+    results: list[dict | None] = []
+    for i, has_income in enumerate(income.present.tolist()):
+        if not has_income:
+            results.append(None)
+            continue
+        metrics = {key: values[i] for key, values in columns.items()}
+        if balance_columns and has_balance[i]:
+            metrics.update({key: values[i] for key, values in balance_columns.items()})
+        results.append(metrics)
+    return results
+
+
+def get_benchmark_status(value: float, benchmark: dict) -> str:
+    """Determine if a metric is good, warning, or concern"""
+    if benchmark["low"] <= value <= benchmark["high"]:
+        return "good"
+    elif value < benchmark["low"] * 0.8 or value > benchmark["high"] * 1.2:
+        return "concern"
+    return "warning"
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator, model_validator
 from datetime import date
 
 
@@ -111,3 +111,31 @@ class IncomeStatementPeriod(BaseModel):
 
     total_expenses: float = 0.0
     net_income: float = 0.0
+
+
+class LoanTerms(BaseModel):
+    """Repayment terms of a loan whose balance is a balance-sheet line item"""
+
+    loan: str
+    name: str
+    balance_field: str
+    annual_rate_pct: float = 0.0
+    # Fixed monthly payment, or None to pay off in level payments by maturity
+    monthly_payment: float | None = None
+    maturity: date | None = None
+
+    @field_validator("balance_field")
+    @classmethod
+    def _known_field(cls, value: str) -> str:
+        if value not in BalanceSheetPeriod.model_fields or value == "period_end":
+            raise ValueError(f"Unknown balance sheet line item {value}")
+        return value
+
+    @model_validator(mode="after")
+    def _repayment(self) -> "LoanTerms":
+        if self.monthly_payment is None and self.maturity is None:
+            raise ValueError(f"Loan {self.loan} needs a monthly_payment or a maturity")
+        if self.annual_rate_pct < 0 or (self.monthly_payment is not None and self.monthly_payment < 0):
+            raise ValueError(f"Loan {self.loan} has a negative rate or payment")
+        return self
+
@@ -0,0 +1,400 @@
+"""
+Response payload builders for the financial endpoints.
+
+Period-scoped builders take an already-resolved period (plus the store it
+came from, for previous-period lookups); whole-history builders take just the
+store. Each returns the JSON-ready dict served by the matching endpoint in
+``app.main``. Keeping them free of request handling lets the same payloads be
+cached and composed.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.accounts import DEFAULT_CHART, Chart, ChartRollup
+from app.diff import period_diffs
+from app.loans import debt_outlook
+from app.metrics import calculate_metrics, calculate_metrics_batch, get_benchmark_status
+from app.peers import PeerIndex
+from app.periods import Period, PeriodStore
+
+
+SUMMARY_CHANGES = ["income.total_revenue", "income.net_income", "balance.total_liabilities", "balance.total_cash"]
+
+
+def summary_payload(store: PeriodStore, current: Period) -> dict:
+    """High-level financial summary with year-over-year changes"""
+    current_income = current.income
+    current_balance = current.balance
+
+    # Get previous year for comparison (if available)
+    previous = store.previous(current)
+    has_previous = previous is not None
+
+    if has_previous:
+        # Calculate YoY changes
+        changes = period_diffs(store).pair(current.index, previous.index, SUMMARY_CHANGES)
+        revenue_change = changes["income.total_revenue"].change
+        revenue_change_pct = changes["income.total_revenue"].pct_change or 0
+        net_income_change = changes["income.net_income"].change
+        debt_change = changes["balance.total_liabilities"].change
+        cash_change = changes["balance.total_cash"].change
+    else:
+        revenue_change = 0
+        revenue_change_pct = 0
+        net_income_change = 0
+        debt_change = 0
+        cash_change = 0
+
+    return {
+        "business_name": store.name,
+        "current_period": current.label,
+        "previous_period": previous.label if has_previous else None,
+        "has_comparison": has_previous,
+        "current": {
+            "total_revenue": current_income["total_revenue"],
+            "net_income": current_income["net_income"],
+            "total_debt": current_balance["total_liabilities"],
+            "cash": current_balance["total_cash"],
+            "equity": current_balance["total_equity"],
+        },
+        "changes": {
+            "revenue": round(revenue_change, 2),
+            "revenue_pct": round(revenue_change_pct, 1),
+            "net_income": round(net_income_change, 2),
+            "debt": round(debt_change, 2),
+            "cash": round(cash_change, 2),
+        },
+    }
+
+
+def _income_label(dates: dict) -> str:
+    return f"FY {dates['period_start'].year}-{dates['period_end'].year}"
+
+
+def _balance_label(dates: dict) -> str:
+    return f"As at {dates['period_end'].strftime('%b %d, %Y')}"
+
+
+def income_statements_payload(store: PeriodStore) -> dict:
+    """Every income statement, most recent first"""
+    return {
+        "periods": [
+            {
+                "label": _income_label(stmt),
+                **stmt,
+                "period_start": stmt["period_start"].isoformat(),
+                "period_end": stmt["period_end"].isoformat(),
+            }
+            for stmt in store.income_statements()
+        ]
+    }
+
+
+def balance_sheets_payload(store: PeriodStore) -> dict:
+    """Every balance sheet, most recent first"""
+    return {
+        "periods": [
+            {
+                "label": _balance_label(sheet),
+                **sheet,
+                "period_end": sheet["period_end"].isoformat(),
+            }
+            for sheet in store.balance_sheets()
+        ]
+    }
+
+
+# Statement -> (PeriodStore table attribute, label for a row's dates)
+STATEMENT_TABLES = {
+    "income": ("income_table", _income_label),
+    "balance": ("balance_table", _balance_label),
+}
+
+
+def statement_page_payload(
+    store: PeriodStore,
+    statement: str,
+    fields: list[str] | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    cursor: date | None = None,
+    limit: int | None = None,
+) -> dict:
+    """Selected line items of statements ending within [start, end], most recent first.
+
+    Only the requested columns are read, over the requested rows. ``cursor``
+    is the ``period_end`` of the last row of the previous page: the page
+    holds up to ``limit`` statements ending before it, and ``next_cursor`` is
+    set when more remain. With every argument left out this matches the
+    whole-history payload.
+    """
+    table_attr, label = STATEMENT_TABLES[statement]
+    table = getattr(store, table_attr)
+    if cursor is not None:
+        before = cursor - timedelta(days=1)
+        end = min(end, before) if end else before
+    periods = store.between(start, end)
+    if not periods:
+        return {"periods": [], "next_cursor": None}
+
+    # between() is a contiguous run of rows
+    lo, hi = periods[0].index, periods[-1].index + 1
+    rows = np.flatnonzero(table.present[lo:hi]) + lo
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = store.periods[int(rows[-1])].period_end.isoformat()
+
+    names = table.fields if fields is None else fields
+    columns = [table[name][rows].tolist() for name in names]
+    result = []
+    for k, i in enumerate(rows.tolist()):
+        dates = {name: table.dates[name][i] for name in table.date_fields}
+        row = {"label": label(dates), **{name: day.isoformat() for name, day in dates.items()}}
+        row.update(zip(names, (column[k] for column in columns)))
+        result.append(row)
+    return {"periods": result, "next_cursor": next_cursor}
+
+
+def metrics_payload(store: PeriodStore, period: Period | None = None) -> dict:
+    """Calculated metrics for one period, or for every period when None"""
+    if period is not None:
+        metrics = calculate_metrics(period.income, period.balance)
+        metrics["period_label"] = period.label
+        return {"periods": [metrics]}
+
+    results = []
+    all_metrics = calculate_metrics_batch(store.income_table, store.balance_table)
+    for period, metrics in zip(store, all_metrics):
+        if metrics is None:
+            continue
+        metrics["period_label"] = period.label
+        results.append(metrics)
+    return {"periods": results}
+
+
+# The breakdown is the dashboard's fixed view of the built-in chart's expense
+# groups, whatever chart the drill-down endpoints are configured with
+BREAKDOWN_CHART = Chart(DEFAULT_CHART)
+
+# Payload key -> (chart group, payload key -> child account under the group)
+BREAKDOWN_GROUPS = {
+    "cogs": ("expenses/cogs", {"purchases": "purchases", "payroll": "payroll"}),
+    "ga": (
+        "expenses/ga",
+        {
+            "rent": "rent",
+            "interest_bank": "interest_bank_charges",
+            "amortization": "amortization",
+            "insurance": "insurance",
+            "accounting": "accounting_legal",
+            "advertising": "advertising",
+            "repairs": "repairs_maintenance",
+            "vehicle": "vehicle_expenses",
+            "telephone": "telephone",
+            "other": "other",
+        },
+    ),
+}
+
+
+def build_breakdown(rollup: ChartRollup, period: Period) -> dict:
+    """Group a period's expenses into COGS and G&A"""
+
+    def value(path: str) -> float:
+        return round(rollup.value(BREAKDOWN_CHART.get(path).index, period.index), 2)
+
+    total = value("expenses")
+    result = {}
+    for key, (group, children) in BREAKDOWN_GROUPS.items():
+        group_total = value(group)
+        result[key] = {
+            **{name: value(f"{group}/{child}") for name, child in children.items()},
+            "total": group_total,
+            "pct_of_total": round(group_total / total * 100, 1),
+        }
+    result["total_expenses"] = total
+    return result
+
+
+def expense_breakdown_payload(store: PeriodStore, current: Period) -> dict:
+    """Expense breakdown for a period and the one before it"""
+    previous = store.previous(current)
+    has_previous = previous is not None
+    rollup = ChartRollup(BREAKDOWN_CHART, store)
+
+    result = {
+        "current": {
+            "period": current.label,
+            **build_breakdown(rollup, current),
+        },
+        "has_comparison": has_previous,
+    }
+
+    if has_previous:
+        result["previous"] = {
+            "period": previous.label,
+            **build_breakdown(rollup, previous),
+        }
+
+    return result
+
+
+BENCHMARK_MAP = {
+    "gross_margin_pct": ("Gross Margin", "%"),
+    "net_margin_pct": ("Net Margin", "%"),
+    "labor_cost_pct": ("Labor Cost", "%"),
+    "rent_pct": ("Rent", "%"),
+    "food_cost_pct": ("Food Cost (COGS)", "%"),
+}
+
+
+def benchmarks_payload(
+    store: PeriodStore, period: Period, metrics: dict | None = None, peers: PeerIndex | None = None
+) -> dict:
+    """Compare a period's metrics against industry benchmarks (and a peer cohort, if given)"""
+    if metrics is None:
+        metrics = calculate_metrics(period.income, period.balance)
+
+    benchmarks = []
+
+    for key, (name, unit) in BENCHMARK_MAP.items():
+        if key in store.benchmarks and key in metrics:
+            bench = store.benchmarks[key]
+            value = metrics[key]
+            entry = {
+                "metric": name,
+                "unit": unit,
+                "your_value": value,
+                "industry_avg": bench["avg"],
+                "industry_low": bench["low"],
+                "industry_high": bench["high"],
+                "status": get_benchmark_status(value, bench),
+            }
+            if peers is not None:
+                entry["peers"] = peers.compare(key, value)
+            benchmarks.append(entry)
+
+    if peers is None:
+        return {"benchmarks": benchmarks}
+    return {"benchmarks": benchmarks, "peer_cohort": peers.describe()}
+
+
+# Balance sheet loan fields, reported whether or not the entity has entered loan terms
+DEBT_LOANS = {
+    "bdc_loan": "BDC Loan",
+    "cibc_loan": "CIBC Future Entrepreneur",
+    "shareholder_loan": "Shareholder Loan",
+}
+
+
+def loan_balances(store: PeriodStore, period: Period) -> list[float]:
+    """Each of the store's loans' balance at the period end (a consolidated store's from its members)"""
+    balances = []
+    for terms in store.loans:
+        member = store.members.get(terms.get("entity"))
+        if member is None:
+            balance = period.balance
+        else:
+            member_period = member.get_by_end(period.period_end)
+            balance = member_period.balance if member_period is not None else None
+        balances.append(balance[terms["balance_field"]] if balance else 0.0)
+    return balances
+
+
+def debt_progress_payload(store: PeriodStore, current_period: Period) -> dict:
+    """Debt paydown progress since the previous period, and the payoff outlook of loans with terms"""
+    previous_period = store.previous(current_period)
+    has_previous = previous_period is not None
+
+    current = current_period.balance
+    # One row per balance field (a consolidated store has one loan per member for it)
+    names = dict(DEBT_LOANS)
+    for terms in store.loans:
+        names.setdefault(terms["balance_field"], terms["name"])
+    fields = list(names)
+    changes = {}
+    if has_previous:
+        changes = period_diffs(store).pair(
+            current_period.index,
+            previous_period.index,
+            [*(f"balance.{field}" for field in fields), "balance.total_equity"],
+        )
+    outlook = debt_outlook(store.loans, loan_balances(store, current_period), current_period.period_end)
+
+    loans = [
+        {
+            "name": names[field],
+            "current": current[field],
+            "previous": changes[f"balance.{field}"].base if has_previous else 0,
+            "paid_down": -changes[f"balance.{field}"].change if has_previous else 0,
+            **outlook.get(field, {}),
+        }
+        for field in fields
+    ]
+
+    total_current = sum(loan["current"] for loan in loans)
+    total_previous = sum(loan["previous"] for loan in loans)
+
+    return {
+        "loans": loans,
+        "total_current": total_current,
+        "total_previous": total_previous,
+        "total_paid_down": total_previous - total_current,
+        "equity_current": current["total_equity"],
+        "equity_previous": changes["balance.total_equity"].base if has_previous else 0,
+        "equity_improvement": changes["balance.total_equity"].change if has_previous else 0,
+        "has_comparison": has_previous,
+    }
+
+
+def cash_flow_health_payload(store: PeriodStore, current: Period) -> dict:
+    """Cash flow and liquidity for a period"""
+    current_balance = current.balance
+    current_income = current.income
+
+    previous = store.previous(current)
+    has_previous = previous is not None
+    cash = period_diffs(store).pair(current.index, previous.index, ["balance.total_cash"]) if has_previous else {}
+
+    # Prefer actual interim (monthly/weekly) figures for the fiscal year when
+    # they exist; otherwise spread the annual statement evenly over 12 months
+    totals, months, basis = current_income, 12, "annual"
+    if store.interim is not None:
+        interim = store.interim.fiscal_year(current.period_end)
+        if interim["periods"]:
+            totals, months, basis = interim, interim["months"], "interim"
+
+    monthly_revenue = totals["total_revenue"] / months
+    monthly_expenses = totals["total_expenses"] / months
+    monthly_net = totals["net_income"] / months
+
+    cash_runway_months = (
+        current_balance["total_cash"] / monthly_expenses if monthly_expenses else 0
+    )
+
+    return {
+        "cash": {
+            "current": current_balance["total_cash"],
+            "previous": cash["balance.total_cash"].base if has_previous else 0,
+            "change": cash["balance.total_cash"].change if has_previous else 0,
+        },
+        "monthly_averages": {
+            "revenue": round(monthly_revenue, 2),
+            "expenses": round(monthly_expenses, 2),
+            "net_income": round(monthly_net, 2),
+            "basis": basis,
+            "months": months,
+        },
+        "liquidity": {
+            "current_ratio": round(
+                current_balance["total_current_assets"]
+                / current_balance["total_current_liabilities"],
+                2,
+            ),
+            "cash_runway_months": round(cash_runway_months, 1),
+        },
+        "has_comparison": has_previous,
+    }
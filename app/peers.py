@@ -0,0 +1,159 @@
+"""
+Peer benchmarking against a local dataset of other coffee shops.
+
+The peer file is a CSV with one row per shop: a ``region``, annual
+``revenue`` and any of the benchmarked ratios (``gross_margin_pct``,
+``net_margin_pct``, ``labor_cost_pct``, ``rent_pct``, ``food_cost_pct``), in
+the same units as ``app.metrics``. Blank cells are skipped for that metric.
+
+Each cohort (all peers, or peers narrowed to a region and/or revenue band)
+is indexed once: per metric, the cohort's values sorted ascending. A
+percentile rank is then two binary searches and the quartiles are direct
+reads. Cohort indexes are built on first use and kept for the life of the
+process.
+"""
+
+import csv
+import math
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+PEER_METRICS = ["gross_margin_pct", "net_margin_pct", "labor_cost_pct", "rent_pct", "food_cost_pct"]
+
+# Revenue band -> [low, high) annual revenue
+REVENUE_BANDS = {
+    "under-250k": (0, 250_000),
+    "250k-500k": (250_000, 500_000),
+    "500k-1m": (500_000, 1_000_000),
+    "over-1m": (1_000_000, math.inf),
+}
+
+
+class PeerDistribution:
+    """One metric's values across a cohort, sorted ascending"""
+
+    def __init__(self, values: np.ndarray):
+        self.values = np.sort(values[~np.isnan(values)])
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def percentile(self, value: float) -> float | None:
+        """Share of peers below ``value`` (ties count half), 0-100"""
+        n = len(self.values)
+        if not n:
+            return None
+        below = np.searchsorted(self.values, value, side="left")
+        at_or_below = np.searchsorted(self.values, value, side="right")
+        return round(float(below + at_or_below) / 2 / n * 100, 1)
+
+    def quantile(self, q: float) -> float | None:
+        """Linearly interpolated quantile, read straight from the sorted values"""
+        n = len(self.values)
+        if not n:
+            return None
+        position = q * (n - 1)
+        lo = int(position)
+        hi = min(lo + 1, n - 1)
+        return round(float(self.values[lo] + (self.values[hi] - self.values[lo]) * (position - lo)), 2)
+
+
+@dataclass(frozen=True)
+class PeerIndex:
+    """Sorted distributions of every metric for one cohort"""
+
+    region: str | None
+    revenue_band: str | None
+    count: int
+    distributions: dict[str, PeerDistribution]
+
+    def compare(self, metric: str, value: float) -> dict | None:
+        """Where ``value`` falls among the cohort, or None if no peer reports the metric"""
+        distribution = self.distributions.get(metric)
+        if distribution is None or not len(distribution):
+            return None
+        return {
+            "percentile": distribution.percentile(value),
+            "p25": distribution.quantile(0.25),
+            "median": distribution.quantile(0.5),
+            "p75": distribution.quantile(0.75),
+            "count": len(distribution),
+        }
+
+    def describe(self) -> dict:
+        return {"region": self.region, "revenue_band": self.revenue_band, "count": self.count}
+
+
+class PeerDataset:
+    """Peer shops as columns, with cohort indexes cached per (region, revenue band)"""
+
+    def __init__(self, regions: list[str], revenue: np.ndarray, metrics: dict[str, np.ndarray]):
+        self.regions = np.array(regions, dtype=object)
+        self.revenue = revenue
+        self.metrics = metrics
+        self._cohorts: dict[tuple[str | None, str | None], PeerIndex] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.revenue)
+
+    def region_names(self) -> list[str]:
+        return sorted(set(self.regions.tolist()))
+
+    def cohort(self, region: str | None = None, revenue_band: str | None = None) -> PeerIndex:
+        """Index of the peers in ``region`` and ``revenue_band`` (None = any).
+
+        Raises ValueError for a region with no peers or an unknown band.
+        """
+        key = (region, revenue_band)
+        with self._lock:
+            index = self._cohorts.get(key)
+        if index is not None:
+            return index
+
+        mask = np.ones(len(self), dtype=bool)
+        if region is not None:
+            mask &= self.regions == region
+            if not mask.any():
+                raise ValueError(f"No peers in region {region}")
+        if revenue_band is not None:
+            if revenue_band not in REVENUE_BANDS:
+                raise ValueError(f"Unknown revenue band {revenue_band}. Available: {', '.join(REVENUE_BANDS)}")
+            low, high = REVENUE_BANDS[revenue_band]
+            mask &= (self.revenue >= low) & (self.revenue < high)
+        index = PeerIndex(
+            region,
+            revenue_band,
+            int(mask.sum()),
+            {metric: PeerDistribution(values[mask]) for metric, values in self.metrics.items()},
+        )
+        with self._lock:
+            return self._cohorts.setdefault(key, index)
+
+
+def _number(cell: str | None) -> float:
+    return float(cell) if cell not in (None, "") else math.nan
+
+
+def load_peers(path: str | Path) -> PeerDataset:
+    """Peer dataset from a CSV file (see the module docstring for the columns)"""
+    regions, revenue = [], []
+    metrics = {metric: [] for metric in PEER_METRICS}
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = {"region", "revenue"} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"Peer file {path} is missing columns: {', '.join(sorted(missing))}")
+        for row in reader:
+            regions.append(row["region"].strip())
+            revenue.append(_number(row["revenue"]))
+            for metric, values in metrics.items():
+                values.append(_number(row.get(metric)))
+    return PeerDataset(
+        regions,
+        np.array(revenue, dtype=float),
+        {metric: np.array(values, dtype=float) for metric, values in metrics.items()},
+    )
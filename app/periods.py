@@ -0,0 +1,243 @@
+"""
+Indexed period store for financial statements.
+
+Income statements and balance sheets are joined on ``period_end`` and indexed
+once at load time, so fiscal-year lookups, previous-period lookups and
+date-range queries never scan the statement lists. Subtotals are reconciled in
+the same pass (see ``app.reconcile``).
+
+The index is built from the period-end array alone: ``Period`` objects are
+made on first access, and their statements are views of the columnar tables,
+so a store over a mapped snapshot costs a few vector operations to open.
+"""
+
+import copy
+import hashlib
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import date
+from functools import cached_property
+
+import numpy as np
+
+from app.models import BalanceSheetPeriod, IncomeStatementPeriod
+from app.reconcile import Reconciliation, reconcile
+from app.tables import DateColumn, StatementRow, StatementTable
+
+
+# Fiscal year runs October 1 to September 30
+FISCAL_YEAR_END_MONTH = 9
+
+
+def fiscal_year_end_year(day: date) -> int:
+    """Calendar year in which the fiscal year containing ``day`` ends"""
+    return day.year + 1 if day.month > FISCAL_YEAR_END_MONTH else day.year
+
+
+def fiscal_year_start(day: date) -> date:
+    """First day of the fiscal year containing ``day``"""
+    return date(fiscal_year_end_year(day) - 1, FISCAL_YEAR_END_MONTH + 1, 1)
+
+
+def get_fiscal_year_label(period_end: date) -> str:
+    """Get fiscal year label like 'FY24-25' from period end date (Sep 30)"""
+    # Fiscal year ends in September, so FY24-25 ends Sep 30, 2025. Interim
+    # periods ending Oct-Dec belong to the fiscal year ending the next year.
+    return _fiscal_year_label(fiscal_year_end_year(period_end))
+
+
+def _fiscal_year_label(end_year: int) -> str:
+    return f"FY{str(end_year - 1)[-2:]}-{str(end_year)[-2:]}"
+
+
+def _fiscal_year_end_years(days: np.ndarray) -> np.ndarray:
+    """``fiscal_year_end_year`` of every day in a ``datetime64[D]`` array"""
+    months = days.astype("datetime64[M]").astype(np.int64)
+    years, month_index = np.divmod(months, 12)
+    return years + 1970 + (month_index + 1 > FISCAL_YEAR_END_MONTH)
+
+
+def data_version(
+    *statement_lists: list[dict], benchmarks: dict | None = None, name: str | None = None
+) -> str:
+    """Content hash identifying a set of statements (plus benchmarks and name).
+
+    Identical data always produces the same version, in any process, so it is
+    safe to use in cache keys shared between workers.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for statements in statement_lists:
+        for stmt in sorted(statements, key=lambda s: s["period_end"]):
+            digest.update(repr(sorted(stmt.items())).encode())
+        digest.update(b"|")
+    if benchmarks:
+        digest.update(repr(sorted(benchmarks.items())).encode())
+    if name:
+        digest.update(name.encode())
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class Period:
+    """A reporting period with its income statement and balance sheet."""
+
+    index: int
+    label: str
+    period_end: date
+    income_table: StatementTable = field(repr=False, compare=False)
+    balance_table: StatementTable = field(repr=False, compare=False)
+
+    @cached_property
+    def income(self) -> StatementRow | None:
+        return self.income_table.view(self.index)
+
+    @cached_property
+    def balance(self) -> StatementRow | None:
+        return self.balance_table.view(self.index)
+
+
+class PeriodList(Sequence):
+    """A store's periods, most recent first, each made the first time it's read"""
+
+    def __init__(self, ends: DateColumn, end_years: np.ndarray, tables: tuple[StatementTable, StatementTable]):
+        self.ends = ends
+        self.end_years = end_years
+        self.tables = tables
+        self._made: list[Period | None] = [None] * len(ends)
+
+    def __len__(self) -> int:
+        return len(self._made)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self._made)))]
+        period = self._made[i]
+        if period is None:
+            i %= len(self._made)
+            period = self._made[i] = Period(
+                i, _fiscal_year_label(int(self.end_years[i])), self.ends[i], *self.tables
+            )
+        return period
+
+
+class PeriodStore:
+    """Periods ordered most recent first, indexed by label and period end."""
+
+    def __init__(
+        self,
+        income_statements: list[dict],
+        balance_sheets: list[dict],
+        benchmarks: dict[str, dict] | None = None,
+        name: str | None = None,
+    ):
+        self.benchmarks = benchmarks or {}
+        self.name = name
+        # Interim-period rollup and loan terms for this entity, attached to a copy by the Dataset
+        self.interim = None
+        self.loans: list[dict] = []
+        # Member stores of a consolidated store, by entity
+        self.members: dict[str, PeriodStore] = {}
+        self.version = data_version(
+            income_statements, balance_sheets, benchmarks=benchmarks, name=name
+        )
+
+        income_by_end = {stmt["period_end"]: stmt for stmt in income_statements}
+        balance_by_end = {sheet["period_end"]: sheet for sheet in balance_sheets}
+        ends = sorted(income_by_end.keys() | balance_by_end.keys(), reverse=True)
+
+        # Columnar views, row i is self.periods[i]
+        self.income_table = StatementTable(IncomeStatementPeriod, [income_by_end.get(end) for end in ends])
+        self.balance_table = StatementTable(BalanceSheetPeriod, [balance_by_end.get(end) for end in ends])
+        self._index(DateColumn.of(ends))
+
+    @classmethod
+    def from_tables(
+        cls,
+        ends: Sequence[date],
+        income_table: StatementTable,
+        balance_table: StatementTable,
+        benchmarks: dict[str, dict] | None,
+        name: str | None,
+        version: str,
+        reconciliation: Reconciliation | None = None,
+    ) -> "PeriodStore":
+        """Store over prebuilt tables whose row i ends on ``ends[i]`` (most recent first).
+
+        Used to load snapshots and build consolidations: the tables may be
+        views of mapped memory, ``version`` is taken as given rather than
+        re-hashed, and a ``reconciliation`` saved with the tables is reused.
+        """
+        store = cls.__new__(cls)
+        store.benchmarks = benchmarks or {}
+        store.name = name
+        store.interim = None
+        store.loans = []
+        store.members = {}
+        store.version = version
+        store.income_table = income_table
+        store.balance_table = balance_table
+        store._index(DateColumn.of(ends), reconciliation)
+        return store
+
+    def _index(self, ends: DateColumn, reconciliation: Reconciliation | None = None) -> None:
+        # Subtotals verified once, up front
+        self.reconciliation = reconciliation or reconcile(self.income_table, self.balance_table, ends)
+
+        self.ends = ends
+        end_years = _fiscal_year_end_years(ends.days)
+        self.periods = PeriodList(ends, end_years, (self.income_table, self.balance_table))
+        # First period wins so a label always resolves to its latest period end
+        years, first = np.unique(end_years, return_index=True)
+        self.by_label: dict[str, int] = {_fiscal_year_label(int(y)): int(i) for y, i in zip(years, first)}
+        # Ascending period ends for binary-search lookups and range queries
+        self._ascending_ends = ends.days[::-1]
+
+    def attach(self, interim=None, loans: list[dict] | None = None) -> "PeriodStore":
+        """A copy of this store, sharing its tables and index, with an entity's interim rollup and loans"""
+        store = copy.copy(self)
+        store.interim = interim
+        store.loans = loans or []
+        return store
+
+    def __len__(self) -> int:
+        return len(self.periods)
+
+    def __iter__(self):
+        return iter(self.periods)
+
+    @property
+    def latest(self) -> Period | None:
+        return self.periods[0] if self.periods else None
+
+    def get(self, label: str) -> Period | None:
+        """Find a period by fiscal year label"""
+        i = self.by_label.get(label)
+        return self.periods[i] if i is not None else None
+
+    def get_by_end(self, period_end: date) -> Period | None:
+        """Find a period by its period end date"""
+        ends = self._ascending_ends
+        day = np.datetime64(period_end, "D")
+        i = int(np.searchsorted(ends, day))
+        if i == len(ends) or ends[i] != day:
+            return None
+        return self.periods[len(ends) - 1 - i]
+
+    def previous(self, period: Period) -> Period | None:
+        """Get the period immediately before the given one, if any"""
+        idx = period.index + 1
+        return self.periods[idx] if idx < len(self.periods) else None
+
+    def between(self, start: date | None = None, end: date | None = None) -> list[Period]:
+        """Get periods ending within [start, end], most recent first"""
+        ends = self._ascending_ends
+        lo = int(np.searchsorted(ends, np.datetime64(start, "D"), side="left")) if start else 0
+        hi = int(np.searchsorted(ends, np.datetime64(end, "D"), side="right")) if end else len(ends)
+        n = len(ends)
+        return self.periods[n - hi:n - lo]
+
+    def income_statements(self) -> list[dict]:
+        return [p.income for p in self.periods if p.income is not None]
+
+    def balance_sheets(self) -> list[dict]:
+        return [p.balance for p in self.periods if p.balance is not None]
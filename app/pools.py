@@ -0,0 +1,43 @@
+"""
+Executors that are safe to create before the production server forks.
+
+``app.main`` is imported by the supervisor before it forks its workers, so
+anything created at import time is inherited by every worker. A thread or
+process pool doesn't survive that: its worker threads, manager thread and
+queues belong to the parent. ``ProcessLocalExecutor`` therefore builds the
+real executor on first use in each process.
+"""
+
+import os
+import threading
+from concurrent.futures import Executor, Future
+from typing import Callable
+
+
+class ProcessLocalExecutor(Executor):
+    """Executor built by ``factory`` on first use in each process"""
+
+    def __init__(self, factory: Callable[[], Executor]):
+        self.factory = factory
+        self._executor: Executor | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+
+    def _current(self) -> Executor:
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    # An inherited executor is the parent's; leave it alone
+                    self._executor = self.factory()
+                    self._pid = pid
+        return self._executor
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        return self._current().submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """Shut down this process's executor, if it has started one"""
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+            self._executor = self._pid = None
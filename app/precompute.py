@@ -0,0 +1,196 @@
+"""
+Background recomputation of derived payloads, with stale-while-revalidate.
+
+``Precomputer`` runs as an asyncio task for the life of the app (started
+from the FastAPI lifespan). Every ``interval`` seconds it checks the data
+version (first following the ledger, so writes by other processes are picked
+up without waiting for a request). When the version has changed, it runs
+every precompute job in a worker thread. Each job fills one cache entry for
+the new version.
+
+While it runs, handlers answer from the previous version's results
+(``VersionedCache.get_or_stale``) instead of computing inline, and queue the
+entry they served stale with ``revalidate`` so entries outside the job list
+are refreshed too. Each request records the oldest result it served in a
+``Freshness``, which the HTTP layer turns into data-version and age headers.
+
+A job list that is superseded by newer data partway through is abandoned,
+and the next tick starts over on the newer version. Jobs store their results
+through the caches, which discard anything computed for superseded data.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Hashable
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger("uvicorn.error")
+
+
+@dataclass
+class Freshness:
+    """Data version and computation time of the oldest result served to a request"""
+
+    current: str
+    version: str | None = None
+    computed_at: float | None = None
+
+    @property
+    def stale(self) -> bool:
+        return self.version is not None and self.version != self.current
+
+    @property
+    def age(self) -> float | None:
+        return None if self.computed_at is None else max(time.time() - self.computed_at, 0.0)
+
+    def note(self, version: str, computed_at: float) -> None:
+        # Results from older versions were all computed before any current one
+        if self.computed_at is None or computed_at < self.computed_at:
+            self.version, self.computed_at = version, computed_at
+
+
+_freshness: ContextVar[Freshness | None] = ContextVar("freshness", default=None)
+
+
+def track_freshness(current_version: str) -> Freshness:
+    """Begin recording the results served to the current request (call from middleware)"""
+    freshness = Freshness(current_version)
+    _freshness.set(freshness)
+    return freshness
+
+
+def note_served(version: str, computed_at: float) -> None:
+    """Record a result served to the current request; outside a request this is a no-op"""
+    freshness = _freshness.get()
+    if freshness is not None:
+        freshness.note(version, computed_at)
+
+
+class Precomputer:
+    """Recomputes every job whenever ``version()`` changes.
+
+    ``jobs()`` returns the data version it was built for and the callables
+    that compute (and cache) that version's payloads.
+    """
+
+    def __init__(
+        self,
+        version: Callable[[], str],
+        jobs: Callable[[], tuple[str, list[Callable[[], object]]]],
+        refresh: Callable[[], object] | None = None,
+        interval: float = 0.5,
+        refresh_interval: float = 2.0,
+    ):
+        self.version = version
+        self.jobs = jobs
+        self.refresh = refresh
+        self.interval = interval
+        self.refresh_interval = refresh_interval
+        self.completed_version: str | None = None
+        self.completed_at: float | None = None
+        self.last_duration: float | None = None
+        self.runs = 0
+        self.abandoned = 0
+        self.errors = 0
+        self._refreshed_at = 0.0
+        self._task: asyncio.Task | None = None
+        self._pending: dict[Hashable, Callable[[], object]] = {}
+        self._pending_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="precompute")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                now = time.monotonic()
+                due = self.refresh_interval and now - self._refreshed_at >= self.refresh_interval
+                if self.refresh is not None and due:
+                    self._refreshed_at = now
+                    await run_in_threadpool(self.refresh)
+                if self.version() != self.completed_version:
+                    await run_in_threadpool(self.recompute)
+                if self._pending:
+                    await run_in_threadpool(self._revalidate_pending)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Background precompute failed")
+            await asyncio.sleep(self.interval)
+
+    def recompute(self) -> bool:
+        """Run every job for the current version; False if newer data arrived first.
+
+        The version is checked after each job: once it has moved on, that
+        job's result was for superseded data (the cache didn't keep it) and
+        the rest are skipped.
+        """
+        start = time.perf_counter()
+        version, jobs = self.jobs()
+        for job in jobs:
+            try:
+                job()
+            except Exception:
+                # e.g. a payload that can't be built for this data; requests report it
+                self.errors += 1
+                logger.debug("Precompute job failed", exc_info=True)
+            if self.version() != version:
+                self.abandoned += 1
+                return False
+        if self.version() != version:
+            self.abandoned += 1
+            return False
+        self.completed_version = version
+        self.completed_at = time.time()
+        self.last_duration = time.perf_counter() - start
+        self.runs += 1
+        return True
+
+    def revalidate(self, key: Hashable, job: Callable[[], object]) -> None:
+        """Queue ``job`` to refresh one stale entry on the next tick (once per key)"""
+        with self._pending_lock:
+            self._pending.setdefault(key, job)
+
+    def _revalidate_pending(self) -> None:
+        with self._pending_lock:
+            jobs = list(self._pending.values())
+            self._pending.clear()
+        for job in jobs:
+            try:
+                job()
+            except Exception:
+                self.errors += 1
+                logger.debug("Revalidation failed", exc_info=True)
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "pending_revalidations": len(self._pending),
+            "completed_version": self.completed_version,
+            "completed_age_seconds": (
+                None if self.completed_at is None else round(time.time() - self.completed_at, 1)
+            ),
+            "last_duration_seconds": None if self.last_duration is None else round(self.last_duration, 3),
+            "runs": self.runs,
+            "abandoned": self.abandoned,
+            "errors": self.errors,
+        }
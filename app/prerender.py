@@ -0,0 +1,76 @@
+"""
+Pre-serialized response bodies.
+
+Large, rarely-changing payloads are serialized to JSON once per data version
+(and the dashboard HTML once per process) and compressed up front, so serving
+them is a cache lookup plus picking the variant the client accepts.
+"""
+
+import gzip
+import json
+from dataclasses import dataclass, field
+
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+@dataclass(frozen=True)
+class PrerenderedBody:
+    """A response body with its precompressed variants, keyed by encoding"""
+
+    identity: bytes
+    encoded: dict[str, bytes] = field(default_factory=dict)
+    media_type: str = "application/json"
+
+    def response(self, accept_encoding: str | None, headers: dict | None = None) -> Response:
+        """Raw-bytes response using the best encoding the client accepts"""
+        encoding = choose_encoding(accept_encoding, self.encoded)
+        response_headers = {"Vary": "Accept-Encoding", **(headers or {})}
+        if encoding:
+            response_headers["Content-Encoding"] = encoding
+            body = self.encoded[encoding]
+        else:
+            body = self.identity
+        return Response(content=body, media_type=self.media_type, headers=response_headers)
+
+
+def choose_encoding(accept_encoding: str | None, available: dict[str, bytes]) -> str | None:
+    """Pick br, then gzip, from an Accept-Encoding header; None for identity"""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    for encoding in ("br", "gzip"):
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+def compress(body: bytes) -> dict[str, bytes]:
+    """Compress a body with every available encoding, at maximum level"""
+    encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded["br"] = brotli.compress(body, quality=11)
+    return encoded
+
+
+def render_json(payload) -> PrerenderedBody:
+    """Serialize a JSON-ready payload the same way FastAPI's JSONResponse does"""
+    body = json.dumps(
+        payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+    return PrerenderedBody(identity=body, encoded=compress(body))
+
+
+def render_html(html: str) -> PrerenderedBody:
+    """Encode and precompress a rendered HTML page"""
+    body = html.encode("utf-8")
+    return PrerenderedBody(identity=body, encoded=compress(body), media_type="text/html; charset=utf-8")
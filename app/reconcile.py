@@ -0,0 +1,238 @@
+"""
+Ingest-time reconciliation of statement subtotals.
+
+Subtotals such as ``total_cash``, ``total_cogs`` and ``net_income`` are
+entered by hand alongside their components. When a ``PeriodStore`` is built,
+every subtotal is recomputed from its components across all periods at once
+(one NumPy expression per check over the columnar tables). Stated values that
+differ by more than a tolerance are reported, not corrected.
+
+Imports that leave subtotals out get them filled in with ``fill_subtotals``.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+from app.tables import StatementTable
+
+TOLERANCE = 0.01
+
+
+@dataclass(frozen=True)
+class Check:
+    """``total`` should equal ``sum(add) - sum(subtract)``.
+
+    Terms are ``"statement.field"`` with statement ``income`` or ``balance``.
+    """
+
+    total: str
+    add: tuple[str, ...]
+    subtract: tuple[str, ...] = ()
+    name: str | None = None
+
+    @property
+    def label(self) -> str:
+        return self.name or self.total
+
+
+def _income(*names: str) -> tuple[str, ...]:
+    return tuple(f"income.{name}" for name in names)
+
+
+def _balance(*names: str) -> tuple[str, ...]:
+    return tuple(f"balance.{name}" for name in names)
+
+
+# Subtotals in dependency order, so filling them in top to bottom works
+INCOME_SUBTOTALS = [
+    Check(
+        "income.net_sales",
+        _income(
+            "food_beverage_sales",
+            "tips",
+            "non_taxable_grocery",
+            "liquor_sales",
+            "consignment_sales",
+            "gift_card_sales",
+        ),
+    ),
+    Check("income.total_other_revenue", _income("grants", "interest_revenue")),
+    Check("income.total_revenue", _income("net_sales", "total_other_revenue")),
+    Check(
+        "income.total_purchases",
+        _income(
+            "inventory_beginning",
+            "delivery_services",
+            "freight_expense",
+            "food_beverage_purchases",
+            "liquor_purchases",
+            "kitchen_supplies",
+            "consignment_purchases",
+            "inventory_end",
+        ),
+    ),
+    Check("income.total_payroll", _income("wages_salaries", "ei_expense", "cpp_expense", "wsib_expense")),
+    Check("income.total_cogs", _income("small_tools_supplies", "total_purchases", "total_payroll")),
+    Check(
+        "income.total_ga_expenses",
+        _income(
+            "accounting_legal",
+            "advertising",
+            "business_fees",
+            "amortization",
+            "insurance",
+            "interest_bank_charges",
+            "office_supplies",
+            "vehicle_expenses",
+            "rent",
+            "repairs_maintenance",
+            "telephone",
+            "travel_entertainment",
+            "utilities",
+            "cleaning_supplies",
+            "licensing",
+        ),
+    ),
+    Check("income.total_expenses", _income("total_cogs", "total_ga_expenses")),
+    Check("income.net_income", _income("total_revenue"), _income("total_expenses")),
+]
+
+BALANCE_SUBTOTALS = [
+    Check("balance.total_cash", _balance("cash_on_hand", "savings_account", "chequing_account")),
+    Check("balance.total_current_assets", _balance("total_cash", "inventory")),
+    Check("balance.net_leasehold", _balance("leasehold_improvements", "leasehold_amortization")),
+    Check("balance.net_furniture", _balance("furniture_equipment", "furniture_amortization")),
+    Check("balance.total_capital_assets", _balance("net_leasehold", "net_furniture")),
+    Check("balance.total_assets", _balance("total_current_assets", "total_capital_assets")),
+    Check("balance.gst_hst_remittances", _balance("gst_hst_collected", "gst_hst_paid")),
+    Check(
+        "balance.total_current_liabilities",
+        _balance("accounts_payable", "ei_payable", "cpp_payable", "wsib_payable", "gst_hst_remittances"),
+    ),
+    Check("balance.total_long_term_liabilities", _balance("bdc_loan", "cibc_loan", "shareholder_loan")),
+    Check(
+        "balance.total_liabilities",
+        _balance("total_current_liabilities", "total_long_term_liabilities"),
+    ),
+    Check(
+        "balance.total_retained_earnings",
+        _balance("retained_earnings_previous", "current_earnings"),
+    ),
+    Check("balance.total_equity", _balance("share_capital", "total_retained_earnings")),
+]
+
+# Identities that aren't subtotals of a single statement
+IDENTITIES = [
+    Check(
+        "balance.total_assets",
+        _balance("total_liabilities", "total_equity"),
+        name="assets_equal_liabilities_plus_equity",
+    ),
+    Check("balance.current_earnings", _income("net_income"), name="current_earnings_equal_net_income"),
+]
+
+CHECKS = [*INCOME_SUBTOTALS, *BALANCE_SUBTOTALS, *IDENTITIES]
+
+def _sum(columns: dict[str, np.ndarray], terms: tuple[str, ...], size: int) -> np.ndarray:
+    # Added left to right so results match Python's sum of the same items
+    total = np.zeros(size)
+    for term in terms:
+        total = total + columns[term]
+    return total
+
+
+@dataclass
+class Reconciliation:
+    """Outcome of reconciling a store: how many checks ran and which failed"""
+
+    checks: int
+    mismatches: list[dict]
+    tolerance: float = TOLERANCE
+
+    def to_dict(self) -> dict:
+        return {
+            "checks": self.checks,
+            "tolerance": self.tolerance,
+            "mismatch_count": len(self.mismatches),
+            "mismatches": self.mismatches,
+        }
+
+
+def reconcile(
+    income_table: StatementTable,
+    balance_table: StatementTable,
+    period_ends: Sequence[date],
+    tolerance: float = TOLERANCE,
+) -> Reconciliation:
+    """Verify every subtotal and identity for all rows of two aligned tables"""
+    size = len(period_ends)
+    columns = {
+        **{f"income.{name}": values for name, values in income_table.columns.items()},
+        **{f"balance.{name}": values for name, values in balance_table.columns.items()},
+    }
+
+    mismatches = []
+    checks = 0
+    for check in CHECKS:
+        stated = columns[check.total]
+        computed = _sum(columns, check.add, size) - _sum(columns, check.subtract, size)
+        difference = stated - computed
+        # Rows missing either statement are NaN and never compare as mismatches
+        checked = ~np.isnan(difference)
+        checks += int(checked.sum())
+        for i in np.flatnonzero(checked & (np.abs(difference) > tolerance)).tolist():
+            mismatches.append(
+                {
+                    "check": check.label,
+                    "period_end": period_ends[i].isoformat(),
+                    "stated": round(float(stated[i]), 2),
+                    "computed": round(float(computed[i]), 2),
+                    "difference": round(float(difference[i]), 2),
+                }
+            )
+    return Reconciliation(checks, mismatches, tolerance)
+
+
+def _field(term: str) -> str:
+    return term.split(".", 1)[1]
+
+
+# (subtotal, added fields, subtracted fields) per statement, for fill_subtotals
+_FILL_ORDER = {
+    statement: [
+        (_field(check.total), [_field(t) for t in check.add], [_field(t) for t in check.subtract])
+        for check in subtotals
+    ]
+    for statement, subtotals in (("income", INCOME_SUBTOTALS), ("balance", BALANCE_SUBTOTALS))
+}
+
+
+def fill_subtotals(row: dict, statement: str) -> dict:
+    """Compute subtotals missing from a statement dict, in place"""
+    for name, add, subtract in _FILL_ORDER[statement]:
+        if name in row:
+            continue
+        value = sum(row.get(term, 0.0) for term in add)
+        value -= sum(row.get(term, 0.0) for term in subtract)
+        row[name] = round(value, 2)
+    return row
+
+
+def fill_subtotal_columns(columns: dict[str, np.ndarray], statement: str) -> dict[str, np.ndarray]:
+    """``fill_subtotals`` for whole columns at once"""
+    for name, add, subtract in _FILL_ORDER[statement]:
+        if name in columns:
+            continue
+        size = len(next(iter(columns.values())))
+        value = np.zeros(size)
+        for term in add:
+            if term in columns:
+                value = value + columns[term]
+        for term in subtract:
+            if term in columns:
+                value = value - columns[term]
+        columns[name] = np.round(value, 2)
+    return columns
@@ -0,0 +1,181 @@
+"""
+Incremental rollups over interim (monthly or weekly) income statements.
+
+Interim periods for an entity are kept in period-end order together with a
+running prefix sum per line item, so the total over any contiguous run of
+periods is ``prefix[hi] - prefix[lo]``. Year-to-date, trailing-twelve-month
+and fiscal-year totals are a bisect plus one vector subtraction, and adding
+the next period extends the prefix sums in O(line items).
+
+An entity should report interim periods at a single granularity; periods are
+keyed by period end.
+"""
+
+import hashlib
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.models import IncomeStatementPeriod
+from app.periods import fiscal_year_start, get_fiscal_year_label
+from app.tables import line_item_fields
+
+INCOME_FIELDS = line_item_fields(IncomeStatementPeriod)
+
+# Opening/closing inventory are balances, not flows: a run of periods takes
+# its first period's opening and its last period's closing value.
+OPENING_FIELDS = ("inventory_beginning",)
+CLOSING_FIELDS = ("inventory_end",)
+
+DAYS_PER_MONTH = 365.25 / 12
+
+
+def one_year_before(day: date) -> date:
+    try:
+        return day.replace(year=day.year - 1)
+    except ValueError:  # Feb 29
+        return day.replace(year=day.year - 1, day=28)
+
+
+class InterimRollup:
+    """Interim income statements for one entity with per-line-item prefix sums."""
+
+    def __init__(self, rows: list[dict] = ()):
+        self.fields = INCOME_FIELDS
+        self._field_index = {name: i for i, name in enumerate(self.fields)}
+        self._starts: list[date] = []
+        self._ends: list[date] = []
+        self._rows = np.zeros((0, len(self.fields)))
+        self._prefix = np.zeros((1, len(self.fields)))
+        self._size = 0
+        self._version: str | None = None
+        for row in sorted(rows, key=lambda r: r["period_end"]):
+            self.add(row)
+
+    @classmethod
+    def from_arrays(cls, starts: list[date], ends: list[date], rows: np.ndarray, version: str) -> "InterimRollup":
+        """Rollup over periods already sorted by end, with rows in ``INCOME_FIELDS`` order"""
+        rollup = cls()
+        rollup._starts = list(starts)
+        rollup._ends = list(ends)
+        rollup._size = len(ends)
+        rollup._rows = np.array(rows, dtype=np.float64)
+        rollup._prefix = np.zeros((rollup._size + 1, len(rollup.fields)))
+        np.cumsum(rollup._rows, axis=0, out=rollup._prefix[1:])
+        rollup._version = version
+        return rollup
+
+    def copy(self) -> "InterimRollup":
+        """An independent rollup over the same periods (``add`` on it leaves this one unchanged)"""
+        rollup = InterimRollup()
+        rollup._starts = list(self._starts)
+        rollup._ends = list(self._ends)
+        rollup._rows = self._rows.copy()
+        rollup._prefix = self._prefix.copy()
+        rollup._size = self._size
+        rollup._version = self._version
+        return rollup
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def version(self) -> str:
+        """Hash of the periods and their line items, however and in whatever order they were added"""
+        if self._version is None:
+            digest = hashlib.blake2b(digest_size=8)
+            digest.update("|".join(f"{start}/{end}" for start, end in zip(self._starts, self._ends)).encode())
+            digest.update(self._rows[: self._size].tobytes())
+            self._version = digest.hexdigest()
+        return self._version
+
+    def arrays(self) -> tuple[list[date], list[date], np.ndarray]:
+        """(period starts, period ends, line item rows) in period-end order"""
+        return self._starts, self._ends, self._rows[: self._size]
+
+    @property
+    def latest_end(self) -> date | None:
+        return self._ends[-1] if self._ends else None
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._rows)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 16)
+        rows = np.zeros((capacity, len(self.fields)))
+        rows[: self._size] = self._rows[: self._size]
+        prefix = np.zeros((capacity + 1, len(self.fields)))
+        prefix[: self._size + 1] = self._prefix[: self._size + 1]
+        self._rows, self._prefix = rows, prefix
+
+    def add(self, row: dict) -> None:
+        """Add or replace one interim period.
+
+        Appending after the latest period updates the prefix sums in
+        O(line items); backfilling or restating an earlier period recomputes
+        the prefix sums from that period on.
+        """
+        values = np.fromiter(
+            (float(row.get(name, 0.0)) for name in self.fields), dtype=np.float64, count=len(self.fields)
+        )
+        end = row["period_end"]
+        i = bisect_left(self._ends, end)
+        n = self._size
+
+        if i < n and self._ends[i] == end:
+            self._starts[i] = row["period_start"]
+            self._rows[i] = values
+        else:
+            self._reserve(n + 1)
+            if i < n:
+                self._rows[i + 1 : n + 1] = self._rows[i:n].copy()
+            self._rows[i] = values
+            self._starts.insert(i, row["period_start"])
+            self._ends.insert(i, end)
+            self._size = n = n + 1
+
+        if i == n - 1:
+            self._prefix[n] = self._prefix[n - 1] + values
+        else:
+            self._prefix[i + 1 : n + 1] = self._prefix[i] + np.cumsum(self._rows[i:n], axis=0)
+
+        self._version = None
+
+    def _total(self, lo: int, hi: int) -> dict:
+        """Totals over periods [lo, hi)"""
+        if hi <= lo:
+            return {"periods": 0, "months": 0.0}
+        sums = self._prefix[hi] - self._prefix[lo]
+        totals = {name: round(value, 2) for name, value in zip(self.fields, sums.tolist())}
+        for name in OPENING_FIELDS:
+            totals[name] = float(self._rows[lo, self._field_index[name]])
+        for name in CLOSING_FIELDS:
+            totals[name] = float(self._rows[hi - 1, self._field_index[name]])
+        start, end = self._starts[lo], self._ends[hi - 1]
+        return {
+            "period_start": start.isoformat(),
+            "period_end": end.isoformat(),
+            "periods": hi - lo,
+            "months": round(((end - start).days + 1) / DAYS_PER_MONTH, 1),
+            **totals,
+        }
+
+    def between(self, start: date, end: date) -> dict:
+        """Totals over periods ending within [start, end]"""
+        return self._total(bisect_left(self._ends, start), bisect_right(self._ends, end))
+
+    def year_to_date(self, as_of: date) -> dict:
+        """Fiscal year-to-date totals through ``as_of``"""
+        return {
+            "fiscal_year": get_fiscal_year_label(as_of),
+            **self.between(fiscal_year_start(as_of), as_of),
+        }
+
+    def trailing_twelve_months(self, as_of: date) -> dict:
+        """Totals over periods ending in the twelve months up to ``as_of``"""
+        return self.between(one_year_before(as_of) + timedelta(days=1), as_of)
+
+    def fiscal_year(self, period_end: date) -> dict:
+        """Totals for the fiscal year ending on ``period_end``, so far"""
+        return self.year_to_date(period_end)
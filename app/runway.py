@@ -0,0 +1,210 @@
+"""
+Monte Carlo cash runway.
+
+The deterministic runway in the cash flow payload divides cash by average
+monthly expenses. This module instead simulates many months-ahead paths.
+Each month's revenue and expenses are drawn from normal distributions fitted
+to the entity's history (clipped at zero), and the runway is the first month
+the running cash balance reaches zero.
+
+History comes from interim statements up to the period end when there are at
+least ``MIN_INTERIM_SAMPLES`` of them, each scaled to a monthly amount.
+Otherwise it comes from the annual statements' monthly averages, whose spread
+understates month-to-month variance; a scenario can set ``volatility``
+instead.
+
+Paths are simulated in chunks, each seeded from the scenario's seed, so a
+scenario always gives the same result however the chunks are spread across
+processes. Chunks run inline or on an executor against a deadline.
+"""
+
+import time
+from concurrent.futures import Executor, wait
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from app.periods import Period, PeriodStore
+from app.rollups import DAYS_PER_MONTH
+
+MIN_INTERIM_SAMPLES = 3
+
+# Paths per vectorized batch inside a chunk, bounding memory to a few MB per array
+BATCH_PATHS = 2000
+
+
+@dataclass(frozen=True)
+class RunwayScenario:
+    paths: int = 10000
+    horizon_months: int = 60
+    # Shift to average monthly revenue / expenses, in percent
+    revenue_shift_pct: float = 0.0
+    expense_shift_pct: float = 0.0
+    # Monthly standard deviation as a fraction of the mean; None = from history
+    volatility: float | None = None
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class CashFlowModel:
+    starting_cash: float
+    revenue_mean: float
+    revenue_std: float
+    expense_mean: float
+    expense_std: float
+    basis: str
+    samples: int
+
+
+class IncompleteSimulation(Exception):
+    """Raised when the deadline passed before every chunk finished; ``result`` has the partial summary"""
+
+    def __init__(self, result: dict):
+        super().__init__(f"Simulated {result['paths']} of {result['requested_paths']} paths")
+        self.result = result
+
+
+def _monthly_history(store: PeriodStore, period: Period) -> tuple[np.ndarray, np.ndarray, str]:
+    """(monthly revenue, monthly expenses, basis) observed up to the period end"""
+    if store.interim is not None and len(store.interim):
+        starts, ends, rows = store.interim.arrays()
+        count = sum(1 for end in ends if end <= period.period_end)
+        if count >= MIN_INTERIM_SAMPLES:
+            months = np.array([((end - start).days + 1) / DAYS_PER_MONTH for start, end in zip(starts, ends)])
+            fields = store.interim.fields
+            revenue = rows[:count, fields.index("total_revenue")] / months[:count]
+            expenses = rows[:count, fields.index("total_expenses")] / months[:count]
+            return revenue, expenses, "interim"
+    # Annual statements, oldest through the period, as monthly averages
+    revenue = store.income_table["total_revenue"][period.index :] / 12
+    expenses = store.income_table["total_expenses"][period.index :] / 12
+    present = ~(np.isnan(revenue) | np.isnan(expenses))
+    return revenue[present], expenses[present], "annual"
+
+
+def cash_flow_model(store: PeriodStore, period: Period, volatility: float | None = None) -> CashFlowModel:
+    """Monthly revenue and expense distributions for simulating from ``period``'s cash"""
+    revenue, expenses, basis = _monthly_history(store, period)
+    if basis == "annual":
+        # Centre on the period itself, as the deterministic runway does
+        revenue_mean = period.income["total_revenue"] / 12
+        expense_mean = period.income["total_expenses"] / 12
+    else:
+        revenue_mean, expense_mean = float(revenue.mean()), float(expenses.mean())
+    if volatility is not None:
+        revenue_std, expense_std = abs(revenue_mean) * volatility, abs(expense_mean) * volatility
+    elif len(revenue) >= 2:
+        revenue_std, expense_std = float(revenue.std(ddof=1)), float(expenses.std(ddof=1))
+    else:
+        revenue_std = expense_std = 0.0
+    return CashFlowModel(
+        starting_cash=float(period.balance["total_cash"]),
+        revenue_mean=revenue_mean,
+        revenue_std=revenue_std,
+        expense_mean=expense_mean,
+        expense_std=expense_std,
+        basis=basis,
+        samples=len(revenue),
+    )
+
+
+def simulate_paths(
+    model: CashFlowModel,
+    scenario: RunwayScenario,
+    paths: int,
+    seed: np.random.SeedSequence,
+    deadline: float | None = None,
+) -> np.ndarray:
+    """Runway in months for each of ``paths`` paths (inf if cash lasts the horizon).
+
+    Stops early, returning the paths finished so far, once ``deadline``
+    (``time.time()``) has passed.
+    """
+    rng = np.random.default_rng(seed)
+    horizon = scenario.horizon_months
+    revenue_mean = model.revenue_mean * (1 + scenario.revenue_shift_pct / 100)
+    expense_mean = model.expense_mean * (1 + scenario.expense_shift_pct / 100)
+    results = []
+    done = 0
+    while done < paths:
+        if deadline is not None and done and time.time() > deadline:
+            break
+        batch = min(BATCH_PATHS, paths - done)
+        revenue = np.maximum(rng.normal(revenue_mean, model.revenue_std, (batch, horizon)), 0)
+        expenses = np.maximum(rng.normal(expense_mean, model.expense_std, (batch, horizon)), 0)
+        balance = model.starting_cash + np.cumsum(revenue - expenses, axis=1)
+        depleted = balance <= 0
+        first = depleted.argmax(axis=1) + 1.0
+        runway = np.where(depleted.any(axis=1), first, np.inf)
+        if model.starting_cash <= 0:
+            runway[:] = 0.0
+        results.append(runway)
+        done += batch
+    return np.concatenate(results) if results else np.zeros(0)
+
+
+def _months(value: float) -> float | None:
+    return None if np.isinf(value) else float(value)
+
+
+def summarize(runways: np.ndarray, model: CashFlowModel, scenario: RunwayScenario) -> dict:
+    """Runway percentiles and depletion probabilities (null percentiles are beyond the horizon)"""
+    paths = len(runways)
+    if paths:
+        p10, p50, p90 = np.quantile(runways, [0.1, 0.5, 0.9], method="inverted_cdf").tolist()
+        depleted = float(np.isfinite(runways).mean())
+        within_year = float((runways <= 12).mean())
+    else:
+        p10 = p50 = p90 = np.inf
+        depleted = within_year = None
+    return {
+        "paths": paths,
+        "requested_paths": scenario.paths,
+        "complete": paths == scenario.paths,
+        "horizon_months": scenario.horizon_months,
+        "runway_months": {"p10": _months(p10), "p50": _months(p50), "p90": _months(p90)},
+        "depletion_probability": None if depleted is None else round(depleted, 4),
+        "depletion_within_12_months": None if within_year is None else round(within_year, 4),
+        "model": {
+            **{key: round(value, 2) for key, value in asdict(model).items() if isinstance(value, float)},
+            "basis": model.basis,
+            "samples": model.samples,
+        },
+        "scenario": asdict(scenario),
+    }
+
+
+def run_simulation(
+    model: CashFlowModel,
+    scenario: RunwayScenario,
+    executor: Executor | None = None,
+    chunk_paths: int = 10000,
+    time_budget: float | None = None,
+) -> dict:
+    """Simulate the scenario's paths in chunks, on ``executor`` when there's more than one.
+
+    Chunks still running when ``time_budget`` seconds have passed return what
+    they have; if that's not every path, raises ``IncompleteSimulation``.
+    """
+    sizes = [min(chunk_paths, scenario.paths - start) for start in range(0, scenario.paths, chunk_paths)]
+    seeds = np.random.SeedSequence(scenario.seed).spawn(len(sizes))
+    deadline = time.time() + time_budget if time_budget is not None else None
+    if executor is None or len(sizes) == 1:
+        parts = []
+        for size, seed in zip(sizes, seeds):
+            if deadline is not None and parts and time.time() > deadline:
+                break
+            parts.append(simulate_paths(model, scenario, size, seed, deadline))
+    else:
+        futures = [
+            executor.submit(simulate_paths, model, scenario, size, seed, deadline) for size, seed in zip(sizes, seeds)
+        ]
+        # Workers stop themselves at the deadline; allow a little for the last batch and the transfer
+        done, pending = wait(futures, timeout=None if time_budget is None else time_budget + 1.0)
+        for future in pending:
+            future.cancel()
+        parts = [future.result() for future in futures if future in done]
+    result = summarize(np.concatenate(parts) if parts else np.zeros(0), model, scenario)
+    if not result["complete"]:
+        raise IncompleteSimulation(result)
+    return result
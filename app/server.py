@@ -0,0 +1,218 @@
+"""
+Production server: pre-forked uvicorn workers sharing preloaded data.
+
+The parent process imports ``app.main``, which loads the ledger and builds
+every entity's period store, columnar tables, reconciliation and the
+dashboard shell. It then closes its ledger connections and freezes the
+garbage collector, so collections in the workers don't write to the shared
+heap. Finally it binds the listening socket and forks the workers, which
+all accept on that socket. The statement data (the NumPy columns in
+particular) is shared copy-on-write rather than loaded once per worker.
+Thread and process pools are not: each worker builds its own on first use
+(``app.pools``).
+
+Workers are recycled gracefully. Each one exits after
+``worker_max_requests`` requests (plus random jitter, so they don't all
+restart at once), finishing in-flight requests first, and the parent forks a
+replacement from the preloaded image. A worker that dies is replaced the
+same way.
+
+Signals to the parent:
+- SIGHUP restarts the workers one at a time.
+- SIGTERM or SIGINT shuts everything down, waiting up to
+  ``worker_graceful_timeout`` seconds for in-flight requests.
+
+Usage:
+    python -m app.server [--host H] [--port P] [--workers N]
+
+Defaults come from ``Settings`` (HOST, PORT, WORKERS, ...). POSIX only.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import sys
+import time
+
+import uvicorn
+
+from app.config import Settings, settings
+
+logger = logging.getLogger("uvicorn.error")
+
+# A worker that exits sooner than this after starting is respawned with a delay
+MIN_WORKER_LIFETIME = 1.0
+
+
+class Supervisor:
+    """Forks workers from the preloaded parent and keeps ``workers`` of them running"""
+
+    def __init__(self, config: uvicorn.Config, workers: int, graceful_timeout: int):
+        self.config = config
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.children: dict[int, float] = {}  # pid -> start time
+        self.retiring: set[int] = set()
+        self.stopping = False
+        self.restart_requested = False
+        self.socket = None
+
+    def _spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker()
+            except BaseException:
+                logger.exception("Worker %d crashed", os.getpid())
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+        logger.info("Started worker %d", pid)
+        return pid
+
+    def _run_worker(self) -> None:
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        from app import main
+
+        main.ledger.reopen()
+        uvicorn.Server(self.config).run(sockets=[self.socket])
+
+    def _reap(self) -> None:
+        """Collect exited workers, replacing them unless they were retired or we're stopping"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.children.pop(pid, None)
+            if started is None:
+                continue
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            logger.info("Worker %d exited (status %d)", pid, os.waitstatus_to_exitcode(status))
+            if not self.stopping:
+                if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                    time.sleep(MIN_WORKER_LIFETIME)
+                self._spawn()
+
+    def _rolling_restart(self) -> None:
+        """Replace each worker in turn: start the new one, then stop the old one"""
+        for pid in list(self.children):
+            if self.stopping:
+                return
+            self._spawn()
+            self.retiring.add(pid)
+            self._signal(pid, signal.SIGTERM)
+            self._wait_for({pid})
+
+    def _signal(self, pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _wait_for(self, pids: set[int]) -> None:
+        deadline = time.monotonic() + self.graceful_timeout
+        while pids & self.children.keys() and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in pids & self.children.keys():
+            logger.warning("Worker %d did not stop in %ds; killing it", pid, self.graceful_timeout)
+            self._signal(pid, signal.SIGKILL)
+        while pids & self.children.keys():
+            self._reap()
+            time.sleep(0.05)
+
+    def _handle_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def _handle_restart(self, signum, frame) -> None:
+        self.restart_requested = True
+
+    def run(self) -> None:
+        from app import main
+
+        # Everything loaded so far is shared with the workers: don't let the
+        # parent's connections leak into them, and keep GC off shared pages
+        main.ledger.close()
+        gc.collect()
+        gc.freeze()
+
+        self.socket = self.config.bind_socket()
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_restart)
+        logger.info(
+            "Serving on http://%s:%d with %d workers (pid %d)",
+            self.config.host,
+            self.config.port,
+            self.workers,
+            os.getpid(),
+        )
+        for _ in range(self.workers):
+            self._spawn()
+
+        while not self.stopping:
+            if self.restart_requested:
+                self.restart_requested = False
+                self._rolling_restart()
+            self._reap()
+            time.sleep(0.2)
+
+        for pid in self.children:
+            self._signal(pid, signal.SIGTERM)
+        self._wait_for(set(self.children))
+        self.socket.close()
+        logger.info("Shut down")
+
+
+def worker_count(configured: int) -> int:
+    """``configured`` workers, or one per available CPU when 0"""
+    if configured > 0:
+        return configured
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def build_config(config: Settings, host: str, port: int) -> uvicorn.Config:
+    return uvicorn.Config(
+        "app.main:app",
+        host=host,
+        port=port,
+        proxy_headers=True,
+        limit_max_requests=config.worker_max_requests or None,
+        limit_max_requests_jitter=config.worker_max_requests_jitter,
+        timeout_graceful_shutdown=config.worker_graceful_timeout,
+        log_level="debug" if config.debug else "info",
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the dashboard with pre-forked workers")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=settings.workers, help="0 = one per CPU")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        sys.exit("The production server needs os.fork; use `python run.py` instead")
+
+    config = build_config(settings, args.host, args.port)
+    config.load()  # imports app.main in the parent: data is loaded once, before forking
+    Supervisor(config, worker_count(args.workers), settings.worker_graceful_timeout).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Prerendered dashboard shell.
+
+``templates/dashboard.html`` takes no data, so it is rendered once at
+startup and kept with its gzip/brotli variants. Static assets it references
+are fingerprinted with a content hash (``/static/favicon.svg?v=1a2b...``)
+and served with an immutable Cache-Control, so browsers never re-request
+them. The shell itself lives at ``/``, a URL that can't change between
+deploys, so it carries a content-hash ETag and is revalidated instead.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.responses import Response
+from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+from starlette.datastructures import QueryParams
+
+from app.http_cache import encoded_etag, matching_etag
+from app.prerender import PrerenderedBody, render_html
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# href="/static/..." / src="/static/..." references without a query string
+STATIC_REF = re.compile(r'(?P<attr>href|src)="/static/(?P<path>[^"?#]+)"')
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def fingerprint_static(html: str, static_dir: Path) -> tuple[str, dict[str, str]]:
+    """Append ``?v=<hash>`` to static references; returns the page and hash per path"""
+    hashes = {}
+
+    def fingerprint(match: re.Match) -> str:
+        path = match["path"]
+        file = static_dir / path
+        if not file.is_file():
+            return match[0]
+        if path not in hashes:
+            hashes[path] = content_hash(file.read_bytes())
+        return f'{match["attr"]}="/static/{path}?v={hashes[path]}"'
+
+    return STATIC_REF.sub(fingerprint, html), hashes
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """Static files; requests carrying the file's current ``?v=`` hash are cached as immutable"""
+
+    def __init__(self, *args, fingerprints: dict[str, str] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fingerprints = fingerprints if fingerprints is not None else {}
+
+    async def get_response(self, path: str, scope) -> Response:
+        response = await super().get_response(path, scope)
+        if response.status_code == 200:
+            version = QueryParams(scope["query_string"]).get("v")
+            if version and version == self.fingerprints.get(path):
+                response.headers["Cache-Control"] = IMMUTABLE
+        return response
+
+
+@dataclass(frozen=True)
+class DashboardShell:
+    """A template rendered once, with its ETag and the asset fingerprints it uses"""
+
+    body: PrerenderedBody
+    etag: str
+    fingerprints: dict[str, str]
+
+    @classmethod
+    def render(cls, templates: Jinja2Templates, name: str, static_dir: Path) -> "DashboardShell":
+        html, fingerprints = fingerprint_static(templates.get_template(name).render(), static_dir)
+        body = render_html(html)
+        return cls(body, f'"{content_hash(body.identity)}"', fingerprints)
+
+    def response(self, request: Request) -> Response:
+        """The shell in the best accepted encoding, or 304 for a current ETag"""
+        headers = {"Cache-Control": "no-cache"}
+        matched = matching_etag(request.headers.get("if-none-match"), self.etag)
+        if matched:
+            return Response(
+                status_code=304, headers={**headers, "ETag": matched, "Vary": "Accept-Encoding"}
+            )
+        response = self.body.response(request.headers.get("accept-encoding"), headers)
+        response.headers["ETag"] = encoded_etag(self.etag, response.headers.get("content-encoding"))
+        return response
@@ -0,0 +1,269 @@
+"""
+Memory-mapped binary snapshots of the loaded statement data.
+
+A snapshot holds, for every entity, the period-end index, the columnar
+income statement and balance sheet tables and the outcome of reconciling
+them. It also holds the interim rows, the benchmarks, loan terms, entity
+names and data versions, all tagged with the ledger revision they were built
+from.
+
+Layout:
+- an 8-byte magic and a JSON header (array offsets, dtypes and shapes)
+- the raw little-endian arrays, each aligned to 64 bytes
+
+Loading maps the file read-only and wraps each column, date columns
+included, as a NumPy view of the mapping; statements are read through views
+of those columns and the saved reconciliation is reused, so nothing is
+parsed, re-checked or copied per row. The OS page cache keeps one copy of the
+data for every process that maps the same file.
+
+Snapshots are written to a temporary file and renamed over the old one, so
+readers see either the old or the new file, never a partial one. Processes
+that still map the old file keep using it until they load the new one.
+
+Usage:
+    python -m app.snapshot [--output PATH]    # build from the ledger
+"""
+
+import argparse
+import json
+import mmap
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from app.entities import Dataset
+from app.models import BalanceSheetPeriod, IncomeStatementPeriod
+from app.periods import PeriodStore
+from app.reconcile import Reconciliation
+from app.rollups import InterimRollup
+from app.tables import DateColumn, StatementTable, line_item_fields
+
+MAGIC = b"LRCSNAP\x02"
+ALIGNMENT = 64
+
+INCOME_FIELDS = line_item_fields(IncomeStatementPeriod)
+BALANCE_FIELDS = line_item_fields(BalanceSheetPeriod)
+
+
+def _ordinals(days: list[date | None]) -> np.ndarray:
+    return np.fromiter((day.toordinal() if day else 0 for day in days), dtype="<i8", count=len(days))
+
+
+def _dates(ordinals: np.ndarray) -> list[date | None]:
+    return [date.fromordinal(value) if value else None for value in ordinals.tolist()]
+
+
+def _present_dates(ends: DateColumn, present: np.ndarray) -> DateColumn:
+    """Period ends of the rows a statement is present for, None elsewhere"""
+    if present.all():
+        return ends
+    return DateColumn(np.where(present, ends.days, np.datetime64("NaT", "D")))
+
+
+def _matrix(table: StatementTable) -> np.ndarray:
+    """Line items as a (fields, rows) array, so each column is contiguous"""
+    if not len(table):
+        return np.zeros((len(table.fields), 0), dtype="<f8")
+    return np.stack([table[name] for name in table.fields]).astype("<f8", copy=False)
+
+
+def _store_arrays(store: PeriodStore) -> dict[str, np.ndarray]:
+    arrays = {
+        "ends": np.asarray(store.ends, dtype="<M8[D]"),
+        "income": _matrix(store.income_table),
+        "income_present": store.income_table.present.astype("u1"),
+        "income_starts": np.asarray(store.income_table.dates["period_start"], dtype="<M8[D]"),
+        "balance": _matrix(store.balance_table),
+        "balance_present": store.balance_table.present.astype("u1"),
+    }
+    if store.interim is not None and len(store.interim):
+        starts, ends, rows = store.interim.arrays()
+        arrays["interim_starts"] = _ordinals(starts)
+        arrays["interim_ends"] = _ordinals(ends)
+        arrays["interim_rows"] = np.ascontiguousarray(rows, dtype="<f8")
+    return arrays
+
+
+def write_snapshot(path: str | Path, dataset: Dataset, revision: int) -> Path:
+    """Write ``dataset`` as a snapshot of ledger ``revision``, atomically replacing ``path``"""
+    path = Path(path)
+    header = {
+        "revision": revision,
+        "data_version": dataset.version,
+        "default_entity": dataset.default_entity,
+        "income_fields": INCOME_FIELDS,
+        "balance_fields": BALANCE_FIELDS,
+        "benchmarks": dataset.default.benchmarks,
+        "loans": {
+            entity: [{**terms, "maturity": terms["maturity"] and terms["maturity"].isoformat()} for terms in loans]
+            for entity, loans in dataset.loans.items()
+        },
+        "entities": {},
+    }
+    blocks = []
+    offset = 0
+    for entity, store in sorted(dataset.stores.items()):
+        entry = {
+            "name": store.name,
+            "version": store.version,
+            "interim_version": store.interim.version if store.interim is not None else None,
+            "reconciliation": {
+                "checks": store.reconciliation.checks,
+                "mismatches": store.reconciliation.mismatches,
+                "tolerance": store.reconciliation.tolerance,
+            },
+            "arrays": {},
+        }
+        for key, array in _store_arrays(store).items():
+            offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            entry["arrays"][key] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            blocks.append((offset, np.ascontiguousarray(array)))
+            offset += array.nbytes
+        header["entities"][entity] = entry
+
+    encoded = json.dumps(header, separators=(",", ":")).encode()
+    prefix = len(MAGIC) + 8 + len(encoded)
+    data_start = -(-prefix // ALIGNMENT) * ALIGNMENT
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(MAGIC + len(encoded).to_bytes(8, "little") + encoded)
+            out.write(b"\0" * (data_start - prefix))
+            for block_offset, array in blocks:
+                out.seek(data_start + block_offset)
+                out.write(array.tobytes())
+            out.truncate(data_start + offset)
+            out.flush()
+            os.fsync(out.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return path
+
+
+@dataclass
+class Snapshot:
+    """A mapped snapshot file; arrays are read-only views of ``buffer``"""
+
+    path: Path
+    header: dict
+    buffer: mmap.mmap
+    data_start: int
+
+    @property
+    def revision(self) -> int:
+        return self.header["revision"]
+
+    def _array(self, spec: dict) -> np.ndarray:
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        array = np.frombuffer(self.buffer, dtype=dtype, count=count, offset=self.data_start + spec["offset"])
+        return array.reshape(spec["shape"])
+
+    def _store(self, entry: dict) -> PeriodStore:
+        arrays = {key: self._array(spec) for key, spec in entry["arrays"].items()}
+        ends = DateColumn(arrays["ends"])
+        income_present = arrays["income_present"].view(bool)
+        balance_present = arrays["balance_present"].view(bool)
+        income = StatementTable.from_columns(
+            IncomeStatementPeriod,
+            dict(zip(INCOME_FIELDS, arrays["income"])),
+            income_present,
+            {
+                "period_start": DateColumn(arrays["income_starts"]),
+                "period_end": _present_dates(ends, income_present),
+            },
+        )
+        balance = StatementTable.from_columns(
+            BalanceSheetPeriod,
+            dict(zip(BALANCE_FIELDS, arrays["balance"])),
+            balance_present,
+            {"period_end": _present_dates(ends, balance_present)},
+        )
+        return PeriodStore.from_tables(
+            ends,
+            income,
+            balance,
+            self.header["benchmarks"],
+            entry["name"],
+            entry["version"],
+            Reconciliation(**entry["reconciliation"]),
+        )
+
+    def _rollup(self, entry: dict) -> InterimRollup | None:
+        specs = entry["arrays"]
+        if "interim_rows" not in specs:
+            return None
+        return InterimRollup.from_arrays(
+            _dates(self._array(specs["interim_starts"])),
+            _dates(self._array(specs["interim_ends"])),
+            self._array(specs["interim_rows"]),
+            entry["interim_version"],
+        )
+
+    def dataset(self) -> Dataset:
+        """Period stores (and interim rollups) for every entity in the snapshot"""
+        entities = self.header["entities"]
+        stores = {entity: self._store(entry) for entity, entry in entities.items()}
+        rollups = {}
+        for entity, entry in entities.items():
+            rollup = self._rollup(entry)
+            if rollup is not None:
+                rollups[entity] = rollup
+        loans = {
+            entity: [
+                {**terms, "maturity": date.fromisoformat(terms["maturity"]) if terms["maturity"] else None}
+                for terms in entity_loans
+            ]
+            for entity, entity_loans in self.header.get("loans", {}).items()
+        }
+        return Dataset(stores, self.header["default_entity"], rollups=rollups, loans=loans)
+
+
+def read_snapshot(path: str | Path) -> Snapshot | None:
+    """Map a snapshot; None if it's missing, unreadable or built for other statement fields"""
+    path = Path(path)
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):  # ValueError: empty file
+        return None
+    if buffer[: len(MAGIC)] != MAGIC:
+        return None
+    length = int.from_bytes(buffer[len(MAGIC) : len(MAGIC) + 8], "little")
+    prefix = len(MAGIC) + 8 + length
+    try:
+        header = json.loads(buffer[len(MAGIC) + 8 : prefix])
+    except ValueError:
+        return None
+    if header.get("income_fields") != INCOME_FIELDS or header.get("balance_fields") != BALANCE_FIELDS:
+        return None
+    return Snapshot(path, header, buffer, -(-prefix // ALIGNMENT) * ALIGNMENT)
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description="Build a statement snapshot from the ledger")
+    parser.add_argument("--output", type=Path, default=settings.snapshot_file)
+    args = parser.parse_args(argv)
+
+    from app import main as app_main
+
+    revision = app_main.ledger.revision()
+    dataset = app_main.load_dataset_from_ledger()
+    path = write_snapshot(args.output, dataset, revision)
+    print(f"Wrote {path} ({path.stat().st_size:,} bytes, revision {revision})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Columnar statement tables.
+
+Statements are stored as one NumPy array per line item so that metrics can be
+computed for every period in a single vectorized pass. Row ``i`` of a table
+corresponds to the ``i``-th period it was built from; missing statements are
+kept as NaN rows and flagged in ``present``. Dates can be held as a
+``DateColumn`` over a ``datetime64[D]`` array, and a row is read through a
+``StatementRow`` view, so tables over mapped memory are never unpacked into
+Python objects up front.
+"""
+
+from collections.abc import Mapping, Sequence
+from datetime import date
+
+import numpy as np
+from pydantic import BaseModel
+
+
+def line_item_fields(model: type[BaseModel]) -> list[str]:
+    """Get the numeric line item fields of a statement model, in order"""
+    return [name for name, field in model.model_fields.items() if field.annotation is float]
+
+
+def date_fields(model: type[BaseModel]) -> list[str]:
+    """Get the date fields of a statement model, in order"""
+    return [name for name, field in model.model_fields.items() if field.annotation is date]
+
+
+class DateColumn(Sequence):
+    """Read-only sequence of dates over a ``datetime64[D]`` array; NaT reads as None"""
+
+    def __init__(self, days: np.ndarray):
+        self.days = days
+
+    @classmethod
+    def of(cls, dates: Sequence) -> "DateColumn":
+        if isinstance(dates, DateColumn):
+            return dates
+        return cls(np.array(dates, dtype="datetime64[D]"))
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return DateColumn(self.days[i])
+        day = self.days[i]
+        return None if np.isnat(day) else day.item()
+
+    def __iter__(self):
+        return iter(self.days.tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        return self.days if dtype is None else self.days.astype(dtype, copy=False)
+
+    def tolist(self) -> list[date | None]:
+        return self.days.tolist()
+
+
+class StatementRow(Mapping):
+    """One row of a table read as a statement dict, without copying it out"""
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: "StatementTable", index: int):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, name: str):
+        column = self.table.columns.get(name)
+        if column is not None:
+            return float(column[self.index])
+        if name in self.table.dates:
+            return self.table.dates[name][self.index]
+        raise KeyError(name)
+
+    def __iter__(self):
+        yield from self.table.date_fields
+        yield from self.table.fields
+
+    def __len__(self) -> int:
+        return len(self.table.date_fields) + len(self.table.fields)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class StatementTable:
+    """Line items of a statement model held as float64 columns."""
+
+    def __init__(self, model: type[BaseModel], rows: list[dict | None]):
+        self.model = model
+        self.fields = line_item_fields(model)
+        self.date_fields = date_fields(model)
+        self.present = np.fromiter((row is not None for row in rows), dtype=bool, count=len(rows))
+        self.columns: dict[str, np.ndarray] = {
+            name: np.fromiter(
+                (row.get(name, 0.0) if row is not None else np.nan for row in rows),
+                dtype=np.float64,
+                count=len(rows),
+            )
+            for name in self.fields
+        }
+        self.dates: dict[str, list[date | None]] = {
+            name: [row[name] if row is not None else None for row in rows]
+            for name in self.date_fields
+        }
+
+    @classmethod
+    def from_columns(
+        cls,
+        model: type[BaseModel],
+        columns: dict[str, np.ndarray],
+        present: np.ndarray,
+        dates: dict[str, Sequence[date | None]],
+    ) -> "StatementTable":
+        """Wrap existing arrays (e.g. views of a memory-mapped snapshot) without copying"""
+        table = cls.__new__(cls)
+        table.model = model
+        table.fields = line_item_fields(model)
+        table.date_fields = date_fields(model)
+        table.present = present
+        table.columns = columns
+        table.dates = dates
+        return table
+
+    def __len__(self) -> int:
+        return len(self.present)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def view(self, i: int) -> StatementRow | None:
+        """Row ``i`` as a read-only statement mapping over the columns"""
+        return StatementRow(self, i) if self.present[i] else None
+
+    def row(self, i: int) -> dict | None:
+        """Rebuild the statement dict for row ``i``"""
+        if not self.present[i]:
+            return None
+        stmt = {name: self.dates[name][i] for name in self.date_fields}
+        stmt.update({name: float(self.columns[name][i]) for name in self.fields})
+        return stmt
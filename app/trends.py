@@ -0,0 +1,130 @@
+"""
+Multi-period trends and linear projections for every line item.
+
+All series of a store (see ``app.diff.PeriodDiffs``) over the requested
+history are stacked into one (series, periods) matrix, oldest period first.
+Each statistic is then one pass over that matrix:
+- compound annual growth rate from the first to the last period
+- trailing rolling averages, one window per period
+- an ordinary least-squares line per series (value against years elapsed),
+  extended a number of years past the latest period
+
+Periods missing a statement are NaN. They are left out of the fit and make
+any rolling window or growth rate that includes them null.
+"""
+
+import math
+from datetime import date
+
+import numpy as np
+
+from app.diff import period_diffs
+from app.periods import PeriodStore, get_fiscal_year_label
+
+DAYS_PER_YEAR = 365.25
+
+
+def _add_years(day: date, years: int) -> date:
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:  # Feb 29
+        return day.replace(year=day.year + years, day=28)
+
+
+def _years_since(days: list[date], origin: date) -> np.ndarray:
+    return np.array([(day - origin).days / DAYS_PER_YEAR for day in days])
+
+
+def _rounded_list(values: np.ndarray, ndigits: int) -> list:
+    return [None if v != v else round(v, ndigits) for v in values.tolist()]
+
+
+def _rounded(value: float, ndigits: int) -> float | None:
+    return None if math.isnan(value) else round(value, ndigits)
+
+
+def cagr(matrix: np.ndarray, years: float) -> np.ndarray:
+    """Growth rate per year (%) from the first to the last column; NaN unless both are positive"""
+    if matrix.shape[1] < 2 or years <= 0:
+        return np.full(matrix.shape[0], np.nan)
+    first, last = matrix[:, 0], matrix[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (np.power(last / first, 1 / years) - 1) * 100
+    return np.where((first > 0) & (last > 0), growth, np.nan)
+
+
+def rolling_mean(matrix: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean of ``window`` columns ending at each column (NaN until the window fills)"""
+    result = np.full(matrix.shape, np.nan)
+    if window <= matrix.shape[1]:
+        result[:, window - 1 :] = np.lib.stride_tricks.sliding_window_view(matrix, window, axis=1).mean(axis=-1)
+    return result
+
+
+def linear_fit(x: np.ndarray, matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Least-squares (slope, intercept, r²) of each row against ``x``, ignoring NaNs"""
+    mask = ~np.isnan(matrix)
+    y = np.where(mask, matrix, 0.0)
+    xs = np.where(mask, x, 0.0)
+    n = mask.sum(axis=1)
+    sx, sy = xs.sum(axis=1), y.sum(axis=1)
+    sxx, sxy, syy = (xs * xs).sum(axis=1), (xs * y).sum(axis=1), (y * y).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        cov = n * sxy - sx * sy
+        slope = np.where((n >= 2) & (var_x > 0), cov / var_x, np.nan)
+        intercept = (sy - slope * sx) / n
+        r_squared = np.where(var_y > 0, cov * cov / (var_x * var_y), np.where(n >= 2, 1.0, np.nan))
+    return slope, intercept, np.where(np.isnan(slope), np.nan, r_squared)
+
+
+def trends_payload(
+    store: PeriodStore,
+    names: list[str] | None = None,
+    periods: int | None = None,
+    window: int = 3,
+    horizon: int = 3,
+) -> dict:
+    """Growth, rolling averages and projections for each series over the latest ``periods``.
+
+    History is most recent first, like every other payload; projections run
+    from the next year outwards.
+    """
+    diffs = period_diffs(store)
+    names = diffs.resolve(names)
+    count = len(store) if periods is None else min(periods, len(store))
+    history = store.periods[:count][::-1]  # oldest first
+    if not history or not names:
+        return {"periods": [], "period_ends": [], "window": window, "projected": [], "series": {}}
+
+    matrix = np.vstack([diffs.columns[name][:count][::-1] for name in names])
+    ends = [period.period_end for period in history]
+    x = _years_since(ends, ends[0])
+    future_ends = [_add_years(ends[-1], k) for k in range(1, horizon + 1)]
+    future_x = _years_since(future_ends, ends[0])
+
+    growth = cagr(matrix, x[-1])
+    averages = rolling_mean(matrix, window)
+    slope, intercept, r_squared = linear_fit(x, matrix)
+    projections = slope[:, None] * future_x[None, :] + intercept[:, None]
+
+    return {
+        "periods": [period.label for period in reversed(history)],
+        "period_ends": [day.isoformat() for day in reversed(ends)],
+        "window": window,
+        "projected": [
+            {"period": get_fiscal_year_label(day), "period_end": day.isoformat()} for day in future_ends
+        ],
+        "series": {
+            name: {
+                "values": _rounded_list(matrix[k, ::-1], 2),
+                "cagr_pct": _rounded(growth[k], 1),
+                "rolling_average": _rounded_list(averages[k, ::-1], 2),
+                "slope_per_year": _rounded(slope[k], 2),
+                "r_squared": _rounded(r_squared[k], 3),
+                "projection": _rounded_list(projections[k], 2),
+            }
+            for k, name in enumerate(names)
+        },
+    }
@@ -0,0 +1,452 @@
+"""
+Benchmark every API route in-process against synthetic data.
+
+Each scenario (``<periods>x<entities>``) runs in a fresh process: synthetic
+statements are written to a temporary ledger, ``app.main`` is imported against
+it, and every route is driven straight through the ASGI interface (no
+sockets), reporting p50/p95/p99 latency, throughput and peak traced memory per
+request. Core functions (``calculate_metrics``, ``resolve_period``, ...) are
+timed on their own as well.
+
+Results can be saved as JSON and compared with an earlier run, so a
+regression between commits shows up as a non-zero exit::
+
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_SCENARIOS = "2x1,1000x1,10000x10,100000x50"
+
+# Ignore slowdowns smaller than these; they're timer and scheduler noise
+NOISE_FLOOR_MS = 0.05
+NOISE_FLOOR_US = 0.5
+
+
+@dataclass
+class RequestSpec:
+    name: str
+    method: str
+    path: str
+    query: str = ""
+    body: bytes = b""
+    headers: list[tuple[bytes, bytes]] = field(default_factory=list)
+    write: bool = False
+
+
+async def asgi_request(app, spec: RequestSpec) -> tuple[int, int]:
+    """Send one request through the ASGI app; returns (status, body bytes)"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": spec.method,
+        "scheme": "http",
+        "path": spec.path,
+        "raw_path": spec.path.encode(),
+        "root_path": "",
+        "query_string": spec.query.encode(),
+        "headers": [(b"host", b"bench"), *spec.headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    done = asyncio.Event()
+    sent_body = False
+    status = 0
+    size = 0
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": spec.body, "more_body": False}
+        # Streaming responses listen for a disconnect; only send it once finished
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        # Starlette re-raises unhandled errors after sending the 500 response
+        status = status or 500
+    return status, size
+
+
+def plan_requests(main) -> tuple[list[RequestSpec], list[str]]:
+    """One request per route (path parameters expanded), plus skipped routes"""
+    from fastapi.routing import APIRoute
+
+    from app.export import EXPORTS
+
+    dataset = main.dataset
+    entities = dataset.entities()
+    sample_entity = next((e for e in entities if e != dataset.default_entity), dataset.default_entity)
+    periods = dataset.default.periods
+    older_label = periods[1].label if len(periods) > 1 else periods[0].label
+    path_values = {
+        "entity": [sample_entity],
+        "endpoint": list(main.PERIOD_PAYLOADS),
+        "kind": list(EXPORTS),
+        "path": ["expenses", "expenses/ga/other"],
+    }
+
+    latest = dataset.default.latest.period_end
+    interim_body = json.dumps(
+        [
+            {
+                "period_start": (latest + timedelta(days=1)).isoformat(),
+                "period_end": (latest + timedelta(days=31)).isoformat(),
+                "food_beverage_sales": 10000.0,
+                "total_revenue": 10000.0,
+                "total_expenses": 9000.0,
+                "net_income": 1000.0,
+            }
+        ]
+    ).encode()
+    write_bodies = {
+        "/api/entities/{entity}/interim-statements": (interim_body, b"application/json"),
+        "/api/import": (
+            f"entity,account,period_end,amount\n{sample_entity},rent,{latest.isoformat()},1000\n".encode(),
+            b"text/csv",
+        ),
+    }
+
+    specs, skipped = [], []
+    for route in main.app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        params = re.findall(r"({(\w+)(?::\w+)?})", route.path)
+        if any(param not in path_values for _, param in params):
+            skipped.append(route.path)
+            continue
+        paths = [route.path]
+        for placeholder, param in params:
+            paths = [p.replace(placeholder, value) for p in paths for value in path_values[param]]
+        query_names = {param.alias for param in route.dependant.query_params}
+
+        for method in sorted(route.methods - {"HEAD"}):
+            if method == "GET":
+                for path in paths:
+                    specs.append(RequestSpec(path, method, path))
+                    if "year" in query_names:
+                        specs.append(RequestSpec(f"{path}?year={older_label}", method, path, f"year={older_label}"))
+            elif route.path in write_bodies:
+                body, content_type = write_bodies[route.path]
+                for path in paths:
+                    specs.append(
+                        RequestSpec(
+                            f"{method} {path}",
+                            method,
+                            path,
+                            body=body,
+                            headers=[(b"content-type", content_type)],
+                            write=True,
+                        )
+                    )
+            else:
+                skipped.append(f"{method} {route.path}")
+    return specs, skipped
+
+
+def clear_caches(main) -> None:
+    """Empty every response/payload cache the app holds (for --cold runs)"""
+    from app.cache import VersionedCache
+
+    for value in vars(main).values():
+        if isinstance(value, VersionedCache):
+            value.clear()
+
+
+def shutdown_app(main) -> None:
+    """Close the ledger and stop the app's worker pools so the scenario process can exit"""
+    from concurrent.futures import Executor
+
+    for value in vars(main).values():
+        if isinstance(value, Executor):
+            value.shutdown(cancel_futures=True)
+    main.ledger.close()
+
+
+def _stats(latencies_ms: list[float], elapsed: float) -> dict:
+    values = np.array(latencies_ms)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]).tolist()
+    return {
+        "n": len(values),
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "mean_ms": round(float(values.mean()), 3),
+        "rps": round(len(values) / elapsed, 1) if elapsed else None,
+    }
+
+
+async def bench_endpoint(main, spec: RequestSpec, args) -> dict:
+    app = main.app
+    for _ in range(args.warmup):
+        await asgi_request(app, spec)
+
+    latencies: list[float] = []
+    statuses: set[int] = set()
+    size = 0
+
+    async def worker(count: int) -> None:
+        nonlocal size
+        for _ in range(count):
+            if args.cold:
+                clear_caches(main)
+            start = time.perf_counter()
+            status, size = await asgi_request(app, spec)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses.add(status)
+
+    per_worker = max(1, args.iterations // args.concurrency)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(per_worker) for _ in range(args.concurrency)))
+    result = _stats(latencies, time.perf_counter() - started)
+
+    # Separate pass: tracing allocations would distort the latencies above
+    tracemalloc.start()
+    peak = 0
+    for _ in range(args.memory_samples):
+        if args.cold:
+            clear_caches(main)
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        await asgi_request(app, spec)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    result.update(
+        status=",".join(str(s) for s in sorted(statuses)),
+        bytes=size,
+        peak_alloc_kb=round(peak / 1024, 1),
+    )
+    return result
+
+
+def _per_call_us(func, repeat: int = 5) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return round(min(timer.repeat(repeat, number)) / number * 1e6, 3)
+
+
+def bench_functions(main) -> dict:
+    """Per-call time (microseconds) of the core computations"""
+    from app.entities import consolidate
+    from app.metrics import calculate_metrics, calculate_metrics_batch
+
+    store = main.period_store
+    latest = store.latest
+    label = store.periods[-1].label
+    stores = list(main.dataset.stores.values())
+    results = {
+        "calculate_metrics": _per_call_us(lambda: calculate_metrics(latest.income, latest.balance)),
+        "calculate_metrics_batch": _per_call_us(
+            lambda: calculate_metrics_batch(store.income_table, store.balance_table)
+        ),
+        "resolve_period": _per_call_us(lambda: main.resolve_period(label)),
+        "resolve_period_latest": _per_call_us(lambda: main.resolve_period(None)),
+        "period_store_between": _per_call_us(lambda: store.between(latest.period_end, latest.period_end)),
+    }
+    if len(stores) > 1:
+        results["consolidate_all"] = _per_call_us(lambda: consolidate(stores, main.consolidation_pool), repeat=3)
+    return results
+
+
+def run_scenario(name: str, args_dict: dict) -> dict:
+    """Build the scenario's data, import the app against it and benchmark it"""
+    args = argparse.Namespace(**args_dict)
+    periods, entities = (int(part) for part in name.split("x"))
+    setup = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["LEDGER_PATH"] = str(Path(tmp) / "ledger.db")
+        from app.ledger import StatementLedger
+        from benchmarks.synthetic import generate, write_ledger
+
+        started = time.perf_counter()
+        generated = generate(periods, entities, seed=args.seed)
+        setup["generate_s"] = round(time.perf_counter() - started, 3)
+
+        started = time.perf_counter()
+        ledger = StatementLedger(os.environ["LEDGER_PATH"])
+        write_ledger(ledger, generated)
+        ledger.close()
+        del generated
+        setup["ledger_write_s"] = round(time.perf_counter() - started, 3)
+
+        started = time.perf_counter()
+        import app.main as main
+
+        setup["app_load_s"] = round(time.perf_counter() - started, 3)
+
+        specs, skipped = plan_requests(main)
+        if args.routes:
+            specs = [spec for spec in specs if re.search(args.routes, spec.name)]
+        if not args.writes:
+            specs = [spec for spec in specs if not spec.write]
+        # Writes change the data version, so they run after all the reads
+        specs.sort(key=lambda spec: spec.write)
+
+        async def drive() -> dict:
+            async with main.app.router.lifespan_context(main.app):
+                return {spec.name: await bench_endpoint(main, spec, args) for spec in specs}
+
+        endpoints = asyncio.run(drive())
+        functions = bench_functions(main)
+        shutdown_app(main)
+
+    return {
+        "name": name,
+        "periods": periods,
+        "entities": entities,
+        "setup": setup,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "endpoints": endpoints,
+        "functions": functions,
+        "skipped_routes": skipped,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_scenario(result: dict) -> None:
+    setup = ", ".join(f"{k}={v}" for k, v in result["setup"].items())
+    print(f"\n== {result['name']} ({result['periods']} periods, {result['entities']} entities) ==")
+    print(f"   {setup}, peak RSS {result['peak_rss_mb']} MB")
+    width = max((len(name) for name in result["endpoints"]), default=10)
+    header = f"{'endpoint':<{width}}  {'status':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'peak KiB':>9} {'bytes':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, stats in result["endpoints"].items():
+        print(
+            f"{name:<{width}}  {stats['status']:>7} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f}"
+            f" {stats['p99_ms']:>9.3f} {stats['rps']:>9} {stats['peak_alloc_kb']:>9} {stats['bytes']:>9}"
+        )
+    for name, us in result["functions"].items():
+        print(f"   {name}: {us} us/call")
+    if result["skipped_routes"]:
+        print(f"   skipped (no sample values): {', '.join(result['skipped_routes'])}")
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Endpoints/functions whose p95 (or per-call time) grew by more than ``threshold``"""
+    regressions = []
+    previous = {scenario["name"]: scenario for scenario in baseline["scenarios"]}
+    for scenario in results["scenarios"]:
+        before = previous.get(scenario["name"])
+        if before is None:
+            continue
+        for name, stats in scenario["endpoints"].items():
+            old = before["endpoints"].get(name)
+            if old is None:
+                continue
+            if (
+                stats["p95_ms"] > old["p95_ms"] * (1 + threshold)
+                and stats["p95_ms"] - old["p95_ms"] > NOISE_FLOOR_MS
+            ):
+                regressions.append(
+                    f"{scenario['name']} {name}: p95 {old['p95_ms']} -> {stats['p95_ms']} ms"
+                )
+        for name, us in scenario["functions"].items():
+            old = before["functions"].get(name)
+            if old is not None and us > old * (1 + threshold) and us - old > NOISE_FLOOR_US:
+                regressions.append(f"{scenario['name']} {name}: {old} -> {us} us/call")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the API in-process against synthetic data")
+    parser.add_argument("--scenarios", default=DEFAULT_SCENARIOS, help="Comma-separated <periods>x<entities>")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--memory-samples", type=int, default=3, help="Traced requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent in-flight requests")
+    parser.add_argument("--cold", action="store_true", help="Clear the app's caches before every request")
+    parser.add_argument("--writes", action="store_true", help="Also benchmark the POST routes")
+    parser.add_argument("--routes", help="Only endpoints whose name matches this regex")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--compare", help="Earlier JSON results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    for name in scenarios:
+        if not re.fullmatch(r"\d+x\d+", name):
+            parser.error(f"Bad scenario {name!r}, expected <periods>x<entities>")
+
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            **{k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "scenarios": [],
+    }
+    for name in scenarios:
+        # A fresh interpreter per scenario: app.main loads its data at import
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            result = executor.submit(run_scenario, name, vars(args)).result()
+        print_scenario(result)
+        results["scenarios"].append(result)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=1))
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\nCompared with {args.compare} (commit {baseline['meta'].get('commit')}):")
+        for line in regressions or ["no regressions"]:
+            print(f"  {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Synthetic statement histories for benchmarking.
+
+Line items are drawn around the real Little Red Coffee figures (so ratios
+stay plausible) from a seeded generator, subtotals are filled in from their
+components and the balance sheet is made to balance, so the generated data
+reconciles cleanly. The same seed always produces the same data.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+from app.ledger import BALANCE_FIELDS, DEFAULT_ENTITY, INCOME_FIELDS, StatementLedger
+from app.reconcile import BALANCE_SUBTOTALS, INCOME_SUBTOTALS, fill_subtotal_columns
+from data.financials import BALANCE_SHEETS, INCOME_STATEMENTS, INDUSTRY_BENCHMARKS
+
+# Annual periods end on Sep 30, counting back from the latest real one; the
+# date range caps how many one entity can have.
+LATEST_YEAR = 2025
+MAX_PERIODS_PER_ENTITY = 2000
+
+_INCOME_SUBTOTAL_NAMES = {check.total.split(".", 1)[1] for check in INCOME_SUBTOTALS}
+_BALANCE_SUBTOTAL_NAMES = {check.total.split(".", 1)[1] for check in BALANCE_SUBTOTALS}
+INCOME_COMPONENTS = [name for name in INCOME_FIELDS if name not in _INCOME_SUBTOTAL_NAMES]
+BALANCE_COMPONENTS = [
+    name for name in BALANCE_FIELDS if name not in _BALANCE_SUBTOTAL_NAMES and name != "current_earnings"
+]
+
+
+@dataclass
+class SyntheticEntity:
+    entity: str
+    name: str
+    income_statements: list[dict]
+    balance_sheets: list[dict]
+    interim_income_statements: list[dict]
+
+
+def _draw(rng: np.random.Generator, base: dict, fields: list[str], rows: int) -> dict[str, np.ndarray]:
+    """``rows`` values per field scattered +/-25% around ``base``"""
+    centre = np.array([base[name] for name in fields])
+    values = np.round(centre * rng.uniform(0.75, 1.25, size=(rows, len(fields))), 2)
+    return {name: values[:, i] for i, name in enumerate(fields)}
+
+
+def _rows(columns: dict[str, np.ndarray], fields: list[str], dates: dict[str, list[date]]) -> list[dict]:
+    """Statement dicts from columns, with line items in model order"""
+    names = [*dates, *fields]
+    values = [*dates.values(), *(columns[name].tolist() for name in fields)]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def _month_ends(last: date, count: int) -> list[tuple[date, date]]:
+    """(start, end) of the ``count`` calendar months ending with ``last``'s month, oldest first"""
+    months = []
+    year, month = last.year, last.month
+    for _ in range(count):
+        start = date(year, month, 1)
+        next_start = date(year + month // 12, month % 12 + 1, 1)
+        months.append((start, date.fromordinal(next_start.toordinal() - 1)))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months[::-1]
+
+
+def generate_entity(
+    entity: str, periods: int, seed: int = 0, interim_months: int = 0, name: str | None = None
+) -> SyntheticEntity:
+    """``periods`` annual statement pairs (latest FY24-25) plus monthly interim statements"""
+    if periods > MAX_PERIODS_PER_ENTITY:
+        raise ValueError(f"At most {MAX_PERIODS_PER_ENTITY} annual periods per entity")
+    rng = np.random.default_rng([seed, sum(entity.encode())])
+    ends = [date(LATEST_YEAR - k, 9, 30) for k in range(periods)]
+    starts = [date(LATEST_YEAR - k - 1, 10, 1) for k in range(periods)]
+
+    income = fill_subtotal_columns(_draw(rng, INCOME_STATEMENTS[0], INCOME_COMPONENTS, periods), "income")
+    balance = _draw(rng, BALANCE_SHEETS[0], BALANCE_COMPONENTS, periods)
+    balance["current_earnings"] = income["net_income"]
+    fill_subtotal_columns(balance, "balance")
+    # Plug prior retained earnings so assets = liabilities + equity
+    plug = balance["total_assets"] - balance["total_liabilities"] - balance["total_equity"]
+    balance["retained_earnings_previous"] = np.round(balance["retained_earnings_previous"] + plug, 2)
+    del balance["total_retained_earnings"], balance["total_equity"]
+    fill_subtotal_columns(balance, "balance")
+
+    monthly_base = {name: INCOME_STATEMENTS[0][name] / 12 for name in INCOME_COMPONENTS}
+    months = _month_ends(date(LATEST_YEAR, 9, 30), interim_months)
+    monthly = fill_subtotal_columns(_draw(rng, monthly_base, INCOME_COMPONENTS, interim_months), "income")
+
+    return SyntheticEntity(
+        entity,
+        name or entity,
+        _rows(income, INCOME_FIELDS, {"period_start": starts, "period_end": ends}),
+        _rows(balance, BALANCE_FIELDS, {"period_end": ends}),
+        _rows(
+            monthly,
+            INCOME_FIELDS,
+            {"period_start": [start for start, _ in months], "period_end": [end for _, end in months]},
+        ),
+    )
+
+
+def entity_ids(entities: int) -> list[str]:
+    """The default entity first, then loc001, loc002, ..."""
+    return [DEFAULT_ENTITY] + [f"loc{i:03d}" for i in range(1, entities)]
+
+
+def generate(
+    periods: int, entities: int = 1, seed: int = 0, interim_months: int = 24
+) -> list[SyntheticEntity]:
+    """``periods`` annual periods in total, spread evenly over ``entities`` entities"""
+    if periods < entities:
+        raise ValueError("Need at least one period per entity")
+    per_entity = math.ceil(periods / entities)
+    generated = []
+    remaining = periods
+    for entity in entity_ids(entities):
+        count = min(per_entity, remaining)
+        remaining -= count
+        generated.append(generate_entity(entity, count, seed, interim_months))
+    return generated
+
+
+def write_ledger(ledger: StatementLedger, generated: list[SyntheticEntity]) -> None:
+    """Persist synthetic entities (and the real benchmarks) to a ledger"""
+    ledger.upsert_benchmarks(INDUSTRY_BENCHMARKS)
+    for item in generated:
+        ledger.register_entity(item.entity, item.name)
+        ledger.upsert_income_statements(item.income_statements, item.entity)
+        ledger.upsert_balance_sheets(item.balance_sheets, item.entity)
+        if item.interim_income_statements:
+            ledger.upsert_interim_income_statements(item.interim_income_statements, item.entity)
@@ -1,6 +1,9 @@
 """
 Little Red Coffee Ltd. - Financial Data
 Extracted from comparative statements dated 12-14-2025
+
+Used to seed the SQLite statement ledger (app/ledger.py) on first run; once
+seeded, new periods are added to the ledger rather than to this module.
 """
 
 from datetime import date
@@ -3,14 +3,23 @@
 Run the Little Red Coffee Financial Dashboard
 
 Usage:
-    python run.py
+    python run.py                 # development server with auto-reload
+    python run.py --production    # pre-forked workers, see app/server.py
 
 Then open http://127.0.0.1:8000 in your browser.
 """
 
+import sys
+
 import uvicorn
 
 if __name__ == "__main__":
+    if "--production" in sys.argv[1:]:
+        from app.server import main
+
+        main([arg for arg in sys.argv[1:] if arg != "--production"])
+        sys.exit()
+
     print("\n" + "=" * 50)
     print("  Little Red Coffee - Financial Dashboard")
     print("=" * 50)
@@ -0,0 +1,61 @@
+"""
+Shared fixtures.
+
+The app is configured (through its environment settings) to keep its ledger
+and snapshot in a temporary directory and not to start the background
+precompute, before anything imports ``app.config``.
+"""
+
+import copy
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Add the project root to the path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+_data_dir = tempfile.mkdtemp(prefix="lrc-tests-")
+os.environ["LEDGER_PATH"] = str(Path(_data_dir) / "ledger.db")
+os.environ["PRECOMPUTE_ENABLED"] = "false"
+os.environ["LEDGER_POLL_SECONDS"] = "0"
+
+from app.periods import PeriodStore  # noqa: E402
+from data.financials import BALANCE_SHEETS, INCOME_STATEMENTS, INDUSTRY_BENCHMARKS  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_data_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def income_statements() -> list[dict]:
+    return copy.deepcopy(INCOME_STATEMENTS)
+
+
+@pytest.fixture
+def balance_sheets() -> list[dict]:
+    return copy.deepcopy(BALANCE_SHEETS)
+
+
+@pytest.fixture
+def store(income_statements, balance_sheets) -> PeriodStore:
+    return PeriodStore(income_statements, balance_sheets, INDUSTRY_BENCHMARKS, name="Little Red Coffee Ltd.")
+
+
+@pytest.fixture(scope="session")
+def main():
+    """The app module, serving from the test ledger"""
+    from app import main
+
+    return main
+
+
+@pytest.fixture(scope="session")
+def client(main):
+    from fastapi.testclient import TestClient
+
+    return TestClient(main.app)
@@ -0,0 +1,99 @@
+from app.cache import VersionedCache
+
+
+def counter():
+    calls = []
+
+    def compute(value):
+        def run():
+            calls.append(value)
+            return value
+
+        return run
+
+    return calls, compute
+
+
+def test_hit_and_miss():
+    cache = VersionedCache(maxsize=4)
+    calls, compute = counter()
+    assert cache.get_or_compute("summary", "FY24-25", "v1", compute(1), generation=1) == 1
+    assert cache.get_or_compute("summary", "FY24-25", "v1", compute(2), generation=1) == 1
+    assert calls == [1]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_new_version_invalidates():
+    cache = VersionedCache()
+    cache.get_or_compute("summary", None, "v1", lambda: "old", generation=1)
+    assert cache.get_or_compute("summary", None, "v2", lambda: "new", generation=2) == "new"
+    assert cache.version == "v2"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_stale_fallback_serves_previous_version():
+    cache = VersionedCache()
+    cache.get_or_compute("summary", None, "v1", lambda: "old", generation=1)
+    calls, compute = counter()
+
+    value, version, _ = cache.get_or_stale("summary", None, "v2", compute("new"), generation=2)
+    assert (value, version) == ("old", "v1")
+    assert calls == []
+    assert cache.stats()["stale_hits"] == 1
+
+    # Once the new version is computed, it replaces the stale entry
+    assert cache.get_or_compute("summary", None, "v2", compute("new"), generation=2) == "new"
+    value, version, _ = cache.get_or_stale("summary", None, "v2", compute("newer"), generation=2)
+    assert (value, version) == ("new", "v2")
+    assert cache.stats()["stale_size"] == 0
+
+
+def test_stale_fallback_needs_a_previous_result():
+    cache = VersionedCache()
+    value, version, _ = cache.get_or_stale("summary", None, "v1", lambda: "fresh", generation=1)
+    assert (value, version) == ("fresh", "v1")
+
+
+def test_superseded_generation_is_not_stored():
+    cache = VersionedCache()
+    cache.get_or_compute("summary", None, "v2", lambda: "new", generation=2)
+    assert cache.get_or_compute("summary", None, "v1", lambda: "old", generation=1) == "old"
+    assert cache.version == "v2"
+    assert cache.get_or_compute("summary", None, "v2", lambda: "recomputed", generation=2) == "new"
+    assert cache.stats()["superseded"] == 1
+
+
+def test_advance_stops_storing_older_results():
+    cache = VersionedCache()
+    cache.advance(2)
+    assert cache.get_or_compute("summary", None, "v1", lambda: "old", generation=1) == "old"
+    assert len(cache) == 0
+
+
+def test_lru_eviction_and_reserve():
+    cache = VersionedCache(maxsize=2)
+    for year in ("a", "b", "c"):
+        cache.get_or_compute("summary", year, "v1", lambda: year, generation=1)
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+
+    cache.reserve(3)
+    assert cache.maxsize == 5
+    cache.reserve(1)
+    assert cache.maxsize == 3
+    assert cache.base_maxsize == 2
+
+
+def test_compute_errors_are_not_cached():
+    cache = VersionedCache()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    try:
+        cache.get_or_compute("summary", None, "v1", fail, generation=1)
+    except RuntimeError:
+        pass
+    assert len(cache) == 0
+    assert cache.get_or_compute("summary", None, "v1", lambda: "ok", generation=1) == "ok"
@@ -0,0 +1,59 @@
+import math
+from datetime import date
+
+import pytest
+
+from app.entities import Dataset, consolidate
+from app.periods import PeriodStore
+
+
+@pytest.fixture
+def branch(income_statements, balance_sheets) -> PeriodStore:
+    # Reports the latest year, plus a year the main store doesn't have
+    older = dict(income_statements[1], period_start=date(2022, 10, 1), period_end=date(2023, 9, 30))
+    return PeriodStore([income_statements[0], older], balance_sheets[:1], {}, name="Branch")
+
+
+def test_consolidation_sums_per_period_end(store, branch):
+    combined = consolidate([store, branch], name="Both")
+    assert [p.period_end for p in combined] == [date(2025, 9, 30), date(2024, 9, 30), date(2023, 9, 30)]
+
+    latest, middle, oldest = combined
+    for name in ("net_sales", "rent", "net_income"):
+        assert latest.income[name] == pytest.approx(store.latest.income[name] + branch.latest.income[name])
+        assert middle.income[name] == store.get("FY23-24").income[name]
+        assert oldest.income[name] == branch.get("FY22-23").income[name]
+    assert latest.balance["total_cash"] == pytest.approx(2 * store.latest.balance["total_cash"])
+    assert oldest.balance is None
+    assert math.isnan(combined.balance_table["total_cash"][2])
+
+
+def test_consolidated_period_start_is_the_earliest(store, branch, income_statements):
+    early = dict(income_statements[0], period_start=date(2024, 7, 1))
+    other = PeriodStore([early], [], {}, name="Early")
+    combined = consolidate([store, other])
+    assert combined.latest.income["period_start"] == date(2024, 7, 1)
+
+
+def test_dataset_caches_consolidations(store, branch):
+    dataset = Dataset({"lrc": store, "branch": branch}, "lrc")
+    both = dataset.consolidated()
+    assert dataset.consolidated(["lrc", "branch"]) is both
+    assert dataset.consolidated(["lrc"]) is dataset.store("lrc")
+    assert both.members.keys() == {"branch", "lrc"}
+    assert both.name == "Consolidated (Branch, Little Red Coffee Ltd.)"
+    with pytest.raises(KeyError):
+        dataset.consolidated(["lrc", "nobody"])
+
+
+def test_dataset_version_and_generation(store, branch, income_statements):
+    dataset = Dataset({"lrc": store, "branch": branch}, "lrc")
+    again = Dataset({"branch": branch, "lrc": store}, "lrc")
+    assert again.version == dataset.version
+    assert again.generation > dataset.generation
+
+    interim = [{"period_start": date(2025, 10, 1), "period_end": date(2025, 10, 31), "rent": 1000.0}]
+    with_interim = dataset.with_interim("lrc", interim)
+    assert with_interim.version != dataset.version
+    assert "lrc" not in dataset.rollups
+    assert len(with_interim.store("lrc").interim) == 1
@@ -0,0 +1,93 @@
+import gzip
+
+from starlette.datastructures import QueryParams
+
+from app.http_cache import compute_etag, encoded_etag, is_cacheable, matching_etag
+from app.prerender import brotli, choose_encoding, render_json
+
+
+def test_etag_depends_on_version_path_and_query():
+    etag = compute_etag("v1", "/api/summary", QueryParams("year=FY24-25"))
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == compute_etag("v1", "/api/summary", QueryParams("year=FY24-25"))
+    assert etag != compute_etag("v2", "/api/summary", QueryParams("year=FY24-25"))
+    assert etag != compute_etag("v1", "/api/metrics", QueryParams("year=FY24-25"))
+    assert etag != compute_etag("v1", "/api/summary", QueryParams("year=FY23-24"))
+    # Parameter order doesn't matter
+    assert compute_etag("v1", "/api/x", QueryParams("a=1&b=2")) == compute_etag("v1", "/api/x", QueryParams("b=2&a=1"))
+
+
+def test_matching_etag():
+    etag = '"abc"'
+    assert matching_etag(None, etag) is None
+    assert matching_etag('"abc"', etag) == '"abc"'
+    assert matching_etag('W/"abc"', etag) == '"abc"'
+    assert matching_etag('"other", "abc-gzip"', etag) == '"abc-gzip"'
+    assert matching_etag("*", etag) == etag
+    assert matching_etag('"abcd"', etag) is None
+    assert encoded_etag(etag, "br") == '"abc-br"'
+    assert encoded_etag(etag, None) == etag
+
+
+def test_cacheable_paths():
+    assert is_cacheable("GET", "/api/summary")
+    assert not is_cacheable("POST", "/api/summary")
+    assert not is_cacheable("GET", "/api/health")
+    assert not is_cacheable("GET", "/")
+
+
+def test_choose_encoding():
+    available = {"gzip": b"", "br": b""}
+    assert choose_encoding(None, available) is None
+    assert choose_encoding("gzip, deflate", available) == "gzip"
+    assert choose_encoding("gzip, br", available) == "br"
+    assert choose_encoding("br;q=0, gzip", available) == "gzip"
+    assert choose_encoding("*", available) == "br"
+    assert choose_encoding("identity", available) is None
+    assert choose_encoding("br", {"gzip": b""}) is None
+
+
+def test_prerendered_variants_decode_to_the_same_body():
+    body = render_json({"value": 1.5, "name": "café"})
+    assert body.identity == '{"value":1.5,"name":"café"}'.encode()
+    assert gzip.decompress(body.encoded["gzip"]) == body.identity
+    if brotli is not None:
+        assert brotli.decompress(body.encoded["br"]) == body.identity
+
+
+def test_if_none_match_is_answered_with_304(client):
+    response = client.get("/api/summary")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"].startswith("max-age=")
+
+    revalidated = client.get("/api/summary", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+    assert client.get("/api/summary", headers={"If-None-Match": '"stale"'}).status_code == 200
+    assert client.get("/api/metrics", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_uncacheable_endpoints_have_no_etag(client):
+    assert "etag" not in client.get("/api/health").headers
+
+
+def test_prerendered_bodies_negotiate_encoding(client):
+    identity = client.get("/api/income-statements", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["vary"] == "Accept-Encoding"
+
+    compressed = client.get("/api/income-statements", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] == encoded_etag(identity.headers["etag"], "gzip")
+    # The test client decodes the body
+    assert compressed.content == identity.content
+
+    # A client holding the gzip representation revalidates against the plain tag
+    revalidated = client.get(
+        "/api/income-statements",
+        headers={"Accept-Encoding": "identity", "If-None-Match": compressed.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
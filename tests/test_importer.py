@@ -0,0 +1,96 @@
+from datetime import date
+
+import pytest
+
+from app.importer import default_account_map, import_export, import_options, map_export
+from app.ledger import StatementLedger
+
+TRIAL_BALANCE_DEBIT_CREDIT = """\
+period_end,account,debit,credit
+2025-09-30,Food & Beverage Sales,,1000.00
+2025-09-30,Food Beverage Purchases,400.00,
+2025-09-30,Rent,"1,200.00",
+2025-09-30,Chequing Account,2500.00,
+2025-09-30,Accounts Payable,,300.00
+"""
+
+TRIAL_BALANCE_SIGNED = """\
+period_end,account,amount
+2025-09-30,Food & Beverage Sales,-1000.00
+2025-09-30,Food Beverage Purchases,400.00
+2025-09-30,Rent,"1,200.00"
+2025-09-30,Chequing Account,2500.00
+2025-09-30,Accounts Payable,(300.00)
+"""
+
+GL_DETAIL = """\
+date,account,amount
+2025-08-03,Food & Beverage Sales,-250.00
+2025-08-21,Food & Beverage Sales,-150.00
+2025-09-02,Food & Beverage Sales,-600.00
+2025-09-15,Rent,1200.00
+2025-09-15,Chequing Account,-1200.00
+"""
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = StatementLedger(tmp_path / "ledger.db", read_pool_size=1)
+    yield ledger
+    ledger.close()
+
+
+def totals(source: str, interim: bool = False) -> dict:
+    accounts = default_account_map()
+    _, merged = map_export(
+        source.splitlines(), lambda columns: import_options(columns, accounts, "lrc", interim)
+    )
+    return merged.totals
+
+
+@pytest.mark.parametrize("source", [TRIAL_BALANCE_DEBIT_CREDIT, TRIAL_BALANCE_SIGNED])
+def test_credit_normal_accounts_come_out_positive(source):
+    result = totals(source)
+    income = result[("lrc", "income", date(2024, 10, 1), date(2025, 9, 30))]
+    balance = result[("lrc", "balance", None, date(2025, 9, 30))]
+    assert income == {"food_beverage_sales": 1000.0, "food_beverage_purchases": 400.0, "rent": 1200.0}
+    assert balance == {"chequing_account": 2500.0, "accounts_payable": 300.0}
+
+
+def test_signed_amount_matches_debit_credit():
+    assert totals(TRIAL_BALANCE_SIGNED) == totals(TRIAL_BALANCE_DEBIT_CREDIT)
+
+
+def test_import_fills_subtotals(ledger):
+    report = import_export(ledger, TRIAL_BALANCE_SIGNED.splitlines(), entity="lrc")
+    assert (report.income_statements, report.balance_sheets, report.errors) == (1, 1, [])
+    [income] = ledger.income_statements("lrc")
+    assert income["net_sales"] == 1000.0
+    assert income["total_revenue"] == 1000.0
+    [balance] = ledger.balance_sheets("lrc")
+    assert balance["total_cash"] == 2500.0
+
+
+def test_gl_detail_requires_interim(ledger):
+    with pytest.raises(ValueError, match="interim"):
+        import_export(ledger, GL_DETAIL.splitlines(), entity="lrc")
+    assert ledger.is_empty()
+
+
+def test_gl_detail_is_summed_into_months(ledger):
+    report = import_export(ledger, GL_DETAIL.splitlines(), entity="lrc", interim=True)
+    assert report.interim_income_statements == 2
+    assert report.skipped_postings == 1
+    months = {row["period_end"]: row for row in ledger.interim_income_statements("lrc")}
+    assert sorted(months) == [date(2025, 8, 31), date(2025, 9, 30)]
+    assert months[date(2025, 8, 31)]["period_start"] == date(2025, 8, 1)
+    assert months[date(2025, 8, 31)]["food_beverage_sales"] == 400.0
+    assert months[date(2025, 9, 30)]["food_beverage_sales"] == 600.0
+    assert months[date(2025, 9, 30)]["rent"] == 1200.0
+
+
+def test_unmapped_accounts_and_bad_rows_are_reported(ledger):
+    source = "period_end,account,amount\n2025-09-30,Mystery Account,5\nnot-a-date,Rent,10\n"
+    report = import_export(ledger, source.splitlines(), entity="lrc")
+    assert report.unmapped_accounts == {"Mystery Account": 1}
+    assert len(report.errors) == 1 and report.errors[0].startswith("line 3:")
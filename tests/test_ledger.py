@@ -0,0 +1,115 @@
+import time
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.ledger import StatementLedger
+from app.snapshot import read_snapshot
+from data.financials import INDUSTRY_BENCHMARKS
+
+LOAN = {"loan": "bdc", "name": "BDC", "balance_field": "bdc_loan", "annual_rate_pct": 9.5, "monthly_payment": 800}
+
+
+@pytest.fixture
+def ledger(tmp_path, income_statements, balance_sheets):
+    ledger = StatementLedger(tmp_path / "ledger.db", read_pool_size=2)
+    ledger.seed(income_statements, balance_sheets, INDUSTRY_BENCHMARKS)
+    yield ledger
+    ledger.close()
+
+
+def test_seed_only_fills_an_empty_ledger(ledger, income_statements, balance_sheets):
+    assert not ledger.seed(income_statements, balance_sheets, INDUSTRY_BENCHMARKS)
+    assert [row["period_end"] for row in ledger.income_statements()] == [date(2025, 9, 30), date(2024, 9, 30)]
+    assert ledger.income_statements(fiscal_year="FY23-24") == ledger.income_statements(end=date(2024, 9, 30))
+
+
+def test_revision_counts_write_transactions(ledger, income_statements):
+    revision = ledger.revision()
+    ledger.upsert_income_statements(income_statements[:1])
+    assert ledger.revision() == revision + 1
+    assert ledger.written_revision() == revision + 1
+
+    # Another connection's writes are seen too
+    other = StatementLedger(ledger.path, read_pool_size=1)
+    other.replace_loans([LOAN])
+    assert ledger.revision() == revision + 2
+    assert ledger.written_revision() == revision + 1
+    other.close()
+
+
+def test_period_window(ledger, income_statements, balance_sheets):
+    older = dict(income_statements[1], period_start=date(2022, 10, 1), period_end=date(2023, 9, 30))
+    ledger.upsert_income_statements([older])
+    # A second entity whose only period falls between the first entity's
+    branch = dict(income_statements[0], period_start=date(2024, 4, 1), period_end=date(2025, 3, 31))
+    ledger.upsert_income_statements([branch], entity="branch")
+
+    window = ledger.period_window(["lrc"])
+    incomes, balances = window["lrc"]
+    assert [row["period_end"] for row in incomes] == [date(2025, 9, 30), date(2024, 9, 30)]
+    assert [row["period_end"] for row in balances] == [date(2025, 9, 30), date(2024, 9, 30)]
+
+    incomes, balances = ledger.period_window(["lrc"], "FY23-24")["lrc"]
+    assert [row["period_end"] for row in incomes] == [date(2024, 9, 30), date(2023, 9, 30)]
+    assert [row["period_end"] for row in balances] == [date(2024, 9, 30)]
+
+    # Period ends are counted across the entities together
+    window = ledger.period_window(["lrc", "branch"])
+    assert [row["period_end"] for row in window["lrc"][0]] == [date(2025, 9, 30)]
+    assert [row["period_end"] for row in window["branch"][0]] == [date(2025, 3, 31)]
+
+    assert ledger.period_window(["lrc"], "FY19-20") == {}
+    assert ledger.period_window(["nobody"]) == {}
+
+
+def test_refresh_follows_other_writers(main):
+    version, revision = main.dataset.version, main.ledger_revision
+    assert not main.refresh_from_ledger()
+
+    other = StatementLedger(main.settings.ledger_file, read_pool_size=1)
+    other.replace_loans([LOAN], "lrc")
+    other.close()
+
+    assert main.refresh_from_ledger()
+    assert main.ledger_revision > revision
+    assert main.dataset.version != version
+    assert main.dataset.default.loans[0]["loan"] == "bdc"
+    # The snapshot was rebuilt for the new revision
+    assert read_snapshot(main.settings.snapshot_file).revision == main.ledger_revision
+    assert not main.refresh_from_ledger()
+
+
+def test_requests_pick_up_other_writers(main, monkeypatch):
+    monkeypatch.setattr(main.settings, "ledger_poll_seconds", 0.01)
+    with TestClient(main.app) as client:
+        before = client.get("/api/debt-progress")
+        version = main.dataset.version
+
+        other = StatementLedger(main.settings.ledger_file, read_pool_size=1)
+        other.replace_loans([{**LOAN, "monthly_payment": 1200}], "lrc")
+        other.close()
+
+        # The request that notices the write starts a background reload
+        main.ledger_checked_at = 0.0
+        assert client.get("/api/health").status_code == 200
+        deadline = time.monotonic() + 5
+        while main.dataset.version == version and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert main.dataset.version != version
+
+        after = client.get("/api/debt-progress")
+        assert after.headers["etag"] != before.headers["etag"]
+        assert client.get("/api/debt-progress", headers={"If-None-Match": before.headers["etag"]}).status_code == 200
+
+
+@pytest.mark.parametrize("year", [None, "FY24-25", "FY23-24"])
+def test_window_payloads_match_the_full_store(main, year):
+    current = main.dataset
+    store = current.default
+    period = store.get(year) if year else store.latest
+    for endpoint, build in main.PERIOD_PAYLOADS.items():
+        _, compute = main.period_payload(endpoint, year, current, (current.default_entity,))
+        expected = main.metrics_payload(store) if endpoint == "metrics" and not year else build(store, period)
+        assert compute() == expected, endpoint
@@ -0,0 +1,97 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.loans import MAX_MONTHS, amortize, debt_outlook, loan_schedules, month_end, months_between
+
+
+def simulate(balance: float, annual_rate_pct: float, payment: float) -> list[float]:
+    """Balances after each payment, one month at a time"""
+    rate = annual_rate_pct / 1200
+    balances = [balance]
+    while balance > 0 and len(balances) <= MAX_MONTHS:
+        balance = max(balance * (1 + rate) - payment, 0.0)
+        balances.append(balance)
+    return balances
+
+
+def loan(**terms) -> dict:
+    return {
+        "loan": "bdc",
+        "name": "BDC",
+        "balance_field": "bdc_loan",
+        "annual_rate_pct": 6.0,
+        "monthly_payment": 500.0,
+        "maturity": None,
+        "balance": 20000.0,
+        "balance_date": date(2025, 9, 30),
+        **terms,
+    }
+
+
+def test_month_helpers():
+    assert month_end(date(2025, 1, 31), 1) == date(2025, 2, 28)
+    assert month_end(date(2025, 9, 30), 4) == date(2026, 1, 31)
+    assert months_between(date(2025, 9, 30), date(2025, 12, 31)) == 3
+    assert months_between(date(2025, 9, 30), date(2025, 12, 30)) == 2
+    assert months_between(date(2025, 9, 30), date(2025, 1, 1)) == 0
+
+
+@pytest.mark.parametrize(
+    "balance, rate, payment",
+    [(20000.0, 6.0, 500.0), (12000.0, 0.0, 1000.0), (5000.0, 18.5, 137.25), (0.0, 5.0, 100.0)],
+)
+def test_closed_form_matches_month_by_month(balance, rate, payment):
+    expected = simulate(balance, rate, payment)
+    result = amortize(np.array([balance]), np.array([rate]), np.array([payment]))
+    assert result.payoff_months[0] == len(expected) - 1
+    np.testing.assert_allclose(result.balance[0, : len(expected)], expected, atol=1e-6)
+    assert result.principal[0].sum() == pytest.approx(balance)
+
+
+def test_payment_not_covering_interest_never_pays_off():
+    result = amortize(np.array([10000.0]), np.array([12.0]), np.array([100.0]))
+    assert result.payoff_months[0] == MAX_MONTHS + 1
+    [summary] = loan_schedules([loan(balance=10000.0, annual_rate_pct=12.0, monthly_payment=100.0)], date(2025, 9, 30))
+    assert summary["months_remaining"] is None
+    assert summary["payoff_date"] is None
+
+
+def test_level_payment_pays_off_at_maturity():
+    terms = loan(monthly_payment=None, maturity=date(2030, 9, 30))
+    [summary] = loan_schedules([terms], date(2025, 9, 30), include_schedule=True)
+    assert summary["months_remaining"] == 60
+    assert summary["payoff_date"] == "2030-09-30"
+    assert summary["schedule"][-1]["balance"] == 0.0
+    payments = {row["payment"] for row in summary["schedule"]}
+    assert max(payments) - min(payments) < 0.02
+
+
+def test_interest_to_date():
+    [summary] = loan_schedules([loan()], date(2025, 12, 31), include_schedule=True)
+    assert summary["interest_to_date"] == round(sum(row["interest"] for row in summary["schedule"][:3]), 2)
+
+
+def test_prepayments_save_interest():
+    [summary] = loan_schedules([loan()], date(2025, 9, 30), extra={"bdc": 250.0}, lump_sum={"bdc": 5000.0})
+    baseline = summary["baseline"]
+    assert summary["monthly_payment"] == 750.0
+    assert summary["months_remaining"] < baseline["months_remaining"]
+    assert summary["months_saved"] == baseline["months_remaining"] - summary["months_remaining"]
+    # Saved from the unrounded totals
+    assert summary["interest_saved"] == pytest.approx(baseline["total_interest"] - summary["total_interest"], abs=0.01)
+    assert summary["interest_saved"] > 0
+
+
+def test_debt_outlook_combines_loans_per_balance_field():
+    terms = [
+        {k: v for k, v in loan(loan="a", annual_rate_pct=4.0).items() if k not in ("balance", "balance_date")},
+        {k: v for k, v in loan(loan="b", annual_rate_pct=8.0).items() if k not in ("balance", "balance_date")},
+    ]
+    outlook = debt_outlook(terms, [10000.0, 30000.0], date(2025, 9, 30))["bdc_loan"]
+    separate = loan_schedules([loan(loan="b", annual_rate_pct=8.0, balance=30000.0)], date(2025, 9, 30))[0]
+    assert outlook["annual_rate_pct"] == 7.0
+    assert outlook["monthly_payment"] == 1000.0
+    assert outlook["payoff_date"] == separate["payoff_date"]
+    assert outlook["months_remaining"] == separate["months_remaining"]
@@ -0,0 +1,36 @@
+from datetime import date
+
+from app.metrics import calculate_metrics, calculate_metrics_batch
+from app.periods import PeriodStore
+
+
+def test_batch_matches_calculate_metrics(store):
+    batch = calculate_metrics_batch(store.income_table, store.balance_table)
+    assert len(batch) == len(store)
+    for period, metrics in zip(store, batch):
+        assert metrics == calculate_metrics(period.income, period.balance)
+
+
+def test_batch_without_balance_sheets(store):
+    batch = calculate_metrics_batch(store.income_table)
+    for period, metrics in zip(store, batch):
+        assert metrics == calculate_metrics(period.income)
+
+
+def test_batch_handles_zero_denominators_and_missing_rows(income_statements, balance_sheets):
+    zeroed = dict(income_statements[0], total_revenue=0.0, net_sales=0.0)
+    empty_balance = dict(
+        balance_sheets[0], total_current_liabilities=0.0, total_equity=0.0, total_liabilities=0.0
+    )
+    # An income statement without a balance sheet, and a balance sheet without an income statement
+    orphan = dict(balance_sheets[1], period_end=date(2023, 9, 30))
+    store = PeriodStore([zeroed, *income_statements[1:]], [empty_balance, orphan], {})
+    batch = calculate_metrics_batch(store.income_table, store.balance_table)
+    assert len(batch) == 3
+    assert batch[2] is None
+    for period, metrics in zip(list(store)[:2], batch):
+        assert metrics == calculate_metrics(period.income, period.balance)
+    assert batch[0]["current_ratio"] is None
+    assert batch[0]["debt_to_equity"] is None
+    assert batch[0]["gross_margin_pct"] == 0
+    assert "current_ratio" not in batch[1]
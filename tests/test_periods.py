@@ -0,0 +1,49 @@
+from datetime import date
+
+from app.periods import PeriodStore, fiscal_year_start, get_fiscal_year_label
+
+
+def test_fiscal_year_labels():
+    assert get_fiscal_year_label(date(2025, 9, 30)) == "FY24-25"
+    assert get_fiscal_year_label(date(2025, 10, 31)) == "FY25-26"
+    assert fiscal_year_start(date(2025, 3, 31)) == date(2024, 10, 1)
+
+
+def test_lookups(store):
+    latest = store.latest
+    assert latest.label == "FY24-25"
+    assert store.get("FY24-25") is latest
+    assert store.get("FY19-20") is None
+    assert store.get_by_end(date(2024, 9, 30)).label == "FY23-24"
+    assert store.get_by_end(date(2024, 9, 29)) is None
+    assert store.previous(latest) is store.get("FY23-24")
+    assert store.previous(store.get("FY23-24")) is None
+
+
+def test_between(store):
+    assert [p.label for p in store.between()] == ["FY24-25", "FY23-24"]
+    assert [p.label for p in store.between(start=date(2024, 10, 1))] == ["FY24-25"]
+    assert [p.label for p in store.between(end=date(2025, 9, 29))] == ["FY23-24"]
+    assert store.between(date(2026, 1, 1), date(2026, 12, 31)) == []
+
+
+def test_statements_are_joined_by_period_end(income_statements, balance_sheets):
+    # Lists in different orders, and a balance sheet without an income statement
+    extra = dict(balance_sheets[1], period_end=date(2023, 9, 30))
+    store = PeriodStore(income_statements[::-1], [extra, *balance_sheets], {})
+    assert [p.period_end for p in store] == [date(2025, 9, 30), date(2024, 9, 30), date(2023, 9, 30)]
+    for period in store:
+        if period.income is not None:
+            assert period.income["period_end"] == period.period_end
+        assert period.balance["period_end"] == period.period_end
+    assert store.get_by_end(date(2023, 9, 30)).income is None
+    assert len(store.income_statements()) == 2
+    assert len(store.balance_sheets()) == 3
+
+
+def test_version_follows_content(income_statements, balance_sheets, store):
+    same = PeriodStore(income_statements[::-1], balance_sheets, store.benchmarks, name=store.name)
+    assert same.version == store.version
+    restated = [dict(income_statements[0], rent=1.0), income_statements[1]]
+    changed = PeriodStore(restated, balance_sheets, store.benchmarks, name=store.name)
+    assert changed.version != store.version
@@ -0,0 +1,90 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.rollups import INCOME_FIELDS, InterimRollup
+
+
+def month(year: int, number: int, sales: float, inventory_end: float = 0.0) -> dict:
+    start = date(year, number, 1)
+    end = (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return {
+        "period_start": start,
+        "period_end": end,
+        "food_beverage_sales": sales,
+        "rent": 1000.0,
+        "inventory_beginning": inventory_end - 10,
+        "inventory_end": inventory_end,
+    }
+
+
+# Oct 2023 .. Sep 2025: two fiscal years of months
+MONTHS = [month(2023 + (m + 9) // 12, (m + 9) % 12 + 1, 100.0 + m, inventory_end=m) for m in range(24)]
+
+
+def naive_total(rows: list[dict], start: date, end: date, name: str) -> float:
+    return round(sum(row.get(name, 0.0) for row in rows if start <= row["period_end"] <= end), 2)
+
+
+@pytest.fixture
+def rollup() -> InterimRollup:
+    return InterimRollup(MONTHS)
+
+
+def test_between_matches_naive_sums(rollup):
+    for start, end in [(date(2023, 10, 1), date(2025, 9, 30)), (date(2024, 2, 1), date(2024, 7, 31))]:
+        totals = rollup.between(start, end)
+        for name in ("food_beverage_sales", "rent"):
+            assert totals[name] == naive_total(MONTHS, start, end, name)
+
+
+def test_opening_and_closing_inventory(rollup):
+    totals = rollup.between(date(2024, 2, 1), date(2024, 7, 31))
+    assert totals["periods"] == 6
+    assert totals["inventory_beginning"] == 4 - 10
+    assert totals["inventory_end"] == 9
+
+
+def test_year_to_date_and_trailing_twelve_months(rollup):
+    ytd = rollup.year_to_date(date(2025, 3, 31))
+    assert ytd["fiscal_year"] == "FY24-25"
+    assert ytd["periods"] == 6
+    assert ytd["period_start"] == "2024-10-01"
+    expected = naive_total(MONTHS, date(2024, 10, 1), date(2025, 3, 31), "food_beverage_sales")
+    assert ytd["food_beverage_sales"] == expected
+
+    ttm = rollup.trailing_twelve_months(date(2025, 3, 31))
+    assert ttm["periods"] == 12
+    assert ttm["period_start"] == "2024-04-01"
+
+
+def test_empty_range(rollup):
+    assert rollup.between(date(2030, 1, 1), date(2030, 12, 31)) == {"periods": 0, "months": 0.0}
+
+
+def test_insertion_order_does_not_matter(rollup):
+    shuffled = InterimRollup()
+    for row in MONTHS[12:] + MONTHS[:12][::-1]:
+        shuffled.add(row)
+    assert shuffled.version == rollup.version
+    assert shuffled.fiscal_year(date(2024, 9, 30)) == rollup.fiscal_year(date(2024, 9, 30))
+
+
+def test_restating_a_period_updates_later_totals(rollup):
+    restated = rollup.copy()
+    restated.add({**MONTHS[3], "food_beverage_sales": 0.0})
+    assert len(restated) == len(rollup)
+    assert restated.version != rollup.version
+    before = rollup.year_to_date(date(2024, 9, 30))["food_beverage_sales"]
+    after = restated.year_to_date(date(2024, 9, 30))["food_beverage_sales"]
+    assert round(before - after, 2) == MONTHS[3]["food_beverage_sales"]
+    # The original is left as it was
+    assert rollup.year_to_date(date(2024, 9, 30))["food_beverage_sales"] == before
+
+
+def test_from_arrays_round_trip(rollup):
+    starts, ends, rows = rollup.arrays()
+    rebuilt = InterimRollup.from_arrays(starts, ends, rows, rollup.version)
+    assert rows.shape == (len(MONTHS), len(INCOME_FIELDS))
+    everything = (date(2023, 10, 1), date(2025, 9, 30))
+    assert rebuilt.between(*everything) == rollup.between(*everything)
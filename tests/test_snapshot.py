@@ -0,0 +1,112 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.entities import Dataset
+from app.periods import PeriodStore
+from app.rollups import InterimRollup
+from app.snapshot import MAGIC, read_snapshot, write_snapshot
+from data.financials import INDUSTRY_BENCHMARKS
+
+LOANS = [
+    {
+        "loan": "bdc",
+        "name": "BDC",
+        "balance_field": "bdc_loan",
+        "annual_rate_pct": 9.5,
+        "monthly_payment": None,
+        "maturity": date(2030, 9, 30),
+    }
+]
+
+INTERIM = [
+    {"period_start": date(2025, 10, 1), "period_end": date(2025, 10, 31), "food_beverage_sales": 1200.0},
+    {"period_start": date(2025, 11, 1), "period_end": date(2025, 11, 30), "food_beverage_sales": 900.0},
+]
+
+
+@pytest.fixture
+def dataset(store, income_statements, balance_sheets) -> Dataset:
+    # A second entity with a subtotal that doesn't reconcile and an income statement without a balance sheet
+    restated = dict(income_statements[0], total_revenue=income_statements[0]["total_revenue"] + 100)
+    older = dict(income_statements[1], period_start=date(2022, 10, 1), period_end=date(2023, 9, 30))
+    branch = PeriodStore([restated, income_statements[1], older], balance_sheets, INDUSTRY_BENCHMARKS, name="Branch")
+    return Dataset(
+        {"lrc": store, "branch": branch},
+        "lrc",
+        rollups={"lrc": InterimRollup(INTERIM)},
+        loans={"lrc": LOANS},
+    )
+
+
+def assert_same_store(loaded: PeriodStore, original: PeriodStore):
+    assert loaded.version == original.version
+    assert loaded.name == original.name
+    assert loaded.benchmarks == original.benchmarks
+    assert loaded.by_label == original.by_label
+    assert loaded.ends.tolist() == original.ends.tolist()
+    assert loaded.income_statements() == original.income_statements()
+    assert loaded.balance_sheets() == original.balance_sheets()
+    for name, column in original.income_table.columns.items():
+        np.testing.assert_array_equal(loaded.income_table[name], column)
+    assert loaded.reconciliation.checks == original.reconciliation.checks
+    assert loaded.reconciliation.mismatches == original.reconciliation.mismatches
+
+
+def test_round_trip(tmp_path, dataset):
+    path = write_snapshot(tmp_path / "ledger.snapshot", dataset, revision=7)
+    snapshot = read_snapshot(path)
+    assert snapshot.revision == 7
+    loaded = snapshot.dataset()
+
+    assert loaded.version == dataset.version
+    assert loaded.default_entity == "lrc"
+    assert loaded.entities() == dataset.entities()
+    for entity in dataset.entities():
+        assert_same_store(loaded.store(entity), dataset.store(entity))
+    assert loaded.loans == dataset.loans
+    assert loaded.store("lrc").interim.version == dataset.store("lrc").interim.version
+    assert loaded.store("lrc").interim.year_to_date(date(2025, 11, 30))["food_beverage_sales"] == 2100.0
+
+
+def test_missing_statements_read_back_as_none(tmp_path, dataset):
+    loaded = read_snapshot(write_snapshot(tmp_path / "ledger.snapshot", dataset, revision=1)).dataset()
+    oldest = loaded.store("branch").get_by_end(date(2023, 9, 30))
+    assert oldest.income["period_start"] == date(2022, 10, 1)
+    assert oldest.balance is None
+    assert loaded.store("branch").reconciliation.mismatches
+
+
+def test_arrays_are_views_of_the_mapping(tmp_path, dataset):
+    loaded = read_snapshot(write_snapshot(tmp_path / "ledger.snapshot", dataset, revision=1)).dataset()
+    column = loaded.default.income_table["net_income"]
+    assert not column.flags.owndata
+    assert not column.flags.writeable
+
+
+def test_rewrite_replaces_the_file(tmp_path, dataset, store):
+    path = tmp_path / "ledger.snapshot"
+    write_snapshot(path, dataset, revision=1)
+    write_snapshot(path, Dataset({"lrc": store}, "lrc"), revision=2)
+    snapshot = read_snapshot(path)
+    assert snapshot.revision == 2
+    assert snapshot.dataset().entities() == ["lrc"]
+    assert [p.name for p in tmp_path.iterdir()] == ["ledger.snapshot"]
+
+
+def test_unreadable_snapshots_are_ignored(tmp_path, dataset):
+    assert read_snapshot(tmp_path / "missing.snapshot") is None
+    empty = tmp_path / "empty.snapshot"
+    empty.write_bytes(b"")
+    assert read_snapshot(empty) is None
+    other = tmp_path / "other.snapshot"
+    other.write_bytes(b"NOTASNAP" + bytes(64))
+    assert read_snapshot(other) is None
+
+    # Built for other statement fields
+    path = write_snapshot(tmp_path / "ledger.snapshot", dataset, revision=1)
+    data = path.read_bytes()
+    path.write_bytes(data.replace(b'"income_fields":["', b'"income_fields":["x', 1))
+    assert data.startswith(MAGIC)
+    assert read_snapshot(path) is None